@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import ClassVar, NamedTuple, Optional, Tuple, Union
+
+from qgis.PyQt.QtCore import QByteArray, QSize, Qt
+from qgis.PyQt.QtGui import QIcon, QPainter, QPixmap
+from qgis.PyQt.QtSvg import QSvgRenderer
+
+
+class IconKey(NamedTuple):
+    path: str
+    color: Optional[str]
+    size: Optional[int]
+    is_rendered: bool
+
+
+class IconCache:
+    """
+    Process-wide cache of icons loaded from files.
+
+    Icons are shared by path, color and size. Cache is bounded by estimated
+    pixmaps memory and the least recently used icons are dropped first.
+    Icons must be requested from the GUI thread only.
+    """
+
+    MAX_COST: ClassVar[int] = 32 * 1024**2  # bytes
+    FILE_ICON_COST: ClassVar[int] = 64 * 64 * 4
+
+    __instance: ClassVar[Optional["IconCache"]] = None
+    __instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    __icons: "OrderedDict[IconKey, Tuple[QIcon, int]]"
+    __cost: int
+    __max_cost: int
+
+    def __init__(self, max_cost: Optional[int] = None) -> None:
+        self.__icons = OrderedDict()
+        self.__cost = 0
+        self.__max_cost = max_cost if max_cost is not None else self.MAX_COST
+
+    @classmethod
+    def instance(cls) -> "IconCache":
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls()
+            return cls.__instance
+
+    @property
+    def cost(self) -> int:
+        """Estimated memory of cached icons in bytes"""
+        return self.__cost
+
+    def file_icon(self, path: Union[str, Path]) -> QIcon:
+        """Icon which renders file on demand, like QIcon(path)"""
+        key = IconKey(str(path), None, None, is_rendered=False)
+        icon = self.__get(key)
+        if icon is None:
+            icon = QIcon(key.path)
+            self.__put(key, icon, self.FILE_ICON_COST)
+        return icon
+
+    def svg_icon(
+        self,
+        svg_path: Union[str, Path],
+        *,
+        color: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> QIcon:
+        """
+        Icon rendered from SVG file with optional recolor and resize.
+
+        :raises ValueError: If the SVG cannot be loaded.
+        """
+        key = IconKey(str(svg_path), color or None, size, is_rendered=True)
+        icon = self.__get(key)
+        if icon is None:
+            pixmap = self.__render_svg(Path(svg_path), color, size)
+            icon = QIcon(pixmap)
+            self.__put(key, icon, pixmap.width() * pixmap.height() * 4)
+        return icon
+
+    def clear(self) -> None:
+        self.__icons.clear()
+        self.__cost = 0
+
+    def __len__(self) -> int:
+        return len(self.__icons)
+
+    def __get(self, key: IconKey) -> Optional[QIcon]:
+        cached = self.__icons.get(key)
+        if cached is None:
+            return None
+
+        self.__icons.move_to_end(key)
+        return cached[0]
+
+    def __put(self, key: IconKey, icon: QIcon, cost: int) -> None:
+        self.__icons[key] = (icon, cost)
+        self.__cost += cost
+
+        # The newest icon is kept even if it is larger than the limit
+        while self.__cost > self.__max_cost and len(self.__icons) > 1:
+            _, (_, evicted_cost) = self.__icons.popitem(last=False)
+            self.__cost -= evicted_cost
+
+    @staticmethod
+    def __render_svg(
+        svg_path: Path, color: Optional[str], size: Optional[int]
+    ) -> QPixmap:
+        svg_content = svg_path.read_text(encoding="utf-8")
+
+        # Replace only pure white fills to preserve multi-colored icons
+        if color:
+            svg_content = svg_content.replace(
+                'fill="#ffffff"', f'fill="{color}"'
+            )
+            svg_content = svg_content.replace("fill:#ffffff", f"fill:{color}")
+
+        byte_array = QByteArray(svg_content.encode("utf-8"))
+        renderer = QSvgRenderer()
+        if not renderer.load(byte_array):
+            message = f"Failed to load SVG: {svg_path}"
+            raise ValueError(message)
+
+        target_size = (
+            renderer.defaultSize() if size is None else QSize(size, size)
+        )
+        pixmap = QPixmap(target_size)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        renderer.render(painter)
+        painter.end()
+
+        return pixmap
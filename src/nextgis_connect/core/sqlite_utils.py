@@ -0,0 +1,37 @@
+import itertools
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+_temporary_ids_counter = itertools.count()
+
+
+@contextmanager
+def temporary_ids_table(
+    cursor: sqlite3.Cursor, ids: Iterable[int]
+) -> Iterator[str]:
+    """
+    Temporary table with ids to use in queries instead of IN lists.
+
+    Table has one ``id`` column and is dropped on exit, so it may be used
+    with pooled connections. Filling the table does not leave a transaction
+    open if there was none before.
+    """
+    connection = cursor.connection
+    was_in_transaction = connection.in_transaction
+
+    table_name = f"ngw_temporary_ids_{next(_temporary_ids_counter)}"
+    cursor.execute(f"CREATE TEMP TABLE {table_name} (id INTEGER PRIMARY KEY)")
+    try:
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table_name} (id) VALUES (?)",
+            ((id_value,) for id_value in ids),
+        )
+        # Implicit transaction started by INSERT would hold container lock
+        # while features are committed by the layer provider
+        if not was_in_transaction and connection.in_transaction:
+            connection.commit()
+
+        yield table_name
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{table_name}")
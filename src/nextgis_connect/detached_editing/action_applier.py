@@ -1,8 +1,8 @@
 import sqlite3
-from contextlib import closing
 from copy import deepcopy
+from dataclasses import replace
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from qgis.core import (
     QgsEditError,
@@ -13,12 +13,13 @@ from qgis.core import (
 )
 from qgis.PyQt.QtCore import QObject, pyqtSlot
 
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.serialization import deserialize_geometry
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
     FeatureMetaData,
+    container_transaction,
     detached_layer_uri,
-    make_connection,
 )
 from nextgis_connect.exceptions import (
     ContainerError,
@@ -26,6 +27,8 @@ from nextgis_connect.exceptions import (
     NgConnectError,
     SynchronizationError,
 )
+from nextgis_connect.logging import logger
+from nextgis_connect.utils import wrap_sql_table_name
 
 from .actions import (
     ActionType,
@@ -49,6 +52,9 @@ class ActionApplier(QObject):
 
     __commands: List[Tuple[str, Tuple]]
     __create_command_ids: List
+    __features_index: Dict[FeatureId, FeatureMetaData]
+    __next_fid: int
+    __inserted_fids: List[int]
 
     def __init__(
         self, container_path: Path, metadata: DetachedContainerMetaData
@@ -63,19 +69,35 @@ class ActionApplier(QObject):
 
         self.__commands = []
         self.__create_command_ids = []
+        self.__features_index = {}
+        self.__next_fid = 1
+        self.__inserted_fids = []
 
-    def apply(self, actions: List[FeatureAction]) -> None:
+    def apply(
+        self,
+        actions: List[FeatureAction],
+        before_commit: Optional[Callable[[List[int]], None]] = None,
+    ) -> None:
+        """
+        Apply actions to the layer and its metadata.
+
+        ``before_commit`` is called with fids of created features before
+        they are committed by the layer provider, so they can be stored for
+        recovering.
+        """
         if len(actions) == 0:
             return
 
         self.__commands = []
         self.__create_command_ids = []
+        self.__features_index = {}
+        self.__inserted_fids = []
 
         try:
             self.__layer.committedFeaturesAdded.connect(
                 self.__update_create_commands
             )
-            self.__apply_actions(actions)
+            self.__apply_actions(actions, before_commit)
 
         except NgConnectError:
             raise
@@ -96,7 +118,104 @@ class ActionApplier(QObject):
                 self.__update_create_commands
             )
 
-    def __apply_actions(self, actions: List[FeatureAction]) -> None:
+    def recover(
+        self, actions: List[FeatureAction], inserted_fids: Sequence[int]
+    ) -> List[FeatureAction]:
+        """
+        Repair container after interrupted applying of actions.
+
+        Features are committed by the layer provider before their metadata,
+        so an interruption between the commits leaves features without
+        metadata and metadata of deleted features. Features created by
+        interrupted applying are removed, such metadata is deleted and
+        actions which should be applied again are returned.
+        """
+        try:
+            return self.__recover(actions, inserted_fids)
+
+        except NgConnectError:
+            raise
+
+        except sqlite3.Error as error:
+            raise ContainerError from error
+
+        except Exception as error:
+            raise SynchronizationError from error
+
+    def __recover(
+        self, actions: List[FeatureAction], inserted_fids: Sequence[int]
+    ) -> List[FeatureAction]:
+        table_name = wrap_sql_table_name(self.__metadata.table_name)
+        fid_field = wrap_sql_table_name(self.__metadata.fid_field)
+
+        # Metadata of local features may be not logged yet, so only
+        # features inserted by interrupted applying are checked
+        with container_transaction(self.__container_path) as cursor:
+            with temporary_ids_table(cursor, inserted_fids) as ids_table:
+                orphaned_fids = [
+                    row[0]
+                    for row in cursor.execute(
+                        f"""
+                        SELECT {fid_field} FROM {table_name}
+                        WHERE {fid_field} IN (SELECT id FROM {ids_table})
+                            AND {fid_field} NOT IN (
+                                SELECT fid FROM ngw_features_metadata
+                            )
+                        """
+                    )
+                ]
+
+        if len(orphaned_fids) > 0:
+            logger.warning(
+                f"Remove {len(orphaned_fids)} features created by"
+                " interrupted synchronization"
+            )
+            with edit(self.__layer):
+                if not self.__layer.deleteFeatures(orphaned_fids):
+                    raise SynchronizationError("Can't delete features")
+
+        deleted_ngw_fids = [
+            action.fid
+            for action in actions
+            if isinstance(action, FeatureDeleteAction)
+        ]
+        if len(deleted_ngw_fids) == 0:
+            return actions
+
+        with container_transaction(self.__container_path) as cursor:
+            with temporary_ids_table(cursor, deleted_ngw_fids) as ids_table:
+                already_deleted = set(
+                    row[0]
+                    for row in cursor.execute(
+                        f"""
+                        SELECT ngw_fid FROM ngw_features_metadata
+                        WHERE ngw_fid IN (SELECT id FROM {ids_table})
+                            AND fid NOT IN (
+                                SELECT {fid_field} FROM {table_name}
+                            )
+                        """
+                    )
+                )
+                cursor.execute(
+                    f"""
+                    DELETE FROM ngw_features_metadata
+                    WHERE ngw_fid IN (SELECT id FROM {ids_table})
+                        AND fid NOT IN (SELECT {fid_field} FROM {table_name})
+                    """
+                )
+
+        return [
+            action
+            for action in actions
+            if not isinstance(action, FeatureDeleteAction)
+            or action.fid not in already_deleted
+        ]
+
+    def __apply_actions(
+        self,
+        actions: List[FeatureAction],
+        before_commit: Optional[Callable[[List[int]], None]],
+    ) -> None:
         applier_for_action = {
             ActionType.FEATURE_CREATE: self.__create_feature,
             ActionType.FEATURE_UPDATE: self.__update_feature,
@@ -108,6 +227,9 @@ class ActionApplier(QObject):
             ActionType.CONTINUE: self.__continue,
         }
 
+        self.__features_index = self.__build_features_index(actions)
+        self.__next_fid = self.__max_fid() + 1
+
         previously_added, previously_deleted = (
             self.__extract_previously_uploaded(actions)
         )
@@ -120,8 +242,7 @@ class ActionApplier(QObject):
                 if action_type == ActionType.FEATURE_RESTORE:
                     action_type = (
                         ActionType.FEATURE_UPDATE
-                        if self.__get_feature_metadata(ngw_fid=action.fid)
-                        is not None
+                        if action.fid in self.__features_index
                         else ActionType.FEATURE_CREATE
                     )
 
@@ -132,13 +253,66 @@ class ActionApplier(QObject):
 
                 applier_for_action[action_type](*params)
 
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+            if before_commit is not None:
+                before_commit(list(self.__inserted_fids))
+
+        with container_transaction(self.__container_path) as cursor:
             for command in self.__commands:
                 cursor.execute(*command)
 
-            connection.commit()
+    def __build_features_index(
+        self, actions: List[FeatureAction]
+    ) -> Dict[FeatureId, FeatureMetaData]:
+        """Fetch metadata of all features referenced by actions at once"""
+        ngw_fids = list(
+            set(
+                action.fid
+                for action in actions
+                if isinstance(action, FeatureAction)
+            )
+        )
+        if len(ngw_fids) == 0:
+            return {}
+
+        features_index: Dict[FeatureId, FeatureMetaData] = {}
+
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute(
+                "SELECT EXISTS(SELECT 1 FROM ngw_features_metadata)"
+            )
+            if not cursor.fetchone()[0]:
+                return features_index
+
+            with temporary_ids_table(cursor, ngw_fids) as ngw_fids_table:
+                for row in cursor.execute(
+                    f"""
+                    SELECT fid, ngw_fid, version, description
+                    FROM ngw_features_metadata
+                    WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                    """
+                ):
+                    feature_metadata = FeatureMetaData(*row)
+                    assert feature_metadata.ngw_fid not in features_index, (
+                        "More than one feature with one ngw_fid"
+                    )
+                    features_index[row[1]] = feature_metadata
+
+        return features_index
+
+    def __max_fid(self) -> int:
+        table_name = wrap_sql_table_name(self.__metadata.table_name)
+        fid_field = wrap_sql_table_name(self.__metadata.fid_field)
+
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute(
+                f"""
+                SELECT MAX(
+                    COALESCE((SELECT MAX({fid_field}) FROM {table_name}), 0),
+                    COALESCE((SELECT MAX(fid) FROM ngw_features_metadata), 0)
+                )
+                """
+            )
+            return cursor.fetchone()[0]
 
     def __extract_previously_uploaded(
         self, actions: List[FeatureAction]
@@ -146,48 +320,16 @@ class ActionApplier(QObject):
         if not self.__metadata.is_versioning_enabled:
             return (set(), set())
 
-        added_ngw_fids = set()
-        deleted_ngw_fids = set()
-
-        for action in actions:
-            if isinstance(action, FeatureCreateAction):
-                added_ngw_fids.add(action.fid)
-            if isinstance(action, FeatureDeleteAction):
-                deleted_ngw_fids.add(action.fid)
-
-        if len(added_ngw_fids) == 0 and len(deleted_ngw_fids) == 0:
-            return (set(), set())
-
         already_added = set()
         already_deleted = set()
 
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            if len(added_ngw_fids) > 0:
-                added_fids = ",".join(str(fid) for fid in added_ngw_fids)
-                already_added = set(
-                    row[0]
-                    for row in cursor.execute(
-                        f"""
-                        SELECT ngw_fid FROM ngw_features_metadata
-                            WHERE ngw_fid IN ({added_fids})
-                        """
-                    )
-                )
-
-            if len(deleted_ngw_fids) > 0:
-                deleted_fids = ",".join(str(fid) for fid in deleted_ngw_fids)
-                still_existed = set(
-                    row[0]
-                    for row in cursor.execute(
-                        f"""
-                        SELECT ngw_fid FROM ngw_features_metadata
-                            WHERE ngw_fid IN ({deleted_fids})
-                        """
-                    )
-                )
-                already_deleted = deleted_ngw_fids - still_existed
+        for action in actions:
+            if isinstance(action, FeatureCreateAction):
+                if action.fid in self.__features_index:
+                    already_added.add(action.fid)
+            elif isinstance(action, FeatureDeleteAction):
+                if action.fid not in self.__features_index:
+                    already_deleted.add(action.fid)
 
         return (already_added, already_deleted)
 
@@ -204,12 +346,20 @@ class ActionApplier(QObject):
                     (action.vid, action.fid),
                 )
             )
+            self.__features_index[action.fid] = replace(
+                self.__features_index[action.fid], version=action.vid
+            )
             return
 
         fields = self.__metadata.fields
 
+        # Fid is set explicitly to be known before features are committed
+        fid = self.__next_fid
+        self.__next_fid += 1
+
         # Create new feature
         new_feature = QgsFeature(self.__layer.fields())
+        new_feature.setAttribute(self.__metadata.fid_field, fid)
         for field_ngw_id, value in action.fields:
             attribute = fields.get_with(ngw_id=field_ngw_id).attribute
             new_feature.setAttribute(attribute, value)
@@ -219,6 +369,13 @@ class ActionApplier(QObject):
         if not is_success:
             raise SynchronizationError("Can't add feature")
 
+        self.__inserted_fids.append(fid)
+
+        # Feature id is temporary until changes are committed
+        self.__features_index[action.fid] = FeatureMetaData(
+            fid=new_feature.id(), ngw_fid=action.fid, version=action.vid
+        )
+
         # Create metadata for feature
         self.__create_command_ids.append(len(self.__commands))
         self.__commands.append(
@@ -266,6 +423,9 @@ class ActionApplier(QObject):
                 (action.vid, feature_metadata.ngw_fid),
             )
         )
+        self.__features_index[action.fid] = replace(
+            feature_metadata, version=action.vid
+        )
 
     def __delete_feature(
         self, action: FeatureDeleteAction, previously_deleted: Set[FeatureId]
@@ -290,10 +450,11 @@ class ActionApplier(QObject):
         # Delete feature metadata
         self.__commands.append(
             (
-                "DELETE FROM ngw_features_metadata WHERE fid=?",
-                (feature_metadata.fid,),
+                "DELETE FROM ngw_features_metadata WHERE ngw_fid=?",
+                (action.fid,),
             )
         )
+        del self.__features_index[action.fid]
 
     def __put_description(self, action: DescriptionPutAction) -> None:
         feature_metadata = self.__get_feature_metadata(ngw_fid=action.fid)
@@ -307,6 +468,9 @@ class ActionApplier(QObject):
                 (action.value, action.fid),
             )
         )
+        self.__features_index[action.fid] = replace(
+            feature_metadata, description=action.value
+        )
 
     def __create_attachment(self, action: AttachmentCreateAction) -> None:
         pass
@@ -328,21 +492,7 @@ class ActionApplier(QObject):
     def __get_feature_metadata(
         self, *, ngw_fid: FeatureId
     ) -> Optional[FeatureMetaData]:
-        query = f"SELECT * FROM ngw_features_metadata WHERE ngw_fid={ngw_fid}"
-        try:
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                result = [
-                    FeatureMetaData(*row) for row in cursor.execute(query)
-                ]
-
-        except Exception as error:
-            raise ContainerError from error
-
-        assert len(result) <= 1, "More than one feature with one ngw_fid"
-
-        return result[0] if len(result) == 1 else None
+        return self.__features_index.get(ngw_fid)
 
     @pyqtSlot(str, "QgsFeatureList")
     def __update_create_commands(
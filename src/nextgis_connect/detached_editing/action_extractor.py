@@ -1,10 +1,8 @@
-import itertools
-import sqlite3
-from contextlib import closing
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
 
 from qgis.core import (
+    QgsFeature,
     QgsFeatureRequest,
     QgsGeometry,
     QgsVectorLayer,
@@ -17,9 +15,8 @@ from nextgis_connect.detached_editing.serialization import (
 )
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
-    FeatureMetaData,
+    container_transaction,
     detached_layer_uri,
-    make_connection,
 )
 from nextgis_connect.exceptions import (
     ContainerError,
@@ -38,12 +35,20 @@ from .actions import (
     VersioningAction,
 )
 
+MIN_FEATURE_ID = -(2**63)
+
 
 class ActionExtractor:
     """
     Extracts various types of actions from a detached editing container.
+
+    Actions are produced lazily in chunks ordered by feature id, so changes
+    of any size are extracted in constant memory. Every chunk is read in its
+    own short transaction, so the container may be changed between chunks.
     """
 
+    EXTRACTION_CHUNK_SIZE: ClassVar[int] = 1000
+
     __container_path: Path
     __metadata: DetachedContainerMetaData
     __layer: QgsVectorLayer
@@ -58,210 +63,188 @@ class ActionExtractor:
         )
 
     def extract_all(self) -> List[VersioningAction]:
-        added_features = self.extract_added_features()
-        deleted_features = self.extract_deleted_features()
-        restored_features = self.extract_restored_features()
-        updated_features = self.extract_updated_features()
-
-        actions = itertools.chain(
-            added_features,
-            deleted_features,
-            restored_features,
-            updated_features,
-        )
-        return list(actions)
+        return list(self.iter_all())
 
     def extract_added_features(self) -> List[FeatureCreateAction]:
-        try:
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                added_features_id = [
-                    row[0]
-                    for row in cursor.execute(
-                        "SELECT fid from ngw_added_features"
-                    )
-                ]
-        except Exception as error:
-            raise ContainerError from error
-
-        create_actions = []
-        request = QgsFeatureRequest(added_features_id)
-        for feature in self.__layer.getFeatures(request):  # type: ignore
-            fid = feature.id()
-            geom = self.__serialize_geometry(feature.geometry())
-            fields_values = []
-            for field in self.__metadata.fields:
-                value = simplify_value(feature.attribute(field.attribute))
-                if value is None:
-                    continue
-                self.__check_value(field, value)
-                fields_values.append([field.ngw_id, value])
-
-            create_actions.append(
-                FeatureCreateAction(fid, None, geom, fields_values)
-            )
-
-        if len(added_features_id) != len(create_actions):
-            error = ContainerError("Not all actions were created")
-            error.add_note(f"New features count: {len(added_features_id)}")
-            error.add_note(f"Actions count: {len(create_actions)}")
-            raise error
-
-        return create_actions
+        return list(self.iter_added_features())
 
     def extract_updated_features(self) -> List[FeatureUpdateAction]:
-        # Collect information about updated features
-
-        attributes_query = "SELECT fid, attribute from ngw_updated_attributes"
-        geoms_query = "SELECT fid from ngw_updated_geometries"
+        return list(self.iter_updated_features())
 
-        updated_feature_attributes: Dict[FeatureId, Set[int]] = {}
-        updated_feature_geoms: Set[FeatureId] = set()
+    def extract_deleted_features(self) -> List[FeatureDeleteAction]:
+        return list(self.iter_deleted_features())
 
-        try:
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                for fid, attribute in cursor.execute(attributes_query):
-                    if fid not in updated_feature_attributes:
-                        updated_feature_attributes[fid] = set()
-                    updated_feature_attributes[fid].add(attribute)
+    def extract_restored_features(self) -> List[FeatureRestoreAction]:
+        return list(self.iter_restored_features())
 
-                updated_feature_geoms = set(
-                    row[0] for row in cursor.execute(geoms_query)
-                )
+    def iter_all(self) -> Iterator[VersioningAction]:
+        yield from self.iter_added_features()
+        yield from self.iter_existing_features()
 
-                all_updated_fids = list(
-                    set(updated_feature_attributes.keys())
-                    | updated_feature_geoms
-                )
-                if len(all_updated_fids) == 0:
-                    return []
+    def iter_existing_features(self) -> Iterator[VersioningAction]:
+        """Actions for features which already exist in NGW"""
+        yield from self.iter_deleted_features()
+        yield from self.iter_restored_features()
+        yield from self.iter_updated_features()
 
-                features_metadata = self.__features_metadata(
-                    cursor, all_updated_fids
+    def iter_added_features(self) -> Iterator[FeatureCreateAction]:
+        query = """
+            SELECT fid FROM ngw_added_features
+            WHERE fid > ?
+            ORDER BY fid
+            LIMIT ?
+        """
+
+        for rows, features in self.__iter_chunks(query):
+            for (fid,) in rows:
+                feature = features[fid]
+                geom = self.__serialize_geometry(feature.geometry())
+                yield FeatureCreateAction(
+                    fid, None, geom, self.__fields_values(feature)
                 )
 
-        except Exception as error:
-            raise ContainerError from error
-
-        updated_actions: List[FeatureUpdateAction] = []
-
-        request = QgsFeatureRequest(all_updated_fids)
-        for feature in self.__layer.getFeatures(request):  # type: ignore
-            feature_metadata = features_metadata[feature.id()]
-            ngw_fid = feature_metadata.ngw_fid
-            assert ngw_fid is not None
-            vid = feature_metadata.version
-
-            geom = (
-                self.__serialize_geometry(feature.geometry())
-                if feature_metadata.fid in updated_feature_geoms
-                else None
+    def iter_updated_features(self) -> Iterator[FeatureUpdateAction]:
+        query = """
+            WITH updated_features(fid) AS (
+                SELECT fid FROM ngw_updated_attributes
+                UNION
+                SELECT fid FROM ngw_updated_geometries
             )
+            SELECT
+                updated_features.fid,
+                feature_metadata.ngw_fid,
+                feature_metadata.version,
+                EXISTS (
+                    SELECT 1 FROM ngw_updated_geometries updated_geometries
+                    WHERE updated_geometries.fid = updated_features.fid
+                ),
+                (
+                    SELECT group_concat(attribute)
+                    FROM ngw_updated_attributes updated_attributes
+                    WHERE updated_attributes.fid = updated_features.fid
+                )
+            FROM updated_features
+            LEFT JOIN ngw_features_metadata feature_metadata
+                ON feature_metadata.fid = updated_features.fid
+            WHERE updated_features.fid > ?
+            ORDER BY updated_features.fid
+            LIMIT ?
+        """
+
+        fields = self.__metadata.fields
+
+        for rows, features in self.__iter_chunks(query):
+            for fid, ngw_fid, vid, is_geom_updated, attributes in rows:
+                assert ngw_fid is not None
+                feature = features[fid]
+
+                geom = (
+                    self.__serialize_geometry(feature.geometry())
+                    if is_geom_updated
+                    else None
+                )
 
-            fields = self.__metadata.fields
-
-            fields_values = []
-            for attribute_id in updated_feature_attributes.get(
-                feature.id(), set()
-            ):
-                field = fields.get_with(attribute=attribute_id)
-                value = simplify_value(feature.attribute(attribute_id))
-                self.__check_value(field, value)
-                fields_values.append([field.ngw_id, value])
-
-            updated_actions.append(
-                FeatureUpdateAction(ngw_fid, vid, geom, fields_values)
-            )
+                fields_values = []
+                if attributes is not None:
+                    for attribute_id in map(int, attributes.split(",")):
+                        field = fields.get_with(attribute=attribute_id)
+                        value = simplify_value(feature.attribute(attribute_id))
+                        self.__check_value(field, value)
+                        fields_values.append([field.ngw_id, value])
 
-        return updated_actions
+                yield FeatureUpdateAction(ngw_fid, vid, geom, fields_values)
 
-    def extract_deleted_features(self) -> List[FeatureDeleteAction]:
+    def iter_deleted_features(self) -> Iterator[FeatureDeleteAction]:
         query = """
-            SELECT feature_metadata.ngw_fid
+            SELECT removed.fid, feature_metadata.ngw_fid
             FROM ngw_removed_features removed
             LEFT JOIN ngw_features_metadata feature_metadata
                 ON feature_metadata.fid = removed.fid
-            """
+            WHERE removed.fid > ?
+            ORDER BY removed.fid
+            LIMIT ?
+        """
 
-        try:
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                return [
-                    FeatureDeleteAction(row[0])
-                    for row in cursor.execute(query)
-                ]
+        for rows, _ in self.__iter_chunks(query, with_features=False):
+            for _, ngw_fid in rows:
+                yield FeatureDeleteAction(ngw_fid)
 
-        except Exception as error:
-            raise ContainerError from error
-
-    def extract_restored_features(self) -> List[FeatureRestoreAction]:
-        try:
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                restored_features_id = [
-                    row[0]
-                    for row in cursor.execute(
-                        "SELECT fid from ngw_restored_features"
-                    )
-                ]
-                features_metadata = self.__features_metadata(
-                    cursor, restored_features_id
+    def iter_restored_features(self) -> Iterator[FeatureRestoreAction]:
+        query = """
+            SELECT
+                restored.fid,
+                feature_metadata.ngw_fid,
+                feature_metadata.version
+            FROM ngw_restored_features restored
+            LEFT JOIN ngw_features_metadata feature_metadata
+                ON feature_metadata.fid = restored.fid
+            WHERE restored.fid > ?
+            ORDER BY restored.fid
+            LIMIT ?
+        """
+
+        for rows, features in self.__iter_chunks(query):
+            for fid, ngw_fid, version in rows:
+                assert ngw_fid is not None
+                feature = features[fid]
+                geom = self.__serialize_geometry(feature.geometry())
+                yield FeatureRestoreAction(
+                    ngw_fid, version, geom, self.__fields_values(feature)
                 )
-        except Exception as error:
-            raise ContainerError from error
-
-        restore_actions = []
-        request = QgsFeatureRequest(restored_features_id)
-        for feature in self.__layer.getFeatures(request):  # type: ignore
-            fid = feature.id()
-            geom = self.__serialize_geometry(feature.geometry())
-            fields_values = []
-            for field in self.__metadata.fields:
-                value = simplify_value(feature.attribute(field.attribute))
-                if value is None:
-                    continue
-                self.__check_value(field, value)
-                fields_values.append([field.ngw_id, value])
-
-            ngw_fid = features_metadata[fid].ngw_fid
-            version = features_metadata[fid].version
-            assert ngw_fid is not None
-
-            restore_actions.append(
-                FeatureRestoreAction(ngw_fid, version, geom, fields_values)
-            )
 
-        if len(restored_features_id) != len(restore_actions):
-            error = ContainerError("Not all actions were created")
-            error.add_note(
-                f"Restored features count: {len(restored_features_id)}"
-            )
-            error.add_note(f"Actions count: {len(restore_actions)}")
-            raise error
-
-        return restore_actions
-
-    def __features_metadata(
-        self, cursor: sqlite3.Cursor, fids: Iterable[FeatureId]
-    ) -> Dict[FeatureId, FeatureMetaData]:
-        all_fids_joined = ",".join(str(fid) for fid in fids)
-
-        features_metadata = {
-            row[0]: FeatureMetaData(fid=row[0], ngw_fid=row[1], version=row[2])
-            for row in cursor.execute(
-                f"""
-                    SELECT fid, ngw_fid, version
-                    FROM ngw_features_metadata
-                    WHERE fid IN ({all_fids_joined})
-                """
-            )
-        }
-        return features_metadata
+    def __iter_chunks(
+        self, query: str, *, with_features: bool = True
+    ) -> Iterator[Tuple[List[Tuple], Dict[FeatureId, QgsFeature]]]:
+        """
+        Execute keyset paginated query and fetch features of each chunk.
+
+        Query must select fid first and take the last fid of the previous
+        chunk and the chunk size as parameters.
+        """
+        chunk_size = self.EXTRACTION_CHUNK_SIZE
+        last_fid = MIN_FEATURE_ID
+
+        while True:
+            try:
+                with container_transaction(self.__container_path) as cursor:
+                    rows = cursor.execute(
+                        query, (last_fid, chunk_size)
+                    ).fetchall()
+            except Exception as error:
+                raise ContainerError from error
+
+            if len(rows) == 0:
+                return
+
+            last_fid = rows[-1][0]
+
+            features: Dict[FeatureId, QgsFeature] = {}
+            if with_features:
+                request = QgsFeatureRequest([row[0] for row in rows])
+                features = {
+                    feature.id(): feature
+                    for feature in self.__layer.getFeatures(request)  # type: ignore
+                }
+                if len(features) != len(rows):
+                    error = ContainerError("Not all actions were created")
+                    error.add_note(f"Changed features count: {len(rows)}")
+                    error.add_note(f"Found features count: {len(features)}")
+                    raise error
+
+            yield rows, features
+
+            if len(rows) < chunk_size:
+                return
+
+    def __fields_values(self, feature: QgsFeature) -> List[List[Any]]:
+        fields_values = []
+        for field in self.__metadata.fields:
+            value = simplify_value(feature.attribute(field.attribute))
+            if value is None:
+                continue
+            self.__check_value(field, value)
+            fields_values.append([field.ngw_id, value])
+        return fields_values
 
     def __serialize_geometry(self, geometry: Optional[QgsGeometry]) -> str:
         return serialize_geometry(
@@ -1,12 +1,12 @@
 import json
 import sqlite3
-from contextlib import closing
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence, Tuple, cast
 
 from qgis.core import QgsFeature, QgsFeatureRequest, QgsVectorLayer
 
 from nextgis_connect.compat import QgsFeatureId
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.actions import (
     ActionType,
     DataChangeAction,
@@ -25,8 +25,8 @@ from nextgis_connect.detached_editing.serialization import (
 )
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
+    container_transaction,
     detached_layer_uri,
-    make_connection,
 )
 from nextgis_connect.resources.ngw_field import FieldId
 
@@ -226,15 +226,14 @@ class ConflictResolvingItemExtractor:
     def __extract_deleted_features(
         self, fids: Sequence
     ) -> Dict[FeatureId, QgsFeature]:
-        fids_str = ",".join(map(str, fids))
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(cursor, fids) as fids_table:
             backups = {
                 row[0]: row[1]
                 for row in cursor.execute(f"""
                     SELECT fid, backup FROM ngw_removed_features
-                    WHERE fid IN ({fids_str});
+                    WHERE fid IN (SELECT id FROM {fids_table})
                 """)
             }
 
@@ -269,20 +268,19 @@ class ConflictResolvingItemExtractor:
     ) -> Tuple[
         Dict[Tuple[QgsFeatureId, FieldId], str], Dict[QgsFeatureId, str]
     ]:
-        joined_locally_changed_fids = ",".join(map(str, locally_changed_fids))
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            fields_backups = self.__extract_fields_backups(
-                cursor, joined_locally_changed_fids
-            )
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(
+            cursor, locally_changed_fids
+        ) as fids_table:
+            fields_backups = self.__extract_fields_backups(cursor, fids_table)
             geometries_backups = self.__extract_geometries_backups(
-                cursor, joined_locally_changed_fids
+                cursor, fids_table
             )
         return fields_backups, geometries_backups
 
     def __extract_fields_backups(
-        self, cursor: sqlite3.Cursor, joined_fids: str
+        self, cursor: sqlite3.Cursor, fids_table: str
     ) -> Dict[Tuple[QgsFeatureId, FieldId], str]:
         return {
             (row[0], row[1]): deserialize_value(row[2])
@@ -290,13 +288,13 @@ class ConflictResolvingItemExtractor:
                 f"""
                 SELECT fid, attribute, backup
                 FROM ngw_updated_attributes
-                WHERE fid IN ({joined_fids})
+                WHERE fid IN (SELECT id FROM {fids_table})
                 """
             )
         }
 
     def __extract_geometries_backups(
-        self, cursor: sqlite3.Cursor, joined_fids: str
+        self, cursor: sqlite3.Cursor, fids_table: str
     ) -> Dict[QgsFeatureId, str]:
         return {
             row[0]: row[1]
@@ -304,7 +302,7 @@ class ConflictResolvingItemExtractor:
                 f"""
                 SELECT fid, backup
                 FROM ngw_updated_geometries
-                WHERE fid IN ({joined_fids})
+                WHERE fid IN (SELECT id FROM {fids_table})
                 """
             )
         }
@@ -312,16 +310,14 @@ class ConflictResolvingItemExtractor:
     def __ngw_fid_to_fid_dict(
         self, ngw_fids: Iterable[FeatureId]
     ) -> Dict[FeatureId, FeatureId]:
-        ngw_fids_str = ",".join(map(str, ngw_fids))
-
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(cursor, ngw_fids) as ngw_fids_table:
             return {
                 row[0]: row[1]
                 for row in cursor.execute(f"""
                     SELECT ngw_fid, fid
                     FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({ngw_fids_str});
+                    WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
                 """)
             }
@@ -1,8 +1,8 @@
-from contextlib import closing
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from nextgis_connect.compat import QgsFeatureId
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.actions import (
     ActionType,
     DataChangeAction,
@@ -15,7 +15,7 @@ from nextgis_connect.detached_editing.conflicts.conflict import (
 )
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.resources.ngw_field import FieldId
 
@@ -129,70 +129,74 @@ class ConflictsDeduplicator:
         ]
 
     def __apply_changes_to_container(self) -> None:
-        if len(self.__both_deleted) + len(self.__both_updated_fields) == 0:
+        if (
+            len(self.__both_deleted)
+            + len(self.__both_updated_fields)
+            + len(self.__both_updated_geometries)
+            == 0
+        ):
             return
 
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(self.__container_path) as cursor:
             if len(self.__both_deleted) > 0:
-                deleted_ngw_fids = ",".join(map(str, self.__both_deleted))
-                cursor.executescript(f"""
-                    DELETE FROM ngw_removed_features
-                    WHERE fid IN (
-                        SELECT fid FROM ngw_features_metadata
-                        WHERE ngw_fid IN ({deleted_ngw_fids})
-                    );
-                    DELETE FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({deleted_ngw_fids});
-                """)
-
-            if len(self.__both_updated_fields) > 0:
-                ngw_fids_str = ",".join(
-                    map(str, self.__both_updated_fields.keys())
-                )
-                ngw_fid_to_fid = {
-                    row[0]: row[1]
-                    for row in cursor.execute(f"""
-                        SELECT ngw_fid, fid
-                        FROM ngw_features_metadata
-                        WHERE ngw_fid IN ({ngw_fids_str});
+                with temporary_ids_table(
+                    cursor, self.__both_deleted
+                ) as deleted_ngw_fids_table:
+                    cursor.execute(f"""
+                        DELETE FROM ngw_removed_features
+                        WHERE fid IN (
+                            SELECT fid FROM ngw_features_metadata
+                            WHERE ngw_fid IN (
+                                SELECT id FROM {deleted_ngw_fids_table}
+                            )
+                        )
                     """)
-                }
-
-                fields = self.__metadata.fields
-                pk_pairs = []
-                for ngw_fid, attributes in self.__both_updated_fields.items():
-                    fid = ngw_fid_to_fid[ngw_fid]
-                    attributes = ",".join(
-                        map(
-                            lambda attribute: str(
-                                fields.get_with(ngw_id=attribute).attribute
-                            ),
-                            attributes,
+                    cursor.execute(f"""
+                        DELETE FROM ngw_features_metadata
+                        WHERE ngw_fid IN (
+                            SELECT id FROM {deleted_ngw_fids_table}
                         )
-                    )
+                    """)
 
-                    pk_pairs.append(
-                        f"(fid={fid} AND attribute IN ({attributes}))"
-                    )
+            if len(self.__both_updated_fields) > 0:
+                with temporary_ids_table(
+                    cursor, self.__both_updated_fields.keys()
+                ) as ngw_fids_table:
+                    ngw_fid_to_fid = {
+                        row[0]: row[1]
+                        for row in cursor.execute(f"""
+                            SELECT ngw_fid, fid
+                            FROM ngw_features_metadata
+                            WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                        """)
+                    }
 
-                where_clause = " OR ".join(pk_pairs)
-                cursor.execute(f"""
+                fields = self.__metadata.fields
+                cursor.executemany(
+                    """
                     DELETE FROM ngw_updated_attributes
-                    WHERE {where_clause};
-                """)
+                    WHERE fid=? AND attribute=?
+                    """,
+                    (
+                        (
+                            ngw_fid_to_fid[ngw_fid],
+                            fields.get_with(ngw_id=field_id).attribute,
+                        )
+                        for ngw_fid, field_ids in (
+                            self.__both_updated_fields.items()
+                        )
+                        for field_id in field_ids
+                    ),
+                )
 
             if len(self.__both_updated_geometries) > 0:
-                deleted_ngw_fids = ",".join(
-                    map(str, self.__both_updated_geometries)
-                )
-                cursor.executescript(f"""
-                    DELETE FROM ngw_updated_geometries
-                    WHERE fid IN (
-                        SELECT fid FROM ngw_features_metadata
-                        WHERE ngw_fid IN ({deleted_ngw_fids})
-                    );
-                """)
-
-            connection.commit()
+                with temporary_ids_table(
+                    cursor, self.__both_updated_geometries
+                ) as ngw_fids_table:
+                    cursor.execute(f"""
+                        DELETE FROM ngw_updated_geometries
+                        WHERE fid IN (
+                            SELECT fid FROM ngw_features_metadata
+                            WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                        )
+                    """)
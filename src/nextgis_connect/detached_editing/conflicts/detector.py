@@ -1,6 +1,5 @@
-from itertools import chain
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from nextgis_connect.detached_editing.action_extractor import ActionExtractor
 from nextgis_connect.detached_editing.actions import (
@@ -17,14 +16,23 @@ from nextgis_connect.detached_editing.utils import DetachedContainerMetaData
 
 
 class ConflictsDetector:
+    """
+    Detects conflicts between local changes and remote actions.
+
+    Local changes are extracted once and reused for every checked page of
+    remote actions until they are reset.
+    """
+
     __container_path: Path
     __metadata: DetachedContainerMetaData
+    __local_actions: Optional[Dict[FeatureId, List[FeatureAction]]]
 
     def __init__(
         self, container_path: Path, metadata: DetachedContainerMetaData
     ) -> None:
         self.__container_path = container_path
         self.__metadata = metadata
+        self.__local_actions = None
 
     def detect(
         self, remote_actions: List[VersioningAction]
@@ -34,29 +42,38 @@ class ConflictsDetector:
         if len(grouped_remote) == 0:
             return []
 
-        # Check local list
-        extractor = ActionExtractor(self.__container_path, self.__metadata)
-        local_actions = extractor.extract_all()
-        grouped_local = self.__group_actions(local_actions)
-        if len(grouped_local) == 0:
-            return []
+        local_actions = self.__local_actions_index()
 
-        # Check intersection
-        intersected_fids = set(grouped_local.keys()).intersection(
-            grouped_remote.keys()
-        )
-        if len(intersected_fids) == 0:
-            return []
+        conflicts: List[VersioningConflict] = []
+        for fid, remote_fid_actions in grouped_remote.items():
+            local_fid_actions = local_actions.get(fid)
+            if local_fid_actions is None:
+                continue
 
-        # Detect conflicts
-        return list(
-            chain.from_iterable(
-                self.__detect_conflicts(
-                    grouped_local[fid], grouped_remote[fid]
-                )
-                for fid in intersected_fids
+            conflicts.extend(
+                self.__detect_conflicts(local_fid_actions, remote_fid_actions)
             )
-        )
+
+        return conflicts
+
+    def reset(self) -> None:
+        """Extract local changes again on the next detection"""
+        self.__local_actions = None
+
+    def __local_actions_index(self) -> Dict[FeatureId, List[FeatureAction]]:
+        if self.__local_actions is not None:
+            return self.__local_actions
+
+        extractor = ActionExtractor(self.__container_path, self.__metadata)
+        self.__local_actions = {}
+        for local_action in extractor.iter_existing_features():
+            if not isinstance(local_action, FeatureAction):
+                continue
+            self.__local_actions.setdefault(local_action.fid, []).append(
+                local_action
+            )
+
+        return self.__local_actions
 
     def __group_actions(
         self, actions: List[VersioningAction]
@@ -1,13 +1,12 @@
 import json
-from contextlib import closing
 from copy import deepcopy
 from enum import Enum, auto
 from pathlib import Path
-from textwrap import dedent
 from typing import Any, Dict, Iterable, List, Set, Tuple
 
 from qgis.core import QgsFeature, QgsVectorLayer, edit
 
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.actions import (
     ActionType,
     FeatureAction,
@@ -19,11 +18,12 @@ from nextgis_connect.detached_editing.conflicts.conflict_resolution import (
     ConflictResolution,
     ResolutionType,
 )
+from nextgis_connect.detached_editing.delta_staging import DeltaStaging
 from nextgis_connect.detached_editing.serialization import deserialize_geometry
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
+    container_transaction,
     detached_layer_uri,
-    make_connection,
 )
 from nextgis_connect.exceptions import DetachedEditingError
 from nextgis_connect.logging import logger
@@ -85,11 +85,53 @@ class ConflictsResolver:
         self.__local_features_to_restore = list()
         self.__remote_features_to_restore = list()
 
+    def resolve_staged(
+        self,
+        staging: DeltaStaging,
+        resolutions: List[ConflictResolution],
+    ) -> Status:
+        """Resolve conflicts and rewrite staged delta page by page"""
+        try:
+            status = self.__process_resolutions(resolutions)
+            if status != self.Status.Resolved:
+                return status
+
+            for page_id, actions in staging.pages(skip_applied=True):
+                staging.replace_page(
+                    page_id,
+                    self.__create_actions_list(actions, with_new=False),
+                )
+            staging.add_page(self.__new_actions)
+
+            self.__update_container()
+
+        except Exception as error:
+            logger.exception("Resolution failed")
+            raise DetachedEditingError from error
+
+        return status
+
     def __resolve(
         self,
         remote_actions: List[FeatureAction],
         resolutions: List[ConflictResolution],
     ) -> Tuple[Status, List[FeatureAction]]:
+        status = self.__process_resolutions(resolutions)
+        if status != self.Status.Resolved:
+            return status, []
+
+        # Create actions list with updates
+        updated_actions = self.__create_actions_list(remote_actions)
+
+        # Apply changes to container
+        self.__update_container()
+
+        # Result
+        return self.Status.Resolved, updated_actions
+
+    def __process_resolutions(
+        self, resolutions: List[ConflictResolution]
+    ) -> Status:
         self.__reset()
 
         has_resolved = False
@@ -100,8 +142,7 @@ class ConflictsResolver:
                 return (
                     self.Status.PartiallyResolved
                     if has_resolved
-                    else self.Status.NotResolved,
-                    [],
+                    else self.Status.NotResolved
                 )
 
             has_resolved = True
@@ -113,14 +154,7 @@ class ConflictsResolver:
             elif resolution.resolution_type == ResolutionType.Custom:
                 self.__resolve_custom(resolution)
 
-        # Create actions list with updates
-        updated_actions = self.__create_actions_list(remote_actions)
-
-        # Apply changes to container
-        self.__update_container()
-
-        # Result
-        return self.Status.Resolved, updated_actions
+        return self.Status.Resolved
 
     def __resolve_local(self, resolution: ConflictResolution):
         local_action_type = resolution.conflict.local_action.action
@@ -359,7 +393,7 @@ class ConflictsResolver:
         self.__modified_actions[(fid, updated_action.action)] = updated_action
 
     def __create_actions_list(
-        self, remote_actions: List[FeatureAction]
+        self, remote_actions: List[FeatureAction], *, with_new: bool = True
     ) -> List[FeatureAction]:
         result = []
         for action in remote_actions:
@@ -380,151 +414,155 @@ class ConflictsResolver:
 
             result.append(action)
 
-        result.extend(self.__new_actions)
+        if with_new:
+            result.extend(self.__new_actions)
 
         return result
 
     def __update_container(self) -> None:
-        script = ""
-
         fields = self.__metadata.fields
 
-        if self.__local_fields_changes_for_add:
+        restored_fids: List[FeatureId] = []
+        if self.__local_features_to_restore:
             ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
-                self.__local_fields_changes_for_add.keys()
-            )
-            values = ",".join(
-                f"({ngw_fid_to_fid[ngw_fid]},{fields.find_with(ngw_id=ngw_attribute).attribute})"
-                for ngw_fid, ngw_attributes in self.__local_fields_changes_for_add.items()
-                for ngw_attribute in ngw_attributes
+                self.__local_features_to_restore
             )
-            script += dedent(f"""
-                INSERT INTO ngw_updated_attributes (fid, attribute)
-                VALUES {values};
-            """)
+            restored_fids = list(ngw_fid_to_fid.values())
+            self.__restore_local_features(restored_fids)
+
+        with container_transaction(self.__container_path) as cursor:
+            if self.__local_fields_changes_for_add:
+                fields_changes = self.__local_fields_changes_for_add
+                ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
+                    fields_changes.keys()
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO ngw_updated_attributes (fid, attribute)
+                    VALUES (?, ?)
+                    """,
+                    (
+                        (
+                            ngw_fid_to_fid[ngw_fid],
+                            fields.find_with(ngw_id=ngw_attribute).attribute,
+                        )
+                        for ngw_fid, ngw_attributes in fields_changes.items()
+                        for ngw_attribute in ngw_attributes
+                    ),
+                )
 
-        if self.__local_fields_changes_for_delete:
-            ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
-                self.__local_fields_changes_for_delete.keys()
-            )
-            where_clause = " OR ".join(
-                f"(fid={ngw_fid_to_fid[ngw_fid]} AND attribute={fields.find_with(ngw_id=ngw_attribute).attribute})"
-                for ngw_fid, ngw_attributes in self.__local_fields_changes_for_delete.items()
-                for ngw_attribute in ngw_attributes
-            )
-            script += dedent(f"""
-                DELETE FROM ngw_updated_attributes WHERE {where_clause};
-            """)
+            if self.__local_fields_changes_for_delete:
+                fields_changes = self.__local_fields_changes_for_delete
+                ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
+                    fields_changes.keys()
+                )
+                cursor.executemany(
+                    """
+                    DELETE FROM ngw_updated_attributes
+                    WHERE fid = ? AND attribute = ?
+                    """,
+                    (
+                        (
+                            ngw_fid_to_fid[ngw_fid],
+                            fields.find_with(ngw_id=ngw_attribute).attribute,
+                        )
+                        for ngw_fid, ngw_attributes in fields_changes.items()
+                        for ngw_attribute in ngw_attributes
+                    ),
+                )
 
-        if self.__local_geometry_changes_for_add:
-            ngw_fids = ",".join(
-                map(str, self.__local_geometry_changes_for_add)
-            )
-            script += dedent(f"""
-                INSERT INTO ngw_updated_geometries (fid)
-                SELECT fid FROM ngw_features_metadata
-                WHERE ngw_fid IN ({ngw_fids});
-            """)
-
-        if self.__local_geometry_changes_for_delete:
-            ngw_fids = ",".join(
-                map(str, self.__local_geometry_changes_for_delete)
-            )
-            script += dedent(f"""
-                DELETE FROM ngw_updated_geometries
-                WHERE fid IN (
-                    SELECT fid FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({ngw_fids})
-                );
-            """)
+            if self.__local_geometry_changes_for_add:
+                with temporary_ids_table(
+                    cursor, self.__local_geometry_changes_for_add
+                ) as ngw_fids_table:
+                    cursor.execute(f"""
+                        INSERT INTO ngw_updated_geometries (fid)
+                        SELECT fid FROM ngw_features_metadata
+                        WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                    """)
 
-        if self.__local_features_to_restore:
-            ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
-                self.__local_features_to_restore
-            )
+            if self.__local_geometry_changes_for_delete:
+                with temporary_ids_table(
+                    cursor, self.__local_geometry_changes_for_delete
+                ) as ngw_fids_table:
+                    cursor.execute(f"""
+                        DELETE FROM ngw_updated_geometries
+                        WHERE fid IN (
+                            SELECT fid FROM ngw_features_metadata
+                            WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                        )
+                    """)
 
-            fids_str = ",".join(map(str, ngw_fid_to_fid.values()))
-            with closing(
-                make_connection(self.__container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                backups = {
-                    row[0]: row[1]
-                    for row in cursor.execute(f"""
-                        SELECT fid, backup FROM ngw_removed_features
-                        WHERE fid IN ({fids_str});
+            if len(restored_fids) > 0:
+                with temporary_ids_table(cursor, restored_fids) as fids_table:
+                    cursor.execute(f"""
+                        DELETE FROM ngw_removed_features
+                        WHERE fid IN (SELECT id FROM {fids_table})
                     """)
-                }
 
-            layer = QgsVectorLayer(
-                detached_layer_uri(self.__container_path, self.__metadata)
-            )
-            restored_features = []
-            for fid in ngw_fid_to_fid.values():
-                feature_backup = json.loads(backups[fid])
-                after_sync = feature_backup["after_sync"]
-
-                feature = QgsFeature(layer.fields(), fid)
-                feature.setAttribute(self.__metadata.fid_field, fid)
-                for field_ngw_id, value in after_sync["fields"]:
-                    attribute = self.__metadata.fields.get_with(
-                        ngw_id=field_ngw_id
-                    ).attribute
-                    feature.setAttribute(attribute, value)
-
-                feature.setGeometry(
-                    deserialize_geometry(
-                        after_sync["geom"],
-                        self.__metadata.is_versioning_enabled,
-                    )
+            if self.__remote_features_to_restore:
+                ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
+                    self.__remote_features_to_restore
+                )
+                cursor.executemany(
+                    "INSERT INTO ngw_restored_features (fid) VALUES (?)",
+                    (
+                        (ngw_fid_to_fid[ngw_fid],)
+                        for ngw_fid in self.__remote_features_to_restore
+                    ),
                 )
-                restored_features.append(feature)
-
-            with edit(layer):
-                layer.addFeatures(restored_features)
 
-            script += dedent(f"""
-                DELETE FROM ngw_removed_features
-                WHERE fid IN ({fids_str});
-            """)
+    def __restore_local_features(self, fids: List[FeatureId]) -> None:
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(cursor, fids) as fids_table:
+            backups = {
+                row[0]: row[1]
+                for row in cursor.execute(f"""
+                    SELECT fid, backup FROM ngw_removed_features
+                    WHERE fid IN (SELECT id FROM {fids_table})
+                """)
+            }
 
-        if self.__remote_features_to_restore:
-            ngw_fid_to_fid = self.__ngw_fid_to_fid_dict(
-                self.__remote_features_to_restore
-            )
-            values = ",".join(
-                map(
-                    lambda fid: f"({ngw_fid_to_fid[fid]})",
-                    self.__remote_features_to_restore,
+        layer = QgsVectorLayer(
+            detached_layer_uri(self.__container_path, self.__metadata)
+        )
+        restored_features = []
+        for fid in fids:
+            feature_backup = json.loads(backups[fid])
+            after_sync = feature_backup["after_sync"]
+
+            feature = QgsFeature(layer.fields(), fid)
+            feature.setAttribute(self.__metadata.fid_field, fid)
+            for field_ngw_id, value in after_sync["fields"]:
+                attribute = self.__metadata.fields.get_with(
+                    ngw_id=field_ngw_id
+                ).attribute
+                feature.setAttribute(attribute, value)
+
+            feature.setGeometry(
+                deserialize_geometry(
+                    after_sync["geom"],
+                    self.__metadata.is_versioning_enabled,
                 )
             )
-            script += dedent(f"""
-                INSERT INTO ngw_restored_features (fid)
-                VALUES {values};
-            """)
-
-        if len(script) == 0:
-            return
+            restored_features.append(feature)
 
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            cursor.executescript(script)
-            connection.commit()
+        with edit(layer):
+            layer.addFeatures(restored_features)
 
     def __ngw_fid_to_fid_dict(
         self, ngw_fids: Iterable[FeatureId]
     ) -> Dict[FeatureId, FeatureId]:
-        ngw_fids_str = ",".join(map(str, ngw_fids))
-
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(cursor, ngw_fids) as ngw_fids_table:
             return {
                 row[0]: row[1]
                 for row in cursor.execute(f"""
                     SELECT ngw_fid, fid
                     FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({ngw_fids_str});
+                    WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
                 """)
             }
 
@@ -0,0 +1,63 @@
+import threading
+from collections import deque
+from typing import Callable, ClassVar, Deque, Optional
+
+from nextgis_connect.logging import logger
+
+ConflictsResolving = Callable[[], None]
+
+
+class ConflictsResolvingQueue:
+    """
+    Queue of synchronizations waiting for conflicts resolving.
+
+    Several containers are synchronized simultaneously and each of them can
+    find conflicts. Resolving dialogs are modal, so resolvings are run one
+    at a time in order of requests. A resolving requested while another
+    one is in progress is run after it returns.
+
+    Resolvings must be requested from the GUI thread only.
+    """
+
+    __instance: ClassVar[Optional["ConflictsResolvingQueue"]] = None
+    __instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    __pending: Deque[ConflictsResolving]
+    __is_resolving: bool
+
+    def __init__(self) -> None:
+        self.__pending = deque()
+        self.__is_resolving = False
+
+    @classmethod
+    def instance(cls) -> "ConflictsResolvingQueue":
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls()
+            return cls.__instance
+
+    @property
+    def is_resolving(self) -> bool:
+        return self.__is_resolving
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    def enqueue(self, resolving: ConflictsResolving) -> None:
+        self.__pending.append(resolving)
+        if self.__is_resolving:
+            logger.debug(
+                f"Conflicts resolving is queued, {len(self.__pending)} waiting"
+            )
+            return
+
+        self.__is_resolving = True
+        try:
+            while len(self.__pending) > 0:
+                resolving = self.__pending.popleft()
+                try:
+                    resolving()
+                except Exception:
+                    logger.exception("Conflicts resolving failed")
+        finally:
+            self.__is_resolving = False
@@ -0,0 +1,223 @@
+import itertools
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar, Iterator, List, Optional, Tuple
+
+from nextgis_connect.logging import logger
+from nextgis_connect.settings import NgConnectSettings
+
+
+@dataclass(frozen=True)
+class ContainerConnectionSettings:
+    """PRAGMAs applied to every new container connection"""
+
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = "NORMAL"
+    cache_size: Optional[int] = -16 * 1024  # KiB when negative
+    mmap_size: Optional[int] = 64 * 1024**2
+    busy_timeout: Optional[int] = 5000  # ms
+
+    SYNCHRONOUS_MODES: ClassVar[Tuple[str, ...]] = (
+        "OFF",
+        "NORMAL",
+        "FULL",
+        "EXTRA",
+    )
+
+    @classmethod
+    def from_settings(cls) -> "ContainerConnectionSettings":
+        """PRAGMAs configured in plugin settings"""
+        settings = NgConnectSettings()
+
+        synchronous: Optional[str] = settings.container_synchronous.upper()
+        if synchronous not in cls.SYNCHRONOUS_MODES:
+            logger.warning(
+                f'Unknown synchronous mode "{synchronous}" is ignored'
+            )
+            synchronous = None
+
+        return cls(
+            synchronous=synchronous,
+            cache_size=settings.container_cache_size,
+            mmap_size=settings.container_mmap_size,
+            busy_timeout=settings.container_busy_timeout,
+        )
+
+    @property
+    def pragmas(self) -> List[str]:
+        pragmas = ["PRAGMA foreign_keys = ON"]
+        if self.journal_mode is not None:
+            pragmas.append(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous is not None:
+            pragmas.append(f"PRAGMA synchronous = {self.synchronous}")
+        if self.cache_size is not None:
+            pragmas.append(f"PRAGMA cache_size = {int(self.cache_size)}")
+        if self.mmap_size is not None:
+            pragmas.append(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        if self.busy_timeout is not None:
+            pragmas.append(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        return pragmas
+
+
+class ContainerConnection(sqlite3.Connection):
+    """
+    Connection created by the pool.
+
+    Serial is unique among all connections created in the process, unlike
+    ``id()`` which may be reused after the connection is closed.
+    """
+
+    serial: int
+
+
+@dataclass
+class _PooledConnection:
+    connection: ContainerConnection
+    depth: int = 0
+
+
+ConnectionKey = Tuple[Path, int]
+
+
+class ContainerConnectionPool:
+    """
+    Registry of long-lived SQLite connections to detached containers.
+
+    Connections are bound to a (container, thread) pair, so QgsTask workers
+    and the main thread never share a connection. Connections are only
+    handed out inside a transaction scope: the outermost scope commits on
+    success and rolls back on error, nested scopes in the same thread reuse
+    the same connection and transaction.
+
+    Note that ``Cursor.executescript`` always commits pending changes before
+    running the script.
+    """
+
+    MAX_CONNECTIONS: ClassVar[int] = 32
+
+    __instance: ClassVar[Optional["ContainerConnectionPool"]] = None
+    __instance_lock: ClassVar[threading.Lock] = threading.Lock()
+    __serials: ClassVar[Iterator[int]] = itertools.count()
+
+    __lock: threading.RLock
+    __connections: "OrderedDict[ConnectionKey, _PooledConnection]"
+    __settings: ContainerConnectionSettings
+
+    def __init__(
+        self, settings: Optional[ContainerConnectionSettings] = None
+    ) -> None:
+        self.__lock = threading.RLock()
+        self.__connections = OrderedDict()
+        self.__settings = (
+            settings if settings is not None else ContainerConnectionSettings()
+        )
+
+    @classmethod
+    def instance(cls) -> "ContainerConnectionPool":
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls(
+                    ContainerConnectionSettings.from_settings()
+                )
+            return cls.__instance
+
+    @property
+    def settings(self) -> ContainerConnectionSettings:
+        return self.__settings
+
+    @settings.setter
+    def settings(self, value: ContainerConnectionSettings) -> None:
+        self.__settings = value
+        # New PRAGMAs are applied to connections opened from now on
+        self.close_all()
+
+    @property
+    def connections_count(self) -> int:
+        with self.__lock:
+            return len(self.__connections)
+
+    @contextmanager
+    def transaction(self, path: Path) -> Iterator[sqlite3.Cursor]:
+        key = (path.absolute(), threading.get_ident())
+        pooled = self.__acquire(key)
+        try:
+            with closing(pooled.connection.cursor()) as cursor:
+                yield cursor
+        except BaseException:
+            if pooled.depth == 1 and pooled.connection.in_transaction:
+                pooled.connection.rollback()
+            raise
+        else:
+            if pooled.depth == 1 and pooled.connection.in_transaction:
+                pooled.connection.commit()
+        finally:
+            with self.__lock:
+                pooled.depth -= 1
+
+    def close(self, path: Path) -> None:
+        """Close idle connections to container, e.g. before replacing it"""
+        path = path.absolute()
+        with self.__lock:
+            keys = [key for key in self.__connections if key[0] == path]
+            for key in keys:
+                self.__close(key)
+
+    def close_all(self) -> None:
+        with self.__lock:
+            for key in list(self.__connections.keys()):
+                self.__close(key)
+
+    def __acquire(self, key: ConnectionKey) -> _PooledConnection:
+        with self.__lock:
+            pooled = self.__connections.get(key)
+            if pooled is not None:
+                self.__connections.move_to_end(key)
+                pooled.depth += 1
+                return pooled
+
+            pooled = _PooledConnection(self.__connect(key[0]), depth=1)
+            self.__connections[key] = pooled
+            self.__evict_idle()
+            return pooled
+
+    def __connect(self, path: Path) -> ContainerConnection:
+        # Connection is used only by owner thread, but it may be closed from
+        # another one when it is idle
+        connection = sqlite3.connect(
+            str(path), check_same_thread=False, factory=ContainerConnection
+        )
+        connection.serial = next(self.__serials)
+        for pragma in self.__settings.pragmas:
+            connection.execute(pragma)
+        return connection
+
+    def __evict_idle(self) -> None:
+        excess = len(self.__connections) - self.MAX_CONNECTIONS
+        if excess <= 0:
+            return
+
+        idle_keys = [
+            key
+            for key, pooled in self.__connections.items()
+            if pooled.depth == 0
+        ]
+        for key in idle_keys[:excess]:
+            self.__close(key)
+
+    def __close(self, key: ConnectionKey) -> None:
+        pooled = self.__connections[key]
+        if pooled.depth > 0:
+            logger.warning(
+                f'Connection to "{key[0].name}" is in use and was not closed'
+            )
+            return
+
+        del self.__connections[key]
+        try:
+            pooled.connection.close()
+        except sqlite3.Error:
+            logger.exception("Failed to close container connection")
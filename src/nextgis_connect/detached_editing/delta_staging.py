@@ -0,0 +1,300 @@
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from enum import IntEnum
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from nextgis_connect.detached_editing.action_serializer import ActionSerializer
+from nextgis_connect.detached_editing.actions import (
+    FeatureAction,
+    VersioningAction,
+)
+from nextgis_connect.detached_editing.utils import (
+    DetachedContainerMetaData,
+    container_transaction,
+)
+
+PageId = int
+
+
+class DeltaStage(IntEnum):
+    Fetching = 0
+    Fetched = 1
+    Resolved = 2
+
+
+@dataclass(frozen=True)
+class DeltaStagingState:
+    target: int
+    timestamp: datetime
+    next_url: Optional[str]
+    stage: DeltaStage
+    applied_count: int
+    is_applying: bool
+
+
+class DeltaStaging:
+    """
+    Storage of fetched remote changes inside the container.
+
+    Every page of changes is persisted as soon as it is downloaded, so
+    conflicts detection and applying can process delta page by page with
+    memory usage proportional to page size. Staged delta is kept until it
+    is fully applied, so an interrupted synchronization resumes from the
+    last downloaded or applied page.
+    """
+
+    __container_path: Path
+    __serializer: ActionSerializer
+
+    def __init__(
+        self, container_path: Path, metadata: DetachedContainerMetaData
+    ) -> None:
+        self.__container_path = container_path
+        self.__serializer = ActionSerializer(metadata)
+
+    @property
+    def state(self) -> Optional[DeltaStagingState]:
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            cursor.execute(
+                """
+                SELECT
+                    target, tstamp, next_url, stage, applied_count, is_applying
+                FROM ngw_delta_state
+                """
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        target, timestamp, next_url, stage, applied_count, is_applying = row
+        return DeltaStagingState(
+            target=target,
+            timestamp=datetime.fromisoformat(timestamp),
+            next_url=next_url,
+            stage=DeltaStage(stage),
+            applied_count=applied_count,
+            is_applying=bool(is_applying),
+        )
+
+    @property
+    def actions_count(self) -> int:
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            cursor.execute(
+                "SELECT COALESCE(SUM(actions_count), 0) FROM ngw_delta_pages"
+            )
+            return cursor.fetchone()[0]
+
+    def begin(self, target: int, timestamp: datetime, fetch_url: str) -> None:
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            cursor.execute("DELETE FROM ngw_delta_pages")
+            cursor.execute("DELETE FROM ngw_delta_state")
+            cursor.execute("DELETE FROM ngw_delta_inserted_fids")
+            cursor.execute(
+                """
+                INSERT INTO ngw_delta_state (target, tstamp, next_url, stage)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    target,
+                    timestamp.isoformat(),
+                    fetch_url,
+                    int(DeltaStage.Fetching),
+                ),
+            )
+
+    def append_page(
+        self,
+        actions: Sequence[VersioningAction],
+        next_url: Optional[str],
+    ) -> None:
+        """Store page and url of the next one in the same transaction"""
+        feature_actions = [
+            action for action in actions if isinstance(action, FeatureAction)
+        ]
+        with container_transaction(self.__container_path) as cursor:
+            if len(feature_actions) > 0:
+                cursor.execute(
+                    """
+                    INSERT INTO ngw_delta_pages (actions, actions_count)
+                    VALUES (?, ?)
+                    """,
+                    (self.__dumps(feature_actions), len(feature_actions)),
+                )
+
+            stage = DeltaStage.Fetching if next_url else DeltaStage.Fetched
+            cursor.execute(
+                "UPDATE ngw_delta_state SET next_url=?, stage=?",
+                (next_url, int(stage)),
+            )
+
+    @property
+    def inserted_fids(self) -> List[int]:
+        """Fids of features created by the page being applied"""
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            return [
+                row[0]
+                for row in cursor.execute(
+                    "SELECT fid FROM ngw_delta_inserted_fids ORDER BY fid"
+                )
+            ]
+
+    def begin_apply(self, inserted_fids: Sequence[int] = ()) -> None:
+        """
+        Mark that the next page is being applied.
+
+        Features are committed by the layer provider before the page is
+        marked as applied, so the mark and fids of created features are
+        committed first. They tell that the container should be recovered
+        if applying is interrupted.
+        """
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute("DELETE FROM ngw_delta_inserted_fids")
+            cursor.executemany(
+                "INSERT INTO ngw_delta_inserted_fids (fid) VALUES (?)",
+                ((fid,) for fid in inserted_fids),
+            )
+            cursor.execute("UPDATE ngw_delta_state SET is_applying=1")
+
+    def checkpoint(self, next_url: Optional[str], applied_count: int) -> None:
+        """
+        Store progress of delta applied directly without staging pages.
+
+        Should be called after features of the page are applied.
+        """
+        stage = DeltaStage.Fetching if next_url else DeltaStage.Fetched
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute(
+                """
+                UPDATE ngw_delta_state
+                SET next_url=?, stage=?, applied_count=?, is_applying=0
+                """,
+                (next_url, int(stage), applied_count),
+            )
+            cursor.execute("DELETE FROM ngw_delta_inserted_fids")
+
+    def set_stage(self, stage: DeltaStage) -> None:
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute("UPDATE ngw_delta_state SET stage=?", (int(stage),))
+
+    def pages(
+        self, *, skip_applied: bool = False
+    ) -> Iterator[Tuple[PageId, List[FeatureAction]]]:
+        """Lazily load pages one by one in order of fetching"""
+        query = "SELECT page FROM ngw_delta_pages"
+        if skip_applied:
+            query += " WHERE is_applied=0"
+        query += " ORDER BY page"
+
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            page_ids = [row[0] for row in cursor.execute(query)]
+
+        for page_id in page_ids:
+            with container_transaction(self.__container_path) as cursor:
+                cursor.execute(
+                    "SELECT actions FROM ngw_delta_pages WHERE page=?",
+                    (page_id,),
+                )
+                row = cursor.fetchone()
+
+            if row is None:
+                continue
+
+            yield page_id, self.__loads(row[0])
+
+    def replace_page(
+        self, page_id: PageId, actions: Sequence[FeatureAction]
+    ) -> None:
+        with container_transaction(self.__container_path) as cursor:
+            if len(actions) == 0:
+                cursor.execute(
+                    "DELETE FROM ngw_delta_pages WHERE page=?", (page_id,)
+                )
+                return
+
+            cursor.execute(
+                """
+                UPDATE ngw_delta_pages SET actions=?, actions_count=?
+                WHERE page=?
+                """,
+                (self.__dumps(actions), len(actions), page_id),
+            )
+
+    def add_page(self, actions: Sequence[FeatureAction]) -> None:
+        """Add page to the end of already fetched delta"""
+        if len(actions) == 0:
+            return
+
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute(
+                """
+                INSERT INTO ngw_delta_pages (actions, actions_count)
+                VALUES (?, ?)
+                """,
+                (self.__dumps(actions), len(actions)),
+            )
+
+    def mark_applied(self, page_id: PageId) -> None:
+        with container_transaction(self.__container_path) as cursor:
+            cursor.execute(
+                "UPDATE ngw_delta_pages SET is_applied=1 WHERE page=?",
+                (page_id,),
+            )
+            cursor.execute("UPDATE ngw_delta_state SET is_applying=0")
+            cursor.execute("DELETE FROM ngw_delta_inserted_fids")
+
+    def clear(self) -> None:
+        with container_transaction(self.__container_path) as cursor:
+            self.__create_tables(cursor)
+            cursor.execute("DELETE FROM ngw_delta_pages")
+            cursor.execute("DELETE FROM ngw_delta_state")
+            cursor.execute("DELETE FROM ngw_delta_inserted_fids")
+
+    def __create_tables(self, cursor: sqlite3.Cursor) -> None:
+        # Containers created by previous versions have no staging tables
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ngw_delta_state (
+                'target' INTEGER NOT NULL,
+                'tstamp' TEXT NOT NULL,
+                'next_url' TEXT,
+                'stage' INTEGER NOT NULL,
+                'applied_count' INTEGER NOT NULL DEFAULT 0,
+                'is_applying' INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ngw_delta_pages (
+                'page' INTEGER PRIMARY KEY AUTOINCREMENT,
+                'actions' TEXT NOT NULL,
+                'actions_count' INTEGER NOT NULL,
+                'is_applied' INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ngw_delta_inserted_fids (
+                'fid' INTEGER PRIMARY KEY
+            )
+            """
+        )
+
+    def __dumps(self, actions: Sequence[FeatureAction]) -> str:
+        return json.dumps([action.__dict__ for action in actions])
+
+    def __loads(self, page: str) -> List[FeatureAction]:
+        actions = self.__serializer.from_json(page)
+        return [
+            action for action in actions if isinstance(action, FeatureAction)
+        ]
@@ -1,9 +1,8 @@
 import shutil
 import tempfile
-from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 from qgis.core import (
     QgsEditorWidgetSetup,
@@ -16,6 +15,9 @@ from qgis.gui import QgisInterface
 from qgis.PyQt.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
 from qgis.utils import iface
 
+from nextgis_connect.detached_editing.conflicts.conflict import (
+    VersioningConflict,
+)
 from nextgis_connect.detached_editing.conflicts.deduplicator import (
     ConflictsDeduplicator,
 )
@@ -25,9 +27,16 @@ from nextgis_connect.detached_editing.conflicts.detector import (
 from nextgis_connect.detached_editing.conflicts.resolver import (
     ConflictsResolver,
 )
+from nextgis_connect.detached_editing.conflicts.resolving_queue import (
+    ConflictsResolvingQueue,
+)
 from nextgis_connect.detached_editing.conflicts.ui.resolving_dialog import (
     ResolvingDialog,
 )
+from nextgis_connect.detached_editing.delta_staging import (
+    DeltaStage,
+    DeltaStaging,
+)
 from nextgis_connect.detached_editing.tasks import (
     ApplyDeltaTask,
     DetachedEditingTask,
@@ -68,7 +77,7 @@ from .utils import (
     DetachedContainerMetaData,
     DetachedLayerState,
     VersioningSynchronizationState,
-    make_connection,
+    container_transaction,
 )
 
 if TYPE_CHECKING:
@@ -394,6 +403,7 @@ class DetachedContainer(QObject):
             layer.enable_fake()
 
         try:
+            utils.close_container_connections(self.path)
             for service_file in self.path.parent.glob(f"{self.path.name}-*"):
                 service_file.unlink(missing_ok=True)
             shutil.move(str(temp_file_path), str(self.path))
@@ -679,38 +689,24 @@ class DetachedContainer(QObject):
 
         self.__update_state()
 
-        if len(self.__sync_task.delta) > 0:
-            try:
-                delta = self.__process_delta(self.__sync_task)
-            except SynchronizationError as error:
-                error.try_again = lambda: self.synchronize(is_manual=True)
-                self.__process_error(error)
-                self.__finish_sync()
-                return
-            except Exception as error:
-                ng_error = NgConnectError()
-                ng_error.__cause__ = error
-                self.__process_error(ng_error)
-                self.__finish_sync()
-                return
+        if self.__sync_task.has_delta:
+            conflicts: List[VersioningConflict] = []
+
+            def process_delta() -> None:
+                conflicts.extend(self.__process_delta())
 
-            # Even if delta is empty after conflicts resolution we should
-            # update layer metadata
+            if not self.__run_delta_step(process_delta):
+                return
 
-            fetch_delta_task = self.__sync_task
+            if len(conflicts) == 0:
+                self.__apply_delta()
+                return
 
-            self.__versioning_state = (
-                VersioningSynchronizationState.ChangesApplying
+            # Resolving dialogs of simultaneous synchronizations are shown
+            # one by one
+            ConflictsResolvingQueue.instance().enqueue(
+                lambda: self.__resolve_conflicts(conflicts)
             )
-            task = ApplyDeltaTask(
-                self.path,
-                fetch_delta_task.target,
-                fetch_delta_task.timestamp,
-                delta,
-            )
-            task.taskCompleted.connect(self.__on_apply_finished)
-            task.taskTerminated.connect(self.__on_apply_finished)
-            self.__start_sync(task)
             return
 
         if self.metadata.has_changes:
@@ -908,9 +904,7 @@ class DetachedContainer(QObject):
 
     def __check_structure(self) -> None:
         container_fields_name = set()
-        with closing(make_connection(self.__path)) as connection, closing(
-            connection.cursor()
-        ) as cursor:
+        with container_transaction(self.__path) as cursor:
             container_fields_name = set(
                 row[0]
                 for row in cursor.execute(
@@ -950,23 +944,75 @@ class DetachedContainer(QObject):
         if is_connection_changed or self.__metadata.is_auto_sync_enabled:
             self.synchronize(is_manual=True)
 
-    def __process_delta(self, fetch_delta_task: FetchDeltaTask) -> Sequence:
-        if len(fetch_delta_task.delta) == 0:
+    def __run_delta_step(self, step: Callable[[], None]) -> bool:
+        try:
+            step()
+        except SynchronizationError as error:
+            error.try_again = lambda: self.synchronize(is_manual=True)
+            self.__process_error(error)
+            self.__finish_sync()
+            return False
+        except Exception as error:
+            ng_error = NgConnectError()
+            ng_error.__cause__ = error
+            self.__process_error(ng_error)
+            self.__finish_sync()
+            return False
+
+        return True
+
+    def __apply_delta(self) -> None:
+        # Even if delta is empty after conflicts resolution we should
+        # update layer metadata
+
+        fetch_delta_task = self.__sync_task
+        assert isinstance(fetch_delta_task, FetchDeltaTask)
+
+        self.__versioning_state = (
+            VersioningSynchronizationState.ChangesApplying
+        )
+        task = ApplyDeltaTask(
+            self.path,
+            fetch_delta_task.target,
+            fetch_delta_task.timestamp,
+        )
+        task.taskCompleted.connect(self.__on_apply_finished)
+        task.taskTerminated.connect(self.__on_apply_finished)
+        self.__start_sync(task)
+
+    def __process_delta(self) -> List[VersioningConflict]:
+        """Detect conflicts of staged delta and return unresolved ones"""
+        staging = DeltaStaging(self.path, self.metadata)
+        state = staging.state
+        assert state is not None
+
+        # Conflicts were resolved before interrupted applying
+        if state.stage == DeltaStage.Resolved:
             return []
 
         self.__versioning_state = (
             VersioningSynchronizationState.ConflictDetection
         )
 
-        # Check conflicts
+        # Check conflicts and find duplicates page by page. Duplicates are
+        # removed from staged actions and local changes, so local changes
+        # are extracted again only after that
+        conflicts: List[VersioningConflict] = []
+        need_update_state = False
         conflict_detector = ConflictsDetector(self.path, self.metadata)
-        conflicts = conflict_detector.detect(fetch_delta_task.delta)
+        for page_id, actions in staging.pages(skip_applied=True):
+            page_conflicts = conflict_detector.detect(actions)
 
-        # Find duplicates and remove it from actions and local changes
-        deduplicator = ConflictsDeduplicator(self.path, self.metadata)
-        need_update_state, delta, conflicts = deduplicator.deduplicate(
-            fetch_delta_task.delta, conflicts
-        )
+            deduplicator = ConflictsDeduplicator(self.path, self.metadata)
+            is_container_changed, actions, page_conflicts = (
+                deduplicator.deduplicate(actions, page_conflicts)
+            )
+            staging.replace_page(page_id, actions)
+            if is_container_changed:
+                conflict_detector.reset()
+
+            need_update_state = need_update_state or is_container_changed
+            conflicts.extend(page_conflicts)
 
         if need_update_state:
             if len(conflicts) > 0:
@@ -977,7 +1023,30 @@ class DetachedContainer(QObject):
             self.__update_state(is_full_update=True)
 
         if len(conflicts) == 0:
-            return delta
+            staging.set_stage(DeltaStage.Resolved)
+            return []
+
+        self.__versioning_state = (
+            VersioningSynchronizationState.ConflictSolving
+        )
+        return conflicts
+
+    def __resolve_conflicts(self, conflicts: List[VersioningConflict]) -> None:
+        # Synchronization could be finished while waiting in queue
+        if not isinstance(self.__sync_task, FetchDeltaTask):
+            return
+
+        if not self.__run_delta_step(
+            lambda: self.__show_resolving_dialog(conflicts)
+        ):
+            return
+
+        self.__apply_delta()
+
+    def __show_resolving_dialog(
+        self, conflicts: List[VersioningConflict]
+    ) -> None:
+        staging = DeltaStaging(self.path, self.metadata)
 
         dialog = ResolvingDialog(self.path, self.metadata, conflicts)
         result = dialog.exec()
@@ -988,14 +1057,14 @@ class DetachedContainer(QObject):
             )
 
         resolver = ConflictsResolver(self.path, self.metadata)
-        status, delta = resolver.resolve(delta, dialog.resolutions)
+        status = resolver.resolve_staged(staging, dialog.resolutions)
 
         if status != ConflictsResolver.Status.Resolved:
             raise SynchronizationError("Not all conflicts were solved")
 
-        self.__update_state(is_full_update=True)
+        staging.set_stage(DeltaStage.Resolved)
 
-        return delta
+        self.__update_state(is_full_update=True)
 
     def __reset_error(self) -> None:
         if self.__error is None or self.__is_silent_sync:
@@ -15,9 +15,15 @@ from qgis.PyQt.QtCore import QObject, QTimer, pyqtSlot
 from qgis.utils import iface  # type: ignore
 
 from nextgis_connect.compat import QGIS_3_34
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+)
 from nextgis_connect.detached_editing.path_preprocessor import (
     DetachedEditingPathPreprocessor,
 )
+from nextgis_connect.detached_editing.synchronization_scheduler import (
+    SynchronizationScheduler,
+)
 from nextgis_connect.logging import logger
 from nextgis_connect.settings import NgConnectSettings
 
@@ -32,6 +38,7 @@ class DetachedEditing(QObject):
     __containers: Dict[Path, DetachedContainer]
     __containers_by_layer_id: Dict[str, DetachedContainer]
     __is_synchronization_enabled: bool
+    __scheduler: SynchronizationScheduler
 
     __timer: QTimer
     __properties_factory: DetachedLayerConfigWidgetFactory
@@ -47,6 +54,7 @@ class DetachedEditing(QObject):
         self.__containers = {}
         self.__containers_by_layer_id = {}
         self.__is_synchronization_enabled = True
+        self.__scheduler = SynchronizationScheduler()
 
         self.__timer = QTimer(self)
         self.__timer.setInterval(settings.layer_check_period)
@@ -91,6 +99,8 @@ class DetachedEditing(QObject):
         for container in containers:
             container.clear()
 
+        ContainerConnectionPool.instance().close_all()
+
         if self.__path_preprocessor_id is not None:
             QgsPathResolver.removePathPreprocessor(self.__path_preprocessor_id)
             del self.__path_preprocessor
@@ -109,25 +119,10 @@ class DetachedEditing(QObject):
     def synchronize_layers(self) -> None:
         self.__remove_empty_containers()
 
-        if (
-            self.is_sychronization_active
-            or not self.__is_synchronization_enabled
-        ):
+        if not self.__is_synchronization_enabled:
             return
 
-        stubs = list(
-            filter(
-                lambda container: container.is_not_initialized,
-                self.__containers.values(),
-            )
-        )
-        containers = (
-            stubs if len(stubs) > 0 else list(self.__containers.values())
-        )
-        for container in containers:
-            is_started = container.synchronize()
-            if is_started:
-                return
+        self.__scheduler.schedule(self.__containers.values())
 
     @pyqtSlot(name="enableSynchronization")
     def enable_synchronization(self) -> None:
@@ -174,6 +169,7 @@ class DetachedEditing(QObject):
                 return False
 
             self.__containers[container_path] = container
+            container.state_changed.connect(self.__on_container_state_changed)
 
         self.__containers_by_layer_id[layer.id()] = container
 
@@ -211,8 +207,25 @@ class DetachedEditing(QObject):
                 and container.state != utils.DetachedLayerState.Synchronization
             ):
                 self.__containers.pop(container.path)
+                self.__scheduler.forget(container.path)
+                utils.close_container_connections(container.path)
                 container.deleteLater()
 
+    @pyqtSlot(utils.DetachedLayerState)
+    def __on_container_state_changed(
+        self, state: utils.DetachedLayerState
+    ) -> None:
+        container = self.sender()
+        if (
+            not isinstance(container, DetachedContainer)
+            or state == utils.DetachedLayerState.Synchronization
+            or not self.__scheduler.is_running(container)
+        ):
+            return
+
+        # Give freed slot to the next container after returning to event loop
+        QTimer.singleShot(0, self.synchronize_layers)
+
     @pyqtSlot(QgsLayerTreeNode, int, int)
     def __on_added_children(
         self, parent_node: QgsLayerTreeNode, index_from: int, index_to: int
@@ -277,4 +290,6 @@ class DetachedEditing(QObject):
         for path in paths_for_remove:
             container = self.__containers.pop(path, None)
             if container is not None:
+                self.__scheduler.forget(path)
+                utils.close_container_connections(path)
                 container.deleteLater()
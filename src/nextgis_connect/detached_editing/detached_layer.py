@@ -1,6 +1,5 @@
 import json
 import sqlite3
-from contextlib import closing
 from copy import deepcopy
 from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple, cast
 
@@ -22,6 +21,7 @@ from nextgis_connect.compat import (
     QgsFeatureList,
     QgsGeometryMap,
 )
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.serialization import (
     deserialize_value,
     serialize_geometry,
@@ -29,14 +29,13 @@ from nextgis_connect.detached_editing.serialization import (
     simplify_value,
 )
 from nextgis_connect.detached_editing.utils import (
+    container_transaction,
     detached_layer_uri,
-    make_connection,
 )
 from nextgis_connect.exceptions import ContainerError
 from nextgis_connect.logging import logger
 from nextgis_connect.resources.ngw_field import FieldId
 from nextgis_connect.types import NgwFeatureId
-from nextgis_connect.utils import wrap_sql_value
 
 if TYPE_CHECKING:
     from .detached_container import DetachedContainer
@@ -213,21 +212,17 @@ class DetachedLayer(QObject):
     def __log_added_features(self, _: str, features: QgsFeatureList) -> None:
         ng_error = None
         try:
-            with closing(
-                make_connection(self.__qgs_layer)
-            ) as connection, closing(connection.cursor()) as cursor:
-                added_fids = ",".join(
-                    map(lambda feature: f"({feature.id()})", features)
+            with container_transaction(self.__qgs_layer) as cursor:
+                added_fids = [(feature.id(),) for feature in features]
+                cursor.executemany(
+                    "INSERT INTO ngw_features_metadata (fid) VALUES (?)",
+                    added_fids,
                 )
-                cursor.executescript(
-                    f"""
-                    INSERT INTO ngw_features_metadata (fid) VALUES {added_fids};
-                    INSERT INTO ngw_added_features (fid) VALUES {added_fids};
-                    """
+                cursor.executemany(
+                    "INSERT INTO ngw_added_features (fid) VALUES (?)",
+                    added_fids,
                 )
 
-                connection.commit()
-
         except Exception as error:
             message = "Can't create adding changes records"
             ng_error = ContainerError(message)
@@ -249,9 +244,7 @@ class DetachedLayer(QObject):
         ng_error = None
 
         try:
-            with closing(
-                make_connection(self.__qgs_layer)
-            ) as connection, closing(connection.cursor()) as cursor:
+            with container_transaction(self.__qgs_layer) as cursor:
                 # Delete added feature fids
                 removed_not_uploaded_fids = (
                     self.__extract_intersection_with_added_fids(
@@ -268,8 +261,6 @@ class DetachedLayer(QObject):
                 )
                 self.__add_remove_records(cursor, removed_uploaded_fids)
 
-                connection.commit()
-
         except Exception as error:
             message = "Can't create deletion changes records"
             ng_error = ContainerError(message)
@@ -294,9 +285,7 @@ class DetachedLayer(QObject):
         feature_ids = set()
 
         try:
-            with closing(
-                make_connection(self.__qgs_layer)
-            ) as connection, closing(connection.cursor()) as cursor:
+            with container_transaction(self.__qgs_layer) as cursor:
                 feature_ids = set(changed_attributes.keys())
                 added_fids_intersection = (
                     self.__extract_intersection_with_added_fids(
@@ -321,7 +310,6 @@ class DetachedLayer(QObject):
                             for attribute in changed_attributes[fid]
                         ),
                     )
-                    connection.commit()
 
         except Exception as error:
             message = "Can't create values changes records"
@@ -348,9 +336,7 @@ class DetachedLayer(QObject):
 
         feature_ids: QgsFeatureIds = set()
         try:
-            with closing(
-                make_connection(self.__qgs_layer)
-            ) as connection, closing(connection.cursor()) as cursor:
+            with container_transaction(self.__qgs_layer) as cursor:
                 feature_ids = set(changed_geometries.keys())
                 added_fids_intersection = (
                     self.__extract_intersection_with_added_fids(
@@ -370,7 +356,6 @@ class DetachedLayer(QObject):
                             for fid in changed_fids
                         ),
                     )
-                    connection.commit()
 
         except Exception as error:
             message = "Can't create geometry changes records"
@@ -473,13 +458,15 @@ class DetachedLayer(QObject):
     def __extract_intersection_with_added_fids(
         self, cursor: sqlite3.Cursor, feature_ids: QgsFeatureIds
     ) -> QgsFeatureIds:
-        fetch_added_query = """
-            SELECT fid
-            FROM ngw_added_features
-            WHERE fid in ({placeholders})
-        """.format(placeholders=",".join(map(str, feature_ids)))
-        cursor.execute(fetch_added_query)
-        return set(row[0] for row in cursor.fetchall())
+        with temporary_ids_table(cursor, feature_ids) as fids_table:
+            cursor.execute(
+                f"""
+                SELECT fid
+                FROM ngw_added_features
+                WHERE fid IN (SELECT id FROM {fids_table})
+                """
+            )
+            return set(row[0] for row in cursor.fetchall())
 
     def __create_backup_for_updated_fields(self) -> None:
         changed_attributes_info: QgsChangedAttributesMap = (
@@ -555,13 +542,14 @@ class DetachedLayer(QObject):
         if len(fids) == 0:
             return
 
-        joined_fids = ",".join(map(str, fids))
-        cursor.executescript(
-            f"""
-            DELETE FROM ngw_features_metadata
-            WHERE fid IN ({joined_fids}) AND ngw_fid IS NULL;
-            """
-        )
+        with temporary_ids_table(cursor, fids) as fids_table:
+            cursor.execute(
+                f"""
+                DELETE FROM ngw_features_metadata
+                WHERE fid IN (SELECT id FROM {fids_table})
+                    AND ngw_fid IS NULL
+                """
+            )
 
     def __add_remove_records(
         self, cursor: sqlite3.Cursor, removed_fids: QgsFeatureIds
@@ -569,48 +557,42 @@ class DetachedLayer(QObject):
         if len(removed_fids) == 0:
             return
 
-        joined_removed_fids = ",".join(map(str, removed_fids))
-        fields_backups = self.__extract_fields_backups(
-            cursor, joined_removed_fids
-        )
-        geometries_backups = self.__extract_geometries_backups(
-            cursor, joined_removed_fids
-        )
+        with temporary_ids_table(cursor, removed_fids) as fids_table:
+            fields_backups = self.__extract_fields_backups(cursor, fids_table)
+            geometries_backups = self.__extract_geometries_backups(
+                cursor, fids_table
+            )
 
-        features_backup = self.__serialize_deletion_backup(
-            removed_fids, fields_backups, geometries_backups
-        )
+            features_backup = self.__serialize_deletion_backup(
+                removed_fids, fields_backups, geometries_backups
+            )
 
-        # Update records
-        removed_records = ",".join(
-            map(
-                lambda fid: "({fid}, {backup})".format(  # noqa: UP032
-                    fid=fid,
-                    backup=wrap_sql_value(json.dumps(features_backup[fid])),
+            # Update records
+            cursor.executemany(
+                "INSERT INTO ngw_removed_features (fid, backup) VALUES (?, ?)",
+                (
+                    (fid, json.dumps(features_backup[fid]))
+                    for fid in removed_fids
                 ),
-                removed_fids,
             )
-        )
-        script = f"""
-            INSERT INTO ngw_removed_features (fid, backup)
-                VALUES {removed_records};
-        """
-
-        if len(fields_backups) > 0:
-            script += f"""
-            DELETE FROM ngw_updated_attributes
-                WHERE fid in ({joined_removed_fids});
-            """
-        if len(geometries_backups) > 0:
-            script += f"""
-            DELETE FROM ngw_updated_geometries
-                WHERE fid in ({joined_removed_fids});
-            """
 
-        cursor.executescript(script)
+            if len(fields_backups) > 0:
+                cursor.execute(
+                    f"""
+                    DELETE FROM ngw_updated_attributes
+                    WHERE fid IN (SELECT id FROM {fids_table})
+                    """
+                )
+            if len(geometries_backups) > 0:
+                cursor.execute(
+                    f"""
+                    DELETE FROM ngw_updated_geometries
+                    WHERE fid IN (SELECT id FROM {fids_table})
+                    """
+                )
 
     def __extract_fields_backups(
-        self, cursor: sqlite3.Cursor, joined_fids: str
+        self, cursor: sqlite3.Cursor, fids_table: str
     ) -> Dict[Tuple[QgsFeatureId, FieldId], str]:
         return {
             (row[0], row[1]): deserialize_value(row[2])
@@ -618,13 +600,13 @@ class DetachedLayer(QObject):
                 f"""
                 SELECT fid, attribute, backup
                 FROM ngw_updated_attributes
-                WHERE fid IN ({joined_fids})
+                WHERE fid IN (SELECT id FROM {fids_table})
                 """
             )
         }
 
     def __extract_geometries_backups(
-        self, cursor: sqlite3.Cursor, joined_fids: str
+        self, cursor: sqlite3.Cursor, fids_table: str
     ) -> Dict[QgsFeatureId, str]:
         return {
             row[0]: row[1]
@@ -632,7 +614,7 @@ class DetachedLayer(QObject):
                 f"""
                 SELECT fid, backup
                 FROM ngw_updated_geometries
-                WHERE fid IN ({joined_fids})
+                WHERE fid IN (SELECT id FROM {fids_table})
                 """
             )
         }
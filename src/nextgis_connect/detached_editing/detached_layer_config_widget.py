@@ -1,4 +1,3 @@
-from contextlib import closing
 from pathlib import Path
 from typing import Optional
 
@@ -95,9 +94,7 @@ class DetachedLayerConfigPage(QgsMapLayerConfigWidget):
         ):
             return
 
-        with closing(
-            utils.make_connection(self.__path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with utils.container_transaction(self.__path) as cursor:
             cursor.execute(
                 f"""
                 UPDATE ngw_metadata
@@ -107,8 +104,6 @@ class DetachedLayerConfigPage(QgsMapLayerConfigWidget):
                 """
             )
 
-            connection.commit()
-
         self.__metadata = utils.container_metadata(self.__path)
 
         self.__layer.setCustomProperty("ngw_need_update_state", True)
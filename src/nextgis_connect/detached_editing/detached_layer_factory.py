@@ -1,14 +1,21 @@
+import math
+import shutil
 import sqlite3
+import struct
+import tempfile
+import threading
 from contextlib import closing
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Optional, Tuple, cast
+from typing import ClassVar, Dict, Iterable, List, Optional, Tuple, cast
 
+from osgeo import gdal
 from qgis.core import (
     QgsEditError,
     QgsFeature,
     QgsField,
     QgsFields,
+    QgsGeometry,
     QgsProject,
     QgsVectorFileWriter,
     QgsVectorLayer,
@@ -16,6 +23,9 @@ from qgis.core import (
 )
 
 from nextgis_connect.compat import FieldType
+from nextgis_connect.detached_editing.metadata_cache import (
+    ContainerMetadataCache,
+)
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
     container_metadata,
@@ -36,6 +46,26 @@ from nextgis_connect.utils import wrap_sql_table_name, wrap_sql_value
 
 
 class DetachedLayerFactory:
+    """
+    Creates and fills containers of detached layers.
+
+    Initial containers are copied from an empty template with service
+    tables, so only the features table and metadata rows are created for
+    each layer. Templates are created once per container version in a
+    temporary directory.
+    """
+
+    __templates: ClassVar[Dict[str, Path]] = {}
+    __templates_directory: ClassVar[Optional[tempfile.TemporaryDirectory]] = (
+        None
+    )
+    __templates_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    __use_template: bool
+
+    def __init__(self, *, use_template: bool = True) -> None:
+        self.__use_template = use_template
+
     def create_initial_container(
         self, ngw_layer: NGWVectorLayer, container_path: Path
     ) -> None:
@@ -50,14 +80,20 @@ class DetachedLayerFactory:
             + f' "{ngw_layer.display_name}" (id={ngw_layer.resource_id})'
         )
         try:
-            self.__create_container(ngw_layer, container_path)
+            is_copied = self.__use_template and self.__copy_template(
+                container_path
+            )
+            self.__create_container(
+                ngw_layer, container_path, is_layer_added=is_copied
+            )
             self.__check_fields(ngw_layer, container_path)
 
             with closing(
                 make_connection(container_path)
             ) as connection, closing(connection.cursor()) as cursor:
-                self.__initialize_container_settings(cursor)
-                self.__create_container_tables(cursor)
+                if not is_copied:
+                    self.__initialize_container_settings(cursor)
+                    self.__create_container_tables(cursor)
                 self.__insert_metadata(ngw_layer, cursor)
 
                 connection.commit()
@@ -72,6 +108,7 @@ class DetachedLayerFactory:
             raise ContainerError(message, code=code) from error
 
         else:
+            ContainerMetadataCache.instance().invalidate(container_path)
             logger.debug(
                 "Container successfully created and filled with metadata"
             )
@@ -94,15 +131,19 @@ class DetachedLayerFactory:
             self.__check_fields(ngw_layer, source_path, fid_field=fid_field)
             self.__check_fields(ngw_layer, container_path, fid_field=fid_field)
 
-            self.__copy_features(source_path, container_path, metadata)
+            is_copied = self.__bulk_copy_features(
+                source_path, container_path, metadata
+            )
+            if not is_copied:
+                self.__copy_features(source_path, container_path, metadata)
 
-            with closing(
-                make_connection(container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
-                self.__insert_ngw_ids(cursor)
-                self.__update_sync_date(cursor)
+                with closing(
+                    make_connection(container_path)
+                ) as connection, closing(connection.cursor()) as cursor:
+                    self.__insert_ngw_ids(cursor)
+                    self.__update_sync_date(cursor)
 
-                connection.commit()
+                    connection.commit()
 
         except NgConnectError:
             raise
@@ -113,19 +154,79 @@ class DetachedLayerFactory:
             raise ContainerError(message, code=code) from error
 
         else:
+            ContainerMetadataCache.instance().invalidate(container_path)
             logger.debug(
                 f'Container for layer "{ngw_layer.display_name}" successfully '
                 "updated"
             )
 
+    def __copy_template(self, container_path: Path) -> bool:
+        template_path = self.__template_path()
+        if template_path is None:
+            return False
+
+        shutil.copyfile(template_path, container_path)
+        return True
+
+    def __template_path(self) -> Optional[Path]:
+        version = NgConnectSettings().supported_container_version
+        cls = DetachedLayerFactory
+        with cls.__templates_lock:
+            template_path = cls.__templates.get(version)
+            if template_path is not None and template_path.exists():
+                return template_path
+
+            try:
+                if cls.__templates_directory is None:
+                    cls.__templates_directory = tempfile.TemporaryDirectory(
+                        prefix="ngc_templates_"
+                    )
+                template_path = (
+                    Path(cls.__templates_directory.name)
+                    / f"container_{version}.gpkg"
+                )
+                self.__create_template(template_path)
+            except Exception:
+                logger.exception("Failed to create container template")
+                return None
+
+            cls.__templates[version] = template_path
+            return template_path
+
+    def __create_template(self, template_path: Path) -> None:
+        """Create GPKG with service tables and without layers"""
+        driver = gdal.GetDriverByName("GPKG")
+        dataset = driver.Create(str(template_path), 0, 0, 0, gdal.GDT_Unknown)
+        if dataset is None:
+            message = f"Can't create GPKG: {gdal.GetLastErrorMsg()}"
+            raise ContainerError(message)
+        dataset = None
+
+        with closing(make_connection(template_path)) as connection, closing(
+            connection.cursor()
+        ) as cursor:
+            self.__initialize_container_settings(cursor)
+            self.__create_container_tables(cursor)
+            connection.commit()
+
+        logger.debug("Container template successfully created")
+
     def __create_container(
-        self, ngw_layer: NGWVectorLayer, container_path: Path
+        self,
+        ngw_layer: NGWVectorLayer,
+        container_path: Path,
+        *,
+        is_layer_added: bool = False,
     ) -> bool:
         project = QgsProject.instance()
         assert project is not None
 
         options = QgsVectorFileWriter.SaveVectorOptions()
         options.driverName = "GPKG"
+        if is_layer_added:
+            options.actionOnExistingFile = (
+                QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteLayer
+            )
         options.layerName = f"vector_layer_{ngw_layer.resource_id}"
         options.fileEncoding = "UTF-8"
         fid_field, fields = self.__prepare_fields(ngw_layer.qgs_fields)
@@ -354,6 +455,293 @@ class DetachedLayerFactory:
             fields_tuple_generator,
         )
 
+    def __bulk_copy_features(
+        self,
+        source_path: Path,
+        container_path: Path,
+        metadata: DetachedContainerMetaData,
+    ) -> bool:
+        """
+        Copy features with a single INSERT ... SELECT from attached source.
+
+        Features, their metadata and sync date are written in one
+        transaction. Returns False if source layout can't be mapped to the
+        container one and features should be copied one by one.
+        """
+        with closing(make_connection(container_path)) as connection, closing(
+            connection.cursor()
+        ) as cursor:
+            connection.isolation_level = None
+            cursor.execute("ATTACH DATABASE ? AS source", (str(source_path),))
+
+            try:
+                copy_query = self.__bulk_copy_query(cursor, metadata)
+                if copy_query is None:
+                    return False
+
+                cursor.execute("BEGIN")
+                try:
+                    rtree_triggers = self.__drop_rtree_triggers(
+                        cursor, metadata
+                    )
+                    cursor.execute(copy_query)
+                    self.__rebuild_rtree(cursor, metadata)
+                    for trigger_sql in rtree_triggers:
+                        cursor.execute(trigger_sql)
+                    self.__update_layer_statistics(cursor, metadata)
+
+                    self.__insert_ngw_ids(cursor)
+                    self.__update_sync_date(cursor)
+
+                    cursor.execute("COMMIT")
+
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+
+            except sqlite3.Error:
+                logger.exception("Bulk features copying failed")
+                return False
+
+            finally:
+                cursor.execute("DETACH DATABASE source")
+
+        logger.debug("Features copied with SQL")
+
+        return True
+
+    def __bulk_copy_query(
+        self, cursor: sqlite3.Cursor, metadata: DetachedContainerMetaData
+    ) -> Optional[str]:
+        cursor.execute(
+            """
+            SELECT table_name FROM source.gpkg_contents
+            WHERE data_type='features'
+            """
+        )
+        source_table = cursor.fetchone()[0]
+
+        geometry_columns_query = """
+            SELECT column_name, geometry_type_name, srs_id, z, m
+            FROM {schema}.gpkg_geometry_columns
+            WHERE lower(table_name) = lower(?)
+        """
+        cursor.execute(
+            geometry_columns_query.format(schema="source"), (source_table,)
+        )
+        source_geometry = cursor.fetchone()
+        cursor.execute(
+            geometry_columns_query.format(schema="main"),
+            (metadata.table_name,),
+        )
+        target_geometry = cursor.fetchone()
+        if source_geometry is None or target_geometry is None:
+            return None
+
+        source_geometry_type = (
+            source_geometry[1].upper(),
+            *source_geometry[2:],
+        )
+        target_geometry_type = (
+            target_geometry[1].upper(),
+            *target_geometry[2:],
+        )
+        if source_geometry_type != target_geometry_type:
+            logger.debug("Geometry types differ, bulk copying is skipped")
+            return None
+
+        def columns(schema: str, table: str) -> List[str]:
+            return [
+                row[1]
+                for row in cursor.execute(
+                    f"PRAGMA {schema}.table_info({wrap_sql_table_name(table)})"
+                )
+            ]
+
+        source_columns = columns("source", source_table)
+        target_columns = columns("main", metadata.table_name)
+
+        columns_mapping = {
+            metadata.fid_field: metadata.fid_field,
+            target_geometry[0]: source_geometry[0],
+        }
+        for field in metadata.fields:
+            columns_mapping[field.keyname] = field.keyname
+
+        if any(
+            target_column not in target_columns
+            or source_column not in source_columns
+            for target_column, source_column in columns_mapping.items()
+        ):
+            logger.debug("Fields differ, bulk copying is skipped")
+            return None
+
+        target_table = wrap_sql_table_name(metadata.table_name)
+        cursor.execute(f"SELECT EXISTS(SELECT 1 FROM main.{target_table})")
+        if cursor.fetchone()[0]:
+            logger.debug("Container is not empty, bulk copying is skipped")
+            return None
+
+        target_columns_str = ", ".join(
+            map(wrap_sql_table_name, columns_mapping.keys())
+        )
+        source_columns_str = ", ".join(
+            map(wrap_sql_table_name, columns_mapping.values())
+        )
+        return f"""
+            INSERT INTO main.{target_table} ({target_columns_str})
+            SELECT {source_columns_str}
+            FROM source.{wrap_sql_table_name(source_table)}
+        """
+
+    def __drop_rtree_triggers(
+        self, cursor: sqlite3.Cursor, metadata: DetachedContainerMetaData
+    ) -> List[str]:
+        # R-tree triggers use spatial SQL functions, which are available only
+        # inside GDAL, so index is rebuilt manually
+        rtree_name = f"rtree_{metadata.table_name}_{metadata.geom_field}"
+        cursor.execute(
+            """
+            SELECT name, sql FROM main.sqlite_master
+            WHERE type='trigger' AND lower(name) LIKE lower(?) || '%'
+            """,
+            (rtree_name,),
+        )
+        triggers = cursor.fetchall()
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER main.{wrap_sql_table_name(name)}")
+
+        return [sql for _, sql in triggers]
+
+    def __rebuild_rtree(
+        self, cursor: sqlite3.Cursor, metadata: DetachedContainerMetaData
+    ) -> None:
+        rtree_name = f"rtree_{metadata.table_name}_{metadata.geom_field}"
+        cursor.execute(
+            """
+            SELECT EXISTS(
+                SELECT 1 FROM main.sqlite_master
+                WHERE type='table' AND lower(name)=lower(?)
+            )
+            """,
+            (rtree_name,),
+        )
+        if not cursor.fetchone()[0]:
+            return
+
+        rtree_table = wrap_sql_table_name(rtree_name)
+        geometries = cursor.connection.execute(
+            f"""
+            SELECT {wrap_sql_table_name(metadata.fid_field)},
+                {wrap_sql_table_name(metadata.geom_field)}
+            FROM main.{wrap_sql_table_name(metadata.table_name)}
+            WHERE {wrap_sql_table_name(metadata.geom_field)} IS NOT NULL
+            """
+        )
+
+        def envelopes() -> Iterable[Tuple[int, float, float, float, float]]:
+            for fid, geometry in geometries:
+                envelope = self.__geometry_envelope(geometry)
+                if envelope is not None:
+                    yield (fid, *envelope)
+
+        cursor.execute(f"DELETE FROM main.{rtree_table}")
+        cursor.executemany(
+            f"INSERT INTO main.{rtree_table} VALUES (?, ?, ?, ?, ?)",
+            envelopes(),
+        )
+
+    def __update_layer_statistics(
+        self, cursor: sqlite3.Cursor, metadata: DetachedContainerMetaData
+    ) -> None:
+        table_name = wrap_sql_table_name(metadata.table_name)
+        cursor.execute(
+            """
+            SELECT EXISTS(
+                SELECT 1 FROM main.sqlite_master
+                WHERE type='table' AND name='gpkg_ogr_contents'
+            )
+            """
+        )
+        if cursor.fetchone()[0]:
+            cursor.execute(
+                f"""
+                UPDATE main.gpkg_ogr_contents
+                SET feature_count=(SELECT COUNT(*) FROM main.{table_name})
+                WHERE lower(table_name)=lower(?)
+                """,
+                (metadata.table_name,),
+            )
+
+        rtree_name = f"rtree_{metadata.table_name}_{metadata.geom_field}"
+        cursor.execute(
+            """
+            SELECT EXISTS(
+                SELECT 1 FROM main.sqlite_master
+                WHERE type='table' AND lower(name)=lower(?)
+            )
+            """,
+            (rtree_name,),
+        )
+        if not cursor.fetchone()[0]:
+            return
+
+        cursor.execute(
+            f"""
+            UPDATE main.gpkg_contents
+            SET (min_x, min_y, max_x, max_y) = (
+                SELECT MIN(minx), MIN(miny), MAX(maxx), MAX(maxy)
+                FROM main.{wrap_sql_table_name(rtree_name)}
+            )
+            WHERE lower(table_name)=lower(?)
+            """,
+            (metadata.table_name,),
+        )
+
+    def __geometry_envelope(
+        self, blob: bytes
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """Return (minx, maxx, miny, maxy) of GeoPackage geometry blob"""
+        if len(blob) < 8 or blob[:2] != b"GP":
+            return None
+
+        flags = blob[3]
+        if flags & 0b10000:
+            return None  # Empty geometry
+
+        byte_order = "<" if flags & 0b1 else ">"
+        envelope_type = (flags >> 1) & 0b111
+        envelope_size = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}.get(envelope_type)
+        if envelope_size is None:
+            return None
+
+        if envelope_size > 0:
+            return struct.unpack_from(f"{byte_order}4d", blob, 8)
+
+        wkb = blob[8 + envelope_size :]
+
+        # Points are stored without envelope
+        wkb_byte_order = "<" if wkb[0] == 1 else ">"
+        (wkb_type,) = struct.unpack_from(f"{wkb_byte_order}I", wkb, 1)
+        if (wkb_type & 0xFFFF) % 1000 == 1:
+            x, y = struct.unpack_from(f"{wkb_byte_order}2d", wkb, 5)
+            if math.isnan(x) or math.isnan(y):
+                return None
+            return (x, x, y, y)
+
+        geometry = QgsGeometry()
+        geometry.fromWkb(wkb)
+        if geometry.isEmpty():
+            return None
+
+        rect = geometry.boundingBox()
+        return (
+            rect.xMinimum(),
+            rect.xMaximum(),
+            rect.yMinimum(),
+            rect.yMaximum(),
+        )
+
     def __copy_features(
         self,
         source_path: Path,
@@ -3,8 +3,8 @@ from typing import TYPE_CHECKING, cast
 
 from qgis.gui import QgsLayerTreeViewIndicator
 from qgis.PyQt.QtCore import QTimer, pyqtSlot
-from qgis.PyQt.QtGui import QIcon
 
+from nextgis_connect.core.icon_cache import IconCache
 from nextgis_connect.logging import logger
 
 from .detached_layer_status_dialog import DetachedLayerStatusDialog
@@ -43,6 +43,7 @@ class DetachedLayerIndicator(QgsLayerTreeViewIndicator):
     @pyqtSlot(DetachedLayerState, name="onStateChanged")
     def __on_state_changed(self, state: DetachedLayerState) -> None:
         icons_path = Path(__file__).parents[1] / "icons" / "detached_layers"
+        icon_cache = IconCache.instance()
 
         self.__timer.stop()
         self.__tick = 0
@@ -66,18 +67,22 @@ class DetachedLayerIndicator(QgsLayerTreeViewIndicator):
             DetachedLayerState.NotInitialized,
             DetachedLayerState.NotSynchronized,
         ):
-            self.setIcon(QIcon(str(icons_path / "not_synchronized.svg")))
+            self.setIcon(
+                icon_cache.file_icon(icons_path / "not_synchronized.svg")
+            )
             status_tooltip = self.tr("Layer is not synchronized!")
             tooltip = f"{status_tooltip}{date_tooltip}"
         elif state == DetachedLayerState.Synchronized:
-            self.setIcon(QIcon(str(icons_path / "synchronized.svg")))
+            self.setIcon(icon_cache.file_icon(icons_path / "synchronized.svg"))
             status_tooltip = self.tr("Layer is synchronized")
             tooltip = f"{status_tooltip}{date_tooltip}"
         elif state == DetachedLayerState.Synchronization:
-            self.setIcon(QIcon(str(icons_path / "synchronization.svg")))
+            self.setIcon(
+                icon_cache.file_icon(icons_path / "synchronization.svg")
+            )
             tooltip = self.tr("Layer is syncing")
         elif state == DetachedLayerState.Error:
-            self.setIcon(QIcon(str(icons_path / "error.svg")))
+            self.setIcon(icon_cache.file_icon(icons_path / "error.svg"))
             if self.__container.error_code.is_synchronization_error:
                 status_tooltip = self.tr("Synchronization error!")
             elif self.__container.error_code.is_container_error:
@@ -102,7 +107,10 @@ class DetachedLayerIndicator(QgsLayerTreeViewIndicator):
         self.__tick += 1
 
         icons_path = Path(__file__).parents[1] / "icons" / "detached_layers"
+        icon_cache = IconCache.instance()
         if self.__tick % 5 == 0:
-            self.setIcon(QIcon(str(icons_path / "empty.svg")))
+            self.setIcon(icon_cache.file_icon(icons_path / "empty.svg"))
         else:
-            self.setIcon(QIcon(str(icons_path / "synchronization.svg")))
+            self.setIcon(
+                icon_cache.file_icon(icons_path / "synchronization.svg")
+            )
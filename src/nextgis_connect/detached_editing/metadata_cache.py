@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ClassVar,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnection,
+)
+
+if TYPE_CHECKING:
+    from nextgis_connect.detached_editing.utils import (
+        DetachedContainerMetaData,
+    )
+
+MetadataLoader = Callable[[sqlite3.Cursor], "DetachedContainerMetaData"]
+
+
+@dataclass
+class _CacheEntry:
+    token: Tuple[Hashable, ...]
+    metadata: "DetachedContainerMetaData"
+
+
+class ContainerMetadataCache:
+    """
+    Cache of detached containers metadata.
+
+    Metadata is stored by container path together with a change token. The
+    token consists of the container file identity, the connection serial and
+    its ``data_version`` which is changed by commits of other connections,
+    the number of rows changed by the connection itself and a generation
+    bumped explicitly by writers. Metadata is reloaded when the token
+    changes.
+
+    Cached metadata is shared between callers and must not be modified.
+    """
+
+    MAX_ENTRIES: ClassVar[int] = 256
+
+    __instance: ClassVar[Optional["ContainerMetadataCache"]] = None
+    __instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    __lock: threading.Lock
+    __entries: "OrderedDict[Path, _CacheEntry]"
+    __generation: int
+    __generations: Dict[Path, int]
+    __max_entries: int
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__generation = 0
+        self.__generations = {}
+        self.__max_entries = (
+            max_entries if max_entries is not None else self.MAX_ENTRIES
+        )
+
+    @classmethod
+    def instance(cls) -> "ContainerMetadataCache":
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls()
+            return cls.__instance
+
+    def get(
+        self, path: Path, cursor: sqlite3.Cursor, load: MetadataLoader
+    ) -> "DetachedContainerMetaData":
+        """
+        Cached metadata of container or metadata loaded with cursor.
+
+        Cursor must belong to a connection to the container. Metadata read
+        inside a transaction may include uncommitted changes, so it is
+        neither taken from cache nor stored. Connections not created by
+        ContainerConnectionPool are not cached too.
+        """
+        connection = cursor.connection
+        if (
+            not isinstance(connection, ContainerConnection)
+            or connection.in_transaction
+        ):
+            return load(cursor)
+
+        path = path.absolute()
+        token = self.__token(path, cursor)
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is not None and entry.token == token:
+                self.__entries.move_to_end(path)
+                return entry.metadata
+
+        metadata = load(cursor)
+
+        with self.__lock:
+            self.__entries[path] = _CacheEntry(token, metadata)
+            self.__entries.move_to_end(path)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+        return metadata
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Forget metadata of container or of all containers"""
+        with self.__lock:
+            if path is None:
+                self.__generation += 1
+                self.__entries.clear()
+                return
+
+            path = path.absolute()
+            self.__generations[path] = self.__generations.get(path, 0) + 1
+            self.__entries.pop(path, None)
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+    def __token(
+        self, path: Path, cursor: sqlite3.Cursor
+    ) -> Tuple[Hashable, ...]:
+        # Generation is taken first, so metadata loaded concurrently with
+        # invalidation is never considered actual
+        with self.__lock:
+            generation = (self.__generation, self.__generations.get(path, 0))
+
+        stat = path.stat()
+        connection = cast(ContainerConnection, cursor.connection)
+        data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+        return (
+            generation,
+            stat.st_ino,
+            stat.st_mtime_ns,
+            stat.st_size,
+            connection.serial,
+            data_version,
+            connection.total_changes,
+        )
@@ -0,0 +1,187 @@
+import heapq
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from nextgis_connect.detached_editing.utils import DetachedLayerState
+from nextgis_connect.logging import logger
+from nextgis_connect.settings import NgConnectSettings
+
+if TYPE_CHECKING:
+    from nextgis_connect.detached_editing.detached_container import (
+        DetachedContainer,
+    )
+
+
+class SynchronizationScheduler:
+    """
+    Chooses detached containers to synchronize.
+
+    Synchronization tasks of different containers run simultaneously in
+    the plugin task manager, and the number of active synchronizations is
+    limited globally and per NGW connection. Free slots are given to not
+    initialized stubs first, then to containers with local changes and
+    then to containers checked longest ago. Containers which failed to
+    synchronize are postponed with exponential back-off.
+    """
+
+    BACKOFF_BASE: ClassVar[timedelta] = timedelta(seconds=30)
+    BACKOFF_MAX: ClassVar[timedelta] = timedelta(minutes=30)
+
+    __max_parallel: Optional[int]
+    __max_parallel_per_connection: Optional[int]
+
+    __running: Set[Path]
+    __failures: Dict[Path, int]
+    __postponed_until: Dict[Path, datetime]
+
+    def __init__(
+        self,
+        *,
+        max_parallel: Optional[int] = None,
+        max_parallel_per_connection: Optional[int] = None,
+    ) -> None:
+        self.__max_parallel = max_parallel
+        self.__max_parallel_per_connection = max_parallel_per_connection
+
+        self.__running = set()
+        self.__failures = {}
+        self.__postponed_until = {}
+
+    @property
+    def max_parallel(self) -> int:
+        if self.__max_parallel is not None:
+            return self.__max_parallel
+        return NgConnectSettings().synchronization_max_parallel
+
+    @property
+    def max_parallel_per_connection(self) -> int:
+        if self.__max_parallel_per_connection is not None:
+            return self.__max_parallel_per_connection
+        return NgConnectSettings().synchronization_max_parallel_per_connection
+
+    def is_running(self, container: "DetachedContainer") -> bool:
+        return container.path in self.__running
+
+    def schedule(
+        self, containers: Iterable["DetachedContainer"]
+    ) -> List["DetachedContainer"]:
+        """Start synchronization of containers within limits"""
+        containers = list(containers)
+        now = datetime.now()
+
+        self.__update_running(containers, now)
+
+        connections_load: Dict[str, int] = {}
+        for container in containers:
+            if container.path not in self.__running:
+                continue
+            connection_id = container.metadata.connection_id
+            connections_load[connection_id] = (
+                connections_load.get(connection_id, 0) + 1
+            )
+
+        free_slots = self.max_parallel - len(self.__running)
+        if free_slots <= 0:
+            return []
+
+        max_per_connection = self.max_parallel_per_connection
+
+        queue = self.__build_queue(containers, now)
+        started = []
+        while len(queue) > 0 and free_slots > 0:
+            *_, container = heapq.heappop(queue)
+
+            connection_id = container.metadata.connection_id
+            if connections_load.get(connection_id, 0) >= max_per_connection:
+                continue
+
+            if not container.synchronize():
+                continue
+
+            self.__running.add(container.path)
+            connections_load[connection_id] = (
+                connections_load.get(connection_id, 0) + 1
+            )
+            free_slots -= 1
+            started.append(container)
+
+        return started
+
+    def forget(self, path: Path) -> None:
+        self.__running.discard(path)
+        self.__failures.pop(path, None)
+        self.__postponed_until.pop(path, None)
+
+    def __update_running(
+        self, containers: List["DetachedContainer"], now: datetime
+    ) -> None:
+        containers_by_path = {
+            container.path: container for container in containers
+        }
+
+        for path in list(self.__running):
+            container = containers_by_path.get(path)
+            if container is None:
+                self.forget(path)
+                continue
+
+            if container.state == DetachedLayerState.Synchronization:
+                continue
+
+            self.__running.remove(path)
+
+            if container.state != DetachedLayerState.Error:
+                self.__failures.pop(path, None)
+                self.__postponed_until.pop(path, None)
+                continue
+
+            failures = self.__failures.get(path, 0) + 1
+            self.__failures[path] = failures
+            delay = min(
+                self.BACKOFF_BASE * 2 ** (failures - 1), self.BACKOFF_MAX
+            )
+            self.__postponed_until[path] = now + delay
+            logger.debug(
+                f"Synchronization of layer {container.metadata} is postponed"
+                f" for {delay} after {failures} failures"
+            )
+
+        # Running synchronizations started manually
+        for container in containers:
+            if container.state == DetachedLayerState.Synchronization:
+                self.__running.add(container.path)
+
+    def __build_queue(
+        self, containers: List["DetachedContainer"], now: datetime
+    ) -> List[Tuple[int, datetime, int, "DetachedContainer"]]:
+        queue = []
+        for index, container in enumerate(containers):
+            if container.path in self.__running or container.metadata is None:
+                continue
+
+            postponed_until = self.__postponed_until.get(container.path)
+            if postponed_until is not None and now < postponed_until:
+                continue
+
+            if container.is_not_initialized:
+                priority = 0
+            elif container.metadata.has_changes:
+                priority = 1
+            else:
+                priority = 2
+
+            check_date = container.check_date or datetime.min
+            queue.append((priority, check_date, index, container))
+
+        heapq.heapify(queue)
+        return queue
@@ -1,37 +1,38 @@
-from contextlib import closing
 from datetime import datetime
 from pathlib import Path
-from typing import List
 
 from nextgis_connect.detached_editing.action_applier import ActionApplier
-from nextgis_connect.detached_editing.actions import (
-    FeatureAction,
-)
+from nextgis_connect.detached_editing.delta_staging import DeltaStaging
 from nextgis_connect.detached_editing.tasks.detached_editing_task import (
     DetachedEditingTask,
 )
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.exceptions import SynchronizationError
 from nextgis_connect.logging import logger
 
 
 class ApplyDeltaTask(DetachedEditingTask):
+    """
+    Apply staged delta page by page.
+
+    Every applied page is marked in the staging, so an interrupted task
+    continues from the first not applied page.
+    """
+
     _container_path: Path
     _metadata: DetachedContainerMetaData
 
     __target: int
     __timestamp: datetime
-    __delta: List[FeatureAction]
 
     def __init__(
         self,
         container_path: Path,
         target: int,
         timestamp: datetime,
-        delta: List[FeatureAction],
     ) -> None:
         super().__init__(container_path)
         if self._error is not None:
@@ -44,7 +45,6 @@ class ApplyDeltaTask(DetachedEditingTask):
 
         self.__target = target
         self.__timestamp = timestamp
-        self.__delta = delta
 
     def run(self) -> bool:
         if not super().run():
@@ -55,17 +55,31 @@ class ApplyDeltaTask(DetachedEditingTask):
         )
 
         try:
+            staging = DeltaStaging(self._container_path, self._metadata)
             applier = ActionApplier(self._container_path, self._metadata)
-            applier.apply(self.__delta)
 
-            with closing(
-                make_connection(self._container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
+            # Interrupted page is the first one not marked as applied
+            state = staging.state
+            is_recovering = state is not None and state.is_applying
+
+            for page_id, actions in staging.pages(skip_applied=True):
+                if is_recovering:
+                    actions = applier.recover(actions, staging.inserted_fids)
+                    is_recovering = False
+
+                # Features are committed by the provider through its own
+                # connection, so fids of created features are stored before
+                # and page is marked as applied after the commit. An
+                # interruption in between is repaired by recovering
+                applier.apply(actions, before_commit=staging.begin_apply)
+                staging.mark_applied(page_id)
+
+            with container_transaction(self._container_path) as cursor:
                 cursor.execute(
                     "UPDATE ngw_metadata SET version=?, sync_date=?",
                     (self.__target, self.__timestamp),
                 )
-                connection.commit()
+                staging.clear()
 
         except SynchronizationError as error:
             self._error = error
@@ -1,4 +1,3 @@
-from contextlib import closing
 from pathlib import Path
 from typing import Optional, cast
 
@@ -10,7 +9,7 @@ from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
     container_changes,
     container_metadata,
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.exceptions import (
     ContainerError,
@@ -186,9 +185,7 @@ class DetachedEditingTask(NgConnectTask):
 
     def _is_container_fields_changed(self) -> bool:
         container_fields_name = set()
-        with closing(
-            make_connection(self._container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(self._container_path) as cursor:
             container_fields_name = set(
                 row[1]
                 for row in cursor.execute(
@@ -1,11 +1,10 @@
-from contextlib import closing
 from pathlib import Path
 from typing import Dict, List, Set
 
 from nextgis_connect.detached_editing.tasks import DetachedEditingTask
 from nextgis_connect.detached_editing.utils import (
     container_metadata,
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.exceptions import (
     SynchronizationError,
@@ -92,9 +91,7 @@ class FetchAdditionalDataTask(DetachedEditingTask):
             if field.lookup_table is not None
         )
 
-        with closing(
-            make_connection(self._container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(self._container_path) as cursor:
             cursor.executemany(
                 """
                 UPDATE ngw_fields_metadata
@@ -114,7 +111,6 @@ class FetchAdditionalDataTask(DetachedEditingTask):
                     for field in ngw_layer.fields
                 ),
             )
-            connection.commit()
 
         # Update for next tasks
         self._metadata = container_metadata(self._container_path)
@@ -1,13 +1,11 @@
 import urllib.parse
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict
 
 from nextgis_connect.detached_editing.action_serializer import ActionSerializer
-from nextgis_connect.detached_editing.actions import (
-    ContinueAction,
-    VersioningAction,
-)
+from nextgis_connect.detached_editing.actions import ContinueAction
+from nextgis_connect.detached_editing.delta_staging import DeltaStaging
 from nextgis_connect.detached_editing.tasks.detached_editing_task import (
     DetachedEditingTask,
 )
@@ -22,9 +20,16 @@ from nextgis_connect.resources.ngw_fields import NgwFields
 
 
 class FetchDeltaTask(DetachedEditingTask):
+    """
+    Download remote changes page by page into the container delta staging.
+
+    If the previous synchronization was interrupted, fetching continues from
+    the last stored page of the staged delta.
+    """
+
     __target: int
     __timestamp: datetime
-    __delta: List[VersioningAction]
+    __actions_count: int
 
     def __init__(self, stub_path: Path) -> None:
         super().__init__(stub_path)
@@ -38,7 +43,7 @@ class FetchDeltaTask(DetachedEditingTask):
 
         self.__target = -1
         self.__timestamp = datetime.now()
-        self.__delta = []
+        self.__actions_count = 0
 
     @property
     def target(self) -> int:
@@ -49,8 +54,8 @@ class FetchDeltaTask(DetachedEditingTask):
         return self.__timestamp
 
     @property
-    def delta(self) -> List[VersioningAction]:
-        return self.__delta
+    def has_delta(self) -> bool:
+        return self.__actions_count > 0
 
     def run(self) -> bool:
         if not super().run():
@@ -89,29 +94,51 @@ class FetchDeltaTask(DetachedEditingTask):
                 )
                 raise error
 
-            if check_result is None:
-                self.__delta = []
+            staging = DeltaStaging(self._container_path, self._metadata)
+            state = staging.state
+
+            if check_result is None and state is None:
                 return True
 
-            self._check_compatibility(check_result)
+            if check_result is not None:
+                self._check_compatibility(check_result)
 
-            self.__target = check_result["target"]
-            self.__timestamp = datetime.fromisoformat(check_result["tstamp"])
-            fetch_url = check_result["fetch"]
+            if state is None:
+                assert check_result is not None
+                staging.begin(
+                    check_result["target"],
+                    datetime.fromisoformat(check_result["tstamp"]),
+                    check_result["fetch"],
+                )
+                state = staging.state
+                assert state is not None
+            else:
+                # Staged delta should be finished before fetching new one
+                logger.debug(
+                    f"Resume staged changes up to version {state.target}"
+                )
+
+            self.__target = state.target
+            self.__timestamp = state.timestamp
 
             serializer = ActionSerializer(self._metadata)
-            actions = serializer.from_json(ngw_connection.get(fetch_url))
+            next_url = state.next_url
+            while next_url is not None:
+                actions = serializer.from_json(ngw_connection.get(next_url))
 
-            while len(actions) > 0:
-                self.__delta.extend(actions)
+                next_url = None
+                if len(actions) > 0:
+                    continue_action = actions[-1]
+                    assert isinstance(continue_action, ContinueAction)
+                    next_url = continue_action.url
 
-                continue_action = actions[-1]
-                assert isinstance(continue_action, ContinueAction)
-                actions = serializer.from_json(
-                    ngw_connection.get(continue_action.url)
-                )
+                staging.append_page(actions, next_url)
+
+            self.__actions_count = staging.actions_count
+            if self.__actions_count == 0:
+                staging.clear()
 
-            logger.debug(f"Fetched {len(self.__delta)} actions")
+            logger.debug(f"Fetched {self.__actions_count} actions")
 
         except SynchronizationError as error:
             self._error = error
@@ -1,13 +1,19 @@
-from contextlib import closing
+from datetime import datetime
 from pathlib import Path
 
 from nextgis_connect.detached_editing.action_applier import ActionApplier
 from nextgis_connect.detached_editing.action_serializer import ActionSerializer
+from nextgis_connect.detached_editing.actions import (
+    ContinueAction,
+    FeatureAction,
+    FeatureCreateAction,
+)
+from nextgis_connect.detached_editing.delta_staging import DeltaStaging
 from nextgis_connect.detached_editing.tasks.detached_editing_task import (
     DetachedEditingTask,
 )
 from nextgis_connect.detached_editing.utils import (
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.exceptions import SynchronizationError
 from nextgis_connect.logging import logger
@@ -15,6 +21,14 @@ from nextgis_connect.ngw_api.qgis.qgis_ngw_connection import QgsNgwConnection
 
 
 class FillLayerWithVersioning(DetachedEditingTask):
+    """
+    Download versioned layer page by page.
+
+    Progress is checkpointed in the container after every applied page, so
+    an interrupted download continues from the last checkpoint on the next
+    synchronization.
+    """
+
     def __init__(self, stub_path: Path) -> None:
         super().__init__(stub_path)
         if self._error is not None:
@@ -38,33 +52,80 @@ class FillLayerWithVersioning(DetachedEditingTask):
             ngw_connection = QgsNgwConnection(connection_id)
 
             # Check structure etc
-            self._get_layer(ngw_connection)
+            ngw_layer = self._get_layer(ngw_connection)
 
-            check_result = ngw_connection.get(
-                f"/api/resource/{resource_id}/feature/changes/check"
-            )
-            fetch_url = check_result["fetch"]
+            staging = DeltaStaging(self._container_path, self._metadata)
+            state = staging.state
+            if state is None:
+                check_result = ngw_connection.get(
+                    f"/api/resource/{resource_id}/feature/changes/check"
+                )
+                staging.begin(
+                    check_result["target"],
+                    datetime.fromisoformat(check_result["tstamp"]),
+                    check_result["fetch"],
+                )
+                state = staging.state
+                assert state is not None
+            else:
+                logger.debug(
+                    f"Resume filling from {state.applied_count} features"
+                )
 
-            actions = []
-            fetched_actions = ngw_connection.get(fetch_url)
-            while len(fetched_actions) > 0:
-                actions.extend(fetched_actions)
-                continue_action = fetched_actions[-1]
-                assert "url" in continue_action
-                fetched_actions = ngw_connection.get(continue_action["url"])
+            features_count = max(ngw_layer.features_count, 1)
+            applied_count = state.applied_count
+            self.setProgress(min(applied_count / features_count, 1) * 100)
 
             serializer = ActionSerializer(self._metadata)
             applier = ActionApplier(self._container_path, self._metadata)
-            applier.apply(serializer.from_json(actions))
 
-            sync_date = check_result["tstamp"]
-            with closing(
-                make_connection(self._container_path)
-            ) as connection, closing(connection.cursor()) as cursor:
+            # Page of interrupted applying is fetched and applied again
+            is_recovering = state.is_applying
+
+            next_url = state.next_url
+            while next_url is not None:
+                actions = serializer.from_json(ngw_connection.get(next_url))
+
+                next_url = None
+                if len(actions) > 0:
+                    continue_action = actions[-1]
+                    assert isinstance(continue_action, ContinueAction)
+                    next_url = continue_action.url
+
+                feature_actions = [
+                    action
+                    for action in actions
+                    if isinstance(action, FeatureAction)
+                ]
+                applied_count += sum(
+                    1
+                    for action in feature_actions
+                    if isinstance(action, FeatureCreateAction)
+                )
+
+                if is_recovering:
+                    feature_actions = applier.recover(
+                        feature_actions, staging.inserted_fids
+                    )
+                    is_recovering = False
+
+                # Features are committed by the provider through its own
+                # connection, so fids of created features are stored before
+                # and checkpoint is stored after the commit. An interruption
+                # in between is repaired by recovering
+                applier.apply(
+                    feature_actions, before_commit=staging.begin_apply
+                )
+                staging.checkpoint(next_url, applied_count)
+
+                self.setProgress(min(applied_count / features_count, 1) * 100)
+
+            with container_transaction(self._container_path) as cursor:
                 cursor.execute(
-                    f"UPDATE ngw_metadata SET sync_date='{sync_date}'"
+                    "UPDATE ngw_metadata SET sync_date=?",
+                    (state.timestamp.isoformat(),),
                 )
-                connection.commit()
+                staging.clear()
 
         except SynchronizationError as error:
             self._error = error
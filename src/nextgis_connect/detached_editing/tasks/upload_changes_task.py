@@ -1,28 +1,41 @@
-from contextlib import closing
+import threading
+from copy import copy
 from datetime import datetime
-from itertools import islice
+from itertools import chain
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional
 
 from nextgis_connect.detached_editing.action_extractor import ActionExtractor
 from nextgis_connect.detached_editing.action_serializer import ActionSerializer
+from nextgis_connect.detached_editing.actions import (
+    DataChangeAction,
+    VersioningAction,
+)
 from nextgis_connect.detached_editing.tasks.detached_editing_task import (
     DetachedEditingTask,
 )
 from nextgis_connect.detached_editing.transaction_applier import (
     TransactionApplier,
 )
-from nextgis_connect.detached_editing.utils import make_connection
+from nextgis_connect.detached_editing.upload_pipeline import (
+    ActionsBatch,
+    ActionsBatcher,
+    UploadPipeline,
+)
+from nextgis_connect.detached_editing.utils import container_transaction
 from nextgis_connect.exceptions import SynchronizationError
 from nextgis_connect.logging import logger
 from nextgis_connect.ngw_api.qgis.qgis_ngw_connection import QgsNgwConnection
 
 
 class UploadChangesTask(DetachedEditingTask):
-    BATCH_SIZE = 1000
+    MAX_REQUESTS_IN_FLIGHT = 4
+
+    __thread_data: threading.local
 
     def __init__(self, container_path: Path) -> None:
         super().__init__(container_path)
+        self.__thread_data = threading.local()
         if self._error is not None:
             return
 
@@ -67,24 +80,16 @@ class UploadChangesTask(DetachedEditingTask):
             self.__upload_versioned_changes(ngw_connection)
         else:
             # Uploading
-            self.__upload_deleted(ngw_connection)
-            self.__upload_added(ngw_connection)
-            self.__upload_updated(ngw_connection)
+            self.__upload_deleted()
+            self.__upload_added()
+            self.__upload_updated()
             self.__update_sync_date()
 
-    def __upload_added(
-        self,
-        ngw_connection: QgsNgwConnection,
-    ) -> None:
+    def __upload_added(self) -> None:
         layer_metadata = self._metadata
 
         extractor = ActionExtractor(self._container_path, layer_metadata)
-        create_actions = extractor.extract_added_features()
-
-        if len(create_actions) == 0:
-            return
-
-        logger.debug(f"Found {len(create_actions)} create actions")
+        create_actions = extractor.iter_added_features()
 
         serializer = ActionSerializer(layer_metadata)
 
@@ -95,32 +100,25 @@ class UploadChangesTask(DetachedEditingTask):
         resource_id = layer_metadata.resource_id
         url = f"/api/resource/{resource_id}/feature/?geom_null=true&dt_format=iso"
 
-        iterator = iter(create_actions)
-        batch = tuple(islice(iterator, self.BATCH_SIZE))
-        while batch:
-            body = serializer.to_json(batch)
-
-            logger.debug(f"Send {len(batch)} create actions")
-
-            assigned_fids = ngw_connection.patch(url, body)
-
-            transaction_applier.apply(batch, assigned_fids)
+        def send(body: str) -> Any:
+            return self.__thread_connection().patch(url, body)
 
-            batch = tuple(islice(iterator, self.BATCH_SIZE))
+        pipeline = UploadPipeline(
+            serialize=lambda batch, _: serializer.to_json(batch),
+            send=send,
+            handle=transaction_applier.apply,
+            batcher=ActionsBatcher(),
+            max_requests=self.MAX_REQUESTS_IN_FLIGHT,
+        )
+        sent_count = pipeline.run(create_actions)
+        if sent_count > 0:
+            logger.debug(f"Uploaded {sent_count} create actions")
 
-    def __upload_deleted(
-        self,
-        ngw_connection: QgsNgwConnection,
-    ) -> None:
+    def __upload_deleted(self) -> None:
         layer_metadata = self._metadata
 
         extractor = ActionExtractor(self._container_path, layer_metadata)
-        delete_actions = extractor.extract_deleted_features()
-
-        if len(delete_actions) == 0:
-            return
-
-        logger.debug(f"Found {len(delete_actions)} delete actions")
+        delete_actions = extractor.iter_deleted_features()
 
         serializer = ActionSerializer(layer_metadata)
 
@@ -130,32 +128,25 @@ class UploadChangesTask(DetachedEditingTask):
 
         url = f"/api/resource/{layer_metadata.resource_id}/feature/"
 
-        iterator = iter(delete_actions)
-        batch = tuple(islice(iterator, self.BATCH_SIZE))
-        while batch:
-            body = serializer.to_json(batch)
-
-            logger.debug(f"Send {len(batch)} delete actions")
-
-            ngw_connection.delete(url, body)
+        def send(body: str) -> Any:
+            return self.__thread_connection().delete(url, body)
 
-            transaction_applier.apply(batch)
-
-            batch = tuple(islice(iterator, self.BATCH_SIZE))
+        pipeline = UploadPipeline(
+            serialize=lambda batch, _: serializer.to_json(batch),
+            send=send,
+            handle=lambda batch, _: transaction_applier.apply(batch),
+            batcher=ActionsBatcher(),
+            max_requests=self.MAX_REQUESTS_IN_FLIGHT,
+        )
+        sent_count = pipeline.run(delete_actions)
+        if sent_count > 0:
+            logger.debug(f"Uploaded {sent_count} delete actions")
 
-    def __upload_updated(
-        self,
-        ngw_connection: QgsNgwConnection,
-    ) -> None:
+    def __upload_updated(self) -> None:
         layer_metadata = self._metadata
 
         extractor = ActionExtractor(self._container_path, layer_metadata)
-        updated_actions = extractor.extract_updated_features()
-
-        if len(updated_actions) == 0:
-            return
-
-        logger.debug(f"Found {len(updated_actions)} update actions")
+        updated_actions = extractor.iter_updated_features()
 
         serializer = ActionSerializer(layer_metadata)
 
@@ -166,18 +157,19 @@ class UploadChangesTask(DetachedEditingTask):
         resource_id = layer_metadata.resource_id
         url = f"/api/resource/{resource_id}/feature/?geom_null=true&dt_format=iso"
 
-        iterator = iter(updated_actions)
-        batch = tuple(islice(iterator, self.BATCH_SIZE))
-        while batch:
-            body = serializer.to_json(batch)
-
-            logger.debug(f"Send {len(batch)} update actions")
+        def send(body: str) -> Any:
+            return self.__thread_connection().patch(url, body)
 
-            ngw_connection.patch(url, body)
-
-            transaction_applier.apply(batch)
-
-            batch = tuple(islice(iterator, self.BATCH_SIZE))
+        pipeline = UploadPipeline(
+            serialize=lambda batch, _: serializer.to_json(batch),
+            send=send,
+            handle=lambda batch, _: transaction_applier.apply(batch),
+            batcher=ActionsBatcher(),
+            max_requests=self.MAX_REQUESTS_IN_FLIGHT,
+        )
+        sent_count = pipeline.run(updated_actions)
+        if sent_count > 0:
+            logger.debug(f"Uploaded {sent_count} update actions")
 
     def __upload_versioned_changes(
         self,
@@ -188,9 +180,10 @@ class UploadChangesTask(DetachedEditingTask):
         resource_url = f"/api/resource/{resource_id}"
 
         extractor = ActionExtractor(self._container_path, layer_metadata)
-        actions = extractor.extract_all()
+        actions = extractor.iter_all()
 
-        if len(actions) == 0:
+        first_action = next(actions, None)
+        if first_action is None:
             return
 
         transaction_answer = connection.post(
@@ -205,38 +198,42 @@ class UploadChangesTask(DetachedEditingTask):
             f"Transaction {transaction_id} started at {transaction_start_time}"
         )
 
-        logger.debug(f"Found {len(actions)} actions")
-
         serializer = ActionSerializer(layer_metadata)
+        transaction_url = (
+            f"{resource_url}/feature/transaction/{transaction_id}"
+        )
 
-        iterator = iter(actions)
-        last_action_number = 0
-        batch = tuple(islice(iterator, self.BATCH_SIZE))
-        while batch:
-            body = serializer.to_json(batch, last_action_number)
+        def send(body: str) -> Any:
+            return self.__thread_connection().put(transaction_url, body)
 
-            logger.debug(f"Send {len(batch)} actions")
+        # Transaction result is matched with sent actions after commit, so
+        # they are kept without geometries and values
+        sent_actions: List[VersioningAction] = []
 
-            connection.put(
-                f"{resource_url}/feature/transaction/{transaction_id}",
-                body,
+        def handle(batch: ActionsBatch, _: Any) -> None:
+            sent_actions.extend(
+                self.__without_data(action) for action in batch
             )
-
-            last_action_number += len(batch)
-            batch = tuple(islice(iterator, self.BATCH_SIZE))
+            logger.debug(f"Sent {len(batch)} actions")
+
+        # Every action carries its sequence number, so transaction batches
+        # may arrive in any order
+        pipeline = UploadPipeline(
+            serialize=serializer.to_json,
+            send=send,
+            handle=handle,
+            batcher=ActionsBatcher(),
+            max_requests=self.MAX_REQUESTS_IN_FLIGHT,
+        )
+        pipeline.run(chain([first_action], actions))
 
         logger.debug(f"Commit transaction {transaction_id}")
 
         try:
-            result = connection.post(
-                f"{resource_url}/feature/transaction/{transaction_id}",
-                is_lunkwill=True,
-            )
+            result = connection.post(transaction_url, is_lunkwill=True)
         except Exception:
             logger.exception("Exception occurred while commiting transaction")
-            connection.delete(
-                f"{resource_url}/feature/transaction/{transaction_id}"
-            )
+            connection.delete(transaction_url)
             logger.debug(f"Transaction {transaction_id} disposed")
             raise
 
@@ -246,17 +243,32 @@ class UploadChangesTask(DetachedEditingTask):
             error.add_note(f"Status: {result['status']}")
             raise error
 
-        transaction_result = connection.get(
-            f"{resource_url}/feature/transaction/{transaction_id}"
-        )
+        transaction_result = connection.get(transaction_url)
 
         transaction_applier = TransactionApplier(
             self._container_path, self._metadata
         )
-        transaction_applier.apply(actions, transaction_result)
+        transaction_applier.apply(sent_actions, transaction_result)
 
         self.__update_sync_date(commit_datetime=result["committed"])
 
+    def __without_data(self, action: VersioningAction) -> VersioningAction:
+        if not isinstance(action, DataChangeAction):
+            return action
+
+        light_action = copy(action)
+        light_action.geom = None
+        light_action.fields = []
+        return light_action
+
+    def __thread_connection(self) -> QgsNgwConnection:
+        """Connection for the current request thread"""
+        connection = getattr(self.__thread_data, "connection", None)
+        if connection is None:
+            connection = QgsNgwConnection(self._metadata.connection_id)
+            self.__thread_data.connection = connection
+        return connection
+
     def __update_sync_date(
         self, *, commit_datetime: Optional[str] = None
     ) -> None:
@@ -265,8 +277,5 @@ class UploadChangesTask(DetachedEditingTask):
         else:
             sync_date = commit_datetime
 
-        with closing(
-            make_connection(self._container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(self._container_path) as cursor:
             cursor.execute(f"UPDATE ngw_metadata SET sync_date='{sync_date}'")
-            connection.commit()
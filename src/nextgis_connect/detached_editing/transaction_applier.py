@@ -1,11 +1,11 @@
-from contextlib import closing
 from pathlib import Path
 from typing import List, Optional, Sequence, cast
 
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
 from nextgis_connect.detached_editing.utils import (
     DetachedContainerMetaData,
     FeatureMetaData,
-    make_connection,
+    container_transaction,
 )
 from nextgis_connect.exceptions import SynchronizationError
 
@@ -129,11 +129,7 @@ class TransactionApplier:
     def __process_added(
         self, features_metadata: List[FeatureMetaData]
     ) -> None:
-        added_fids = ",".join(str(action.fid) for action in features_metadata)
-
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
+        with container_transaction(self.__container_path) as cursor:
             cursor.executemany(
                 "UPDATE ngw_features_metadata SET ngw_fid=? WHERE fid=?",
                 (
@@ -141,73 +137,70 @@ class TransactionApplier:
                     for feature in features_metadata
                 ),
             )
-            cursor.execute(
-                f"DELETE FROM ngw_added_features WHERE fid in ({added_fids})"
+            cursor.executemany(
+                "DELETE FROM ngw_added_features WHERE fid=?",
+                ((feature.fid,) for feature in features_metadata),
             )
 
-            connection.commit()
-
     def __process_deleted(self, actions: Sequence) -> None:
-        batch_ngw_fids = ",".join(str(action.fid) for action in actions)
-
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            cursor.executescript(
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(
+            cursor, (action.fid for action in actions)
+        ) as ngw_fids_table:
+            cursor.execute(
                 f"""
-                WITH removed_fids AS (
+                DELETE FROM ngw_removed_features
+                WHERE fid IN (
                     SELECT fid FROM ngw_features_metadata
-                        WHERE ngw_fid IN ({batch_ngw_fids})
+                    WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
                 )
-                DELETE FROM ngw_removed_features
-                    WHERE fid IN removed_fids;
+                """
+            )
+            cursor.execute(
+                f"""
                 DELETE FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({batch_ngw_fids});
+                WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
                 """
             )
-            connection.commit()
 
     def __process_restored(self, actions: Sequence) -> None:
-        batch_ngw_fids = ",".join(str(action.fid) for action in actions)
-
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            cursor.executescript(
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(
+            cursor, (action.fid for action in actions)
+        ) as ngw_fids_table:
+            cursor.execute(
                 f"""
                 DELETE FROM ngw_restored_features
                 WHERE fid IN (
                     SELECT fid FROM ngw_features_metadata
-                    WHERE ngw_fid IN ({batch_ngw_fids})
-                );
+                    WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+                )
                 """
             )
-            connection.commit()
 
     def __process_updated(
         self, features_metadata: List[FeatureMetaData]
     ) -> None:
-        ngw_fids = ",".join(
-            str(feature.ngw_fid) for feature in features_metadata
-        )
-        with closing(
-            make_connection(self.__container_path)
-        ) as connection, closing(connection.cursor()) as cursor:
-            updated_fids = ",".join(
-                str(row[0])
-                for row in cursor.execute(
-                    f"""
-                    SELECT fid FROM ngw_features_metadata
-                        WHERE ngw_fid IN ({ngw_fids});
-                    """
-                )
-            )
-            cursor.executescript(
+        with container_transaction(
+            self.__container_path
+        ) as cursor, temporary_ids_table(
+            cursor, (feature.ngw_fid for feature in features_metadata)
+        ) as ngw_fids_table:
+            updated_fids_query = f"""
+                SELECT fid FROM ngw_features_metadata
+                WHERE ngw_fid IN (SELECT id FROM {ngw_fids_table})
+            """
+            cursor.execute(
                 f"""
                 DELETE FROM ngw_updated_attributes
-                    WHERE fid in ({updated_fids});
+                WHERE fid IN ({updated_fids_query})
+                """
+            )
+            cursor.execute(
+                f"""
                 DELETE FROM ngw_updated_geometries
-                    WHERE fid in ({updated_fids});
+                WHERE fid IN ({updated_fids_query})
                 """
             )
-            connection.commit()
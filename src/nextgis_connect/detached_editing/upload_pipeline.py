@@ -0,0 +1,215 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from nextgis_connect.detached_editing.actions import VersioningAction
+from nextgis_connect.logging import logger
+from nextgis_connect.settings import NgConnectSettings
+
+ActionsBatch = Tuple[VersioningAction, ...]
+
+
+class ActionsBatcher:
+    """
+    Cuts actions into batches by payload size and server response time.
+
+    Batch is closed when estimated payload reaches the current limit or
+    when it contains max number of actions. The payload limit starts from
+    the max payload and follows the observed throughput, so slow answers
+    make next batches smaller and fast answers make them larger.
+    """
+
+    TARGET_RESPONSE_TIME: ClassVar[float] = 10.0
+    MIN_PAYLOAD: ClassVar[int] = 64 * 1024
+    ACTION_OVERHEAD: ClassVar[int] = 64
+
+    __min_size: int
+    __max_size: int
+    __max_payload: int
+    __payload_limit: int
+
+    def __init__(
+        self,
+        *,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_payload: Optional[int] = None,
+    ) -> None:
+        settings = NgConnectSettings()
+        if min_size is None:
+            min_size = settings.upload_batch_min_size
+        if max_size is None:
+            max_size = settings.upload_batch_max_size
+        if max_payload is None:
+            max_payload = settings.upload_batch_max_payload
+
+        self.__min_size = max(min_size, 1)
+        self.__max_size = max(max_size, self.__min_size)
+        self.__max_payload = max(max_payload, self.MIN_PAYLOAD)
+        self.__payload_limit = self.__max_payload
+
+    @property
+    def payload_limit(self) -> int:
+        return self.__payload_limit
+
+    def batches(
+        self, actions: Iterable[VersioningAction]
+    ) -> Iterator[ActionsBatch]:
+        """Split actions lazily. Limit changes affect next batches"""
+        batch: List[VersioningAction] = []
+        payload = 0
+        for action in actions:
+            size = self.estimate_size(action)
+            if len(batch) >= self.__min_size and (
+                len(batch) >= self.__max_size
+                or payload + size > self.__payload_limit
+            ):
+                yield tuple(batch)
+                batch = []
+                payload = 0
+
+            batch.append(action)
+            payload += size
+
+        if len(batch) > 0:
+            yield tuple(batch)
+
+    def update(self, payload_size: int, elapsed: float) -> None:
+        """Adjust payload limit by sent request"""
+        if payload_size <= 0 or elapsed <= 0:
+            return
+
+        # Payload which would be sent in target time with observed speed
+        # is mixed with the current limit to smooth out fluctuations
+        expected_payload = payload_size * self.TARGET_RESPONSE_TIME / elapsed
+        payload_limit = int((self.__payload_limit + expected_payload) / 2)
+        self.__payload_limit = min(
+            max(payload_limit, self.MIN_PAYLOAD), self.__max_payload
+        )
+
+    @classmethod
+    def estimate_size(cls, action: VersioningAction) -> int:
+        """Approximate size of serialized action in bytes"""
+        size = cls.ACTION_OVERHEAD
+        for value in vars(action).values():
+            if isinstance(value, str):
+                size += len(value)
+            elif isinstance(value, list):
+                size += sum(len(str(item)) for item in value)
+        return size
+
+
+class UploadPipeline:
+    """
+    Upload actions in batches with overlapping stages.
+
+    Batches are taken lazily from actions iterable in the calling thread,
+    serialized on a worker thread and sent by up to ``max_requests`` workers
+    simultaneously. Answers are handled in the calling thread in order of
+    batches, so container is changed by one thread only. If uploading
+    fails, answers of requests already sent are still handled, so changes
+    made on the server are not lost.
+    """
+
+    __serialize: Callable[[ActionsBatch, int], str]
+    __send: Callable[[str], Any]
+    __handle: Callable[[ActionsBatch, Any], None]
+    __batcher: ActionsBatcher
+    __max_requests: int
+
+    def __init__(
+        self,
+        *,
+        serialize: Callable[[ActionsBatch, int], str],
+        send: Callable[[str], Any],
+        handle: Callable[[ActionsBatch, Any], None],
+        batcher: ActionsBatcher,
+        max_requests: int,
+    ) -> None:
+        """
+        :param serialize: Converts batch and number of its first action to
+            request body. Called on serialization thread.
+        :param send: Sends request body. Called on request threads.
+        :param handle: Processes batch and answer. Called on calling thread.
+        :param batcher: Splits actions and receives request timings.
+        """
+        self.__serialize = serialize
+        self.__send = send
+        self.__handle = handle
+        self.__batcher = batcher
+        self.__max_requests = max(max_requests, 1)
+
+    def run(self, actions: Iterable[VersioningAction]) -> int:
+        """Upload actions and return their count"""
+        sent_count = 0
+
+        pending: Deque[Tuple[ActionsBatch, Future]] = deque()
+
+        serialization_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ngc_serialize"
+        )
+        request_executor = ThreadPoolExecutor(
+            max_workers=self.__max_requests, thread_name_prefix="ngc_upload"
+        )
+
+        try:
+            for batch in self.__batcher.batches(actions):
+                if len(pending) >= self.__max_requests:
+                    self.__handle_oldest(pending)
+
+                body_future = serialization_executor.submit(
+                    self.__serialize, batch, sent_count
+                )
+                answer_future = request_executor.submit(
+                    self.__send_serialized, body_future
+                )
+                pending.append((batch, answer_future))
+
+                sent_count += len(batch)
+
+            while len(pending) > 0:
+                self.__handle_oldest(pending)
+
+        except BaseException:
+            self.__handle_sent(pending)
+            raise
+
+        finally:
+            serialization_executor.shutdown(wait=True)
+            request_executor.shutdown(wait=True)
+
+        return sent_count
+
+    def __send_serialized(self, body_future: Future) -> Tuple[Any, int, float]:
+        body = body_future.result()
+        start_time = time.monotonic()
+        answer = self.__send(body)
+        return answer, len(body), time.monotonic() - start_time
+
+    def __handle_sent(
+        self, pending: Deque[Tuple[ActionsBatch, Future]]
+    ) -> None:
+        while len(pending) > 0:
+            try:
+                self.__handle_oldest(pending)
+            except Exception:
+                logger.exception("Answer of sent batch was not handled")
+
+    def __handle_oldest(
+        self, pending: Deque[Tuple[ActionsBatch, Future]]
+    ) -> None:
+        batch, future = pending.popleft()
+        answer, payload_size, elapsed = future.result()
+        self.__batcher.update(payload_size, elapsed)
+        self.__handle(batch, answer)
@@ -5,7 +5,7 @@ from datetime import datetime
 from enum import Enum, auto
 from functools import singledispatch
 from pathlib import Path
-from typing import Optional, Union
+from typing import ContextManager, Optional, Union
 
 from qgis.core import (
     QgsExpressionContext,
@@ -15,6 +15,12 @@ from qgis.core import (
     qgsfunction,
 )
 
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+)
+from nextgis_connect.detached_editing.metadata_cache import (
+    ContainerMetadataCache,
+)
 from nextgis_connect.exceptions import (
     ContainerError,
     ErrorCode,
@@ -129,6 +135,18 @@ def make_connection(layer: Union[QgsMapLayer, Path]) -> sqlite3.Connection:
     return connection
 
 
+def container_transaction(
+    layer: Union[QgsMapLayer, Path],
+) -> ContextManager[sqlite3.Cursor]:
+    """Cursor of a pooled container connection inside a transaction scope"""
+    pool = ContainerConnectionPool.instance()
+    return pool.transaction(container_path(layer))
+
+
+def close_container_connections(layer: Union[QgsMapLayer, Path]) -> None:
+    ContainerConnectionPool.instance().close(container_path(layer))
+
+
 def detached_layer_uri(
     path: Path, metadata: Optional[DetachedContainerMetaData] = None
 ) -> str:
@@ -160,9 +178,11 @@ def is_ngw_container(
 
     def has_metadata(layer: Union[QgsMapLayer, Path]) -> bool:
         try:
-            with closing(
-                make_connection(container_path(layer))
-            ) as connection, closing(connection.cursor()) as cursor:
+            # Arbitrary GeoPackages are probed here, so pooled connections
+            # are not used to avoid holding user files open
+            with closing(make_connection(layer)) as connection, closing(
+                connection.cursor()
+            ) as cursor:
                 cursor.execute(
                     """
                     SELECT count(name)
@@ -219,10 +239,12 @@ def _(path: Path) -> DetachedContainerMetaData:
         error.add_note(f"Path: {path}")
         raise error
 
-    with closing(make_connection(path)) as connection, closing(
-        connection.cursor()
-    ) as cursor:
-        return container_metadata(cursor)
+    # Metadata is read on every state check, so it is reloaded only after
+    # the container is changed
+    with container_transaction(path) as cursor:
+        return ContainerMetadataCache.instance().get(
+            path, cursor, container_metadata
+        )
 
 
 @container_metadata.register
@@ -333,9 +355,7 @@ def _(cursor: sqlite3.Cursor) -> DetachedContainerMetaData:
 
 
 def container_changes(path: Path) -> DetachedContainerChangesInfo:
-    with closing(make_connection(path)) as connection, closing(
-        connection.cursor()
-    ) as cursor:
+    with container_transaction(path) as cursor:
         cursor.execute(
             """
             SELECT
@@ -376,9 +396,7 @@ def ngw_feature_id(
 
     path = container_path(layer)
     try:
-        with closing(make_connection(path)) as connection, closing(
-            connection.cursor()
-        ) as cursor:
+        with container_transaction(path) as cursor:
             cursor.execute(
                 f"SELECT ngw_fid FROM ngw_features_metadata WHERE fid={fid}"
             )
@@ -411,9 +429,7 @@ def ngw_feature_description(
 
     path = container_path(layer)
     try:
-        with closing(make_connection(path)) as connection, closing(
-            connection.cursor()
-        ) as cursor:
+        with container_transaction(path) as cursor:
             cursor.execute(
                 "SELECT description FROM ngw_features_metadata"
                 f" WHERE fid={fid}"
@@ -29,7 +29,7 @@ import urllib.parse
 from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, cast
+from typing import List, Optional, Tuple, cast
 
 from qgis import utils as qgis_utils
 from qgis.core import (
@@ -66,7 +66,6 @@ from qgis.PyQt.QtCore import (
 from qgis.PyQt.QtGui import (
     QContextMenuEvent,
     QDesktopServices,
-    QIcon,
     QResizeEvent,
 )
 from qgis.PyQt.QtNetwork import QNetworkReply, QNetworkRequest
@@ -94,6 +93,7 @@ from nextgis_connect.action_style_import_or_update import (
     ActionStyleImportUpdate,
 )
 from nextgis_connect.compat import QGIS_3_32, parse_version
+from nextgis_connect.core.icon_cache import IconCache
 from nextgis_connect.dialog_choose_style import NGWLayerStyleChooserDialog
 from nextgis_connect.dialog_metadata import MetadataDialog
 from nextgis_connect.exceptions import (
@@ -217,7 +217,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         self.actionRename.triggered.connect(self.rename_ngw_resource)
 
         self.actionExport = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionExport.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionExport.svg")
+            ),
             self.tr("Add to QGIS"),
             self,
         )
@@ -227,7 +229,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             self.tr("Resource Properties…"), self
         )
         self.actionResourceProperties.setIcon(
-            QIcon(":images/themes/default/propertyicons/attributes.svg")
+            IconCache.instance().file_icon(
+                ":images/themes/default/propertyicons/attributes.svg"
+            )
         )
         self.actionResourceProperties.triggered.connect(
             self.show_properties_dialog
@@ -235,7 +239,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
 
         self.menuUpload = QMenu(self.tr("Add to Web GIS"), self)
         self.menuUpload.setIcon(
-            QIcon(os.path.join(ICONS_PATH, "mActionImport.svg"))
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionImport.svg")
+            )
         )
         self.menuUpload.menuAction().setIconVisibleInMenu(False)
 
@@ -260,7 +266,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         )
 
         self.actionUploadProjectViaImportExportMenu = QAction(
-            QIcon(str(Path(__file__).parent / "icons" / "logo.svg")),
+            IconCache.instance().file_icon(
+                str(Path(__file__).parent / "icons" / "logo.svg")
+            ),
             self.tr("Upload project to NextGIS Web"),
         )
         self.actionUploadProjectViaImportExportMenu.triggered.connect(
@@ -352,28 +360,36 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         )
 
         self.actionOpenInBrowser = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionOpenMap.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionOpenMap.svg")
+            ),
             self.tr("Display in browser"),
             self,
         )
         self.actionOpenInBrowser.triggered.connect(self.__open_in_web)
 
         self.actionRefresh = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionRefresh.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionRefresh.svg")
+            ),
             self.tr("Refresh"),
             self,
         )
         self.actionRefresh.triggered.connect(self.__action_refresh_tree)
 
         self.actionSettings = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionSettings.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionSettings.svg")
+            ),
             self.tr("Settings"),
             self,
         )
         self.actionSettings.triggered.connect(self.action_settings)
 
         self.actionHelp = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionHelp.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionHelp.svg")
+            ),
             self.tr("Help"),
             self,
         )
@@ -397,7 +413,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
 
         self.toolbuttonDownload = QToolButton()
         self.toolbuttonDownload.setIcon(
-            QIcon(os.path.join(ICONS_PATH, "mActionExport.svg"))
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionExport.svg")
+            )
         )
         self.toolbuttonDownload.setToolTip(self.tr("Add to QGIS"))
         self.toolbuttonDownload.clicked.connect(self.__download_selected)
@@ -468,12 +486,13 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             "QGISStyleAdder": self.tr("Creating style for a layer..."),
             "NGWRenameResource": self.tr("Renaming resource..."),
             "NGWUpdateVectorLayer": self.tr("Updating resource..."),
-            "NGWMissingResourceUpdater": self.tr("Downloading resources..."),
+            "NgwSubtreesFetcher": self.tr("Downloading resources..."),
             "NgwCreateVectorLayersStubs": self.tr(
                 "Processing vector layers..."
             ),
             "ResourcesDownloader": self.tr("Downloading linked resources..."),
             "NgwStylesDownloader": self.tr("Downloading styles..."),
+            "NgwAddToMapPrefetcher": self.tr("Downloading resources..."),
             "AddLayersStub": self.tr("Adding resources to QGIS..."),
             "NgwSearch": self.tr("Searching resources..."),
         }
@@ -585,6 +604,7 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             self.__onModelReleaseIndexes
         )
 
+        self.resource_model.close()
         self.resource_model.deleteLater()
 
         return super().close()
@@ -1170,13 +1190,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
                 ngw_resource.parent_id,
             )
 
-            item = index.internalPointer()
             current_ids = [
-                item.child(i)
-                .data(QNGWResourceItem.NGWResourceRole)
-                .resource_id
-                for i in range(item.childCount())
-                if isinstance(item.child(i), QNGWResourceItem)
+                child.resource_id
+                for child in self.resource_model.children_resources(index)
             ]
             if ngw_resource.resource_id not in current_ids:
                 self.resource_model.addNGWResourceToTree(index, ngw_resource)
@@ -1427,35 +1443,11 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             self.iface.layerTreeInsertionPoint(),
         )
 
-        is_success, missing_ids = adder.missing_resources()
+        # Fetch group trees, linked resources and styles, make stubs for
+        # vector layers
+        is_success, job = self.__prefetch_for_adding(adder)
         if not is_success:
             return
-
-        # Fetch group tree if group resource is selected
-        job = self.resource_model.fetch_not_expanded(missing_ids)
-        if job is not None:
-            save_command(job)
-            return
-
-        # Fetch group tree if group resource is selected
-        job = self.resource_model.fetch_missing(missing_ids)
-        if job is not None:
-            save_command(job)
-            return
-
-        # Make stubs for vector layers
-        model = self.resource_model
-        download_job = model.download_vector_layers_if_needed(indices)
-        if download_job is not None:
-            save_command(download_job)
-            return
-
-        # Fetch styles
-        is_success, styles_id = adder.missing_styles()
-        if not is_success:
-            return
-
-        job = self.resource_model.fetch_missing_styles(styles_id)
         if job is not None:
             save_command(job)
             return
@@ -2327,7 +2319,6 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         project = QgsProject.instance()
         tree_rigistry_bridge = project.layerTreeRegistryBridge()
 
-        model = self.resource_model
         command = self._queue_to_add[found_i]
 
         del self._queue_to_add[found_i]
@@ -2336,37 +2327,10 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             self.resource_model, command.ngw_indexes, command.insertion_point
         )
 
-        is_success, missing_ids = adder.missing_resources()
-        if not is_success:
-            return
-
-        # Fetch group tree if group resource is selected
-        job = self.resource_model.fetch_not_expanded(missing_ids)
-        if job is not None:
-            command.job_uuid = job.job_uuid
-            self._queue_to_add.append(command)
-            return
-
-        # Fetch group tree if group resource is selected
-        job = self.resource_model.fetch_missing(missing_ids)
-        if job is not None:
-            command.job_uuid = job.job_uuid
-            self._queue_to_add.append(command)
-            return
-
-        download_job = model.download_vector_layers_if_needed(
-            command.ngw_indexes
-        )
-        if download_job is not None:
-            command.job_uuid = download_job.job_uuid
-            self._queue_to_add.append(command)
-            return
-
-        # Fetch styles
-        is_success, styles_id = adder.missing_styles()
+        # Resources found by previous job may need more resources
+        is_success, job = self.__prefetch_for_adding(adder)
         if not is_success:
             return
-        job = self.resource_model.fetch_missing_styles(styles_id)
         if job is not None:
             command.job_uuid = job.job_uuid
             self._queue_to_add.append(command)
@@ -2390,6 +2354,30 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
 
         plugin.enable_synchronization()
 
+    def __prefetch_for_adding(
+        self, adder: NgwResourcesAdder
+    ) -> Tuple[bool, Optional[NGWResourceModelResponse]]:
+        """
+        Start one job fetching all known dependencies of resources to add.
+
+        Job is None if nothing is needed.
+        """
+        for index in adder.indices:
+            self.resource_model.fetch_pending_descendants(index)
+
+        is_success, missing_ids = adder.missing_resources()
+        if not is_success:
+            return False, None
+
+        is_success, styles_id = adder.missing_styles()
+        if not is_success:
+            return False, None
+
+        job = self.resource_model.prefetch_for_adding(
+            adder.indices, missing_ids, styles_id
+        )
+        return True, job
+
     def __on_ngstd_user_info_updated(self):
         connections_manager = NgwConnectionsManager()
         current_connection = connections_manager.current_connection
@@ -2419,7 +2407,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         export_menu = menus[0]
 
         actionUploadSelectedViaExportMenu = QAction(
-            QIcon(str(Path(__file__).parent / "icons" / "logo.svg")),
+            IconCache.instance().file_icon(
+                str(Path(__file__).parent / "icons" / "logo.svg")
+            ),
             self.tr("Upload to NextGIS Web"),
             export_menu,
         )
@@ -2466,7 +2456,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
             QToolButton.ToolButtonPopupMode.DelayedPopup
         )
         self.search_button.setIcon(
-            QIcon(os.path.join(ICONS_PATH, "mActionFilter.svg"))
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionFilter.svg")
+            )
         )
         self.search_button.setText(self.tr("Search"))
         self.search_button.setToolTip(self.tr("Search"))
@@ -2501,7 +2493,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         menu = QMenu()
 
         self.actionCreateNewGroup = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionNewFolder.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionNewFolder.svg")
+            ),
             self.tr("Create resource group"),
             self,
         )
@@ -2509,7 +2503,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
         menu.addAction(self.actionCreateNewGroup)
 
         self.actionCreateNewVectorLayer = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionNewVectorLayer.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionNewVectorLayer.svg")
+            ),
             self.tr("Create vector layer"),
             self,
         )
@@ -2520,7 +2516,9 @@ class NgConnectDock(QgsDockWidget, FORM_CLASS):
 
         text = self.tr("New NextGIS Web Vector Layer")
         self.actionCreateNgwVectorLayer = QAction(
-            QIcon(os.path.join(ICONS_PATH, "mActionNewVectorLayerNative.svg")),
+            IconCache.instance().file_icon(
+                os.path.join(ICONS_PATH, "mActionNewVectorLayerNative.svg")
+            ),
             text,
             self,
         )
@@ -366,6 +366,7 @@ class NgConnectPlugin(NgConnectInterface):
     def __unload_ng_connect_dock(self) -> None:
         self.__ng_resources_tree_dock.setVisible(False)
         self.iface.removeDockWidget(self.__ng_resources_tree_dock)
+        self.__ng_resources_tree_dock.resource_model.close()
         self.__ng_resources_tree_dock.deleteLater()
 
     def __init_ng_connect_menus(self) -> None:
@@ -1,5 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union, cast
+from typing import (
+    TYPE_CHECKING,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 from qgis.core import (
     QgsApplication,
@@ -18,7 +29,13 @@ from qgis.core import (
     QgsVectorLayer,
 )
 from qgis.gui import QgisInterface
-from qgis.PyQt.QtCore import QEventLoop, QModelIndex, QObject, QTimer
+from qgis.PyQt.QtCore import (
+    QEventLoop,
+    QModelIndex,
+    QObject,
+    QTimer,
+    pyqtSignal,
+)
 from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.utils import iface
 
@@ -96,6 +113,18 @@ VectorProviders = ("ogr", "wfs", "oapif", "postgres")
 
 
 class LayerCreatorTask(NgConnectTask):
+    """
+    Creates QGIS layers in background.
+
+    Providers of remote layers are initialized concurrently, layers are
+    collected in insertion order. Each layer is reported with layer_created
+    signal as soon as it and all previous layers are created.
+    """
+
+    MAX_PARALLEL_LAYERS: ClassVar[int] = 4
+
+    layer_created = pyqtSignal(object, object)
+
     __layers_params: Dict[InsertionId, LayerParams]
     __layers: Dict[InsertionId, QgsMapLayer]
 
@@ -111,36 +140,60 @@ class LayerCreatorTask(NgConnectTask):
     def run(self) -> bool:
         super().run()
 
-        main_thread = QgsApplication.instance().thread()
-
         count = len(self.__layers_params)
+        if count == 0:
+            return True
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_PARALLEL_LAYERS, count),
+            thread_name_prefix="ngc_layers",
+        ) as executor:
+            futures = [
+                (
+                    insertion_id,
+                    executor.submit(
+                        self.__create_layer, layer_params, i, count
+                    ),
+                )
+                for i, (insertion_id, layer_params) in enumerate(
+                    self.__layers_params.items(), start=1
+                )
+            ]
 
-        for i, (insertion_id, layer_params) in enumerate(
-            self.__layers_params.items()
-        ):
-            provider = layer_params[-1]
-            layer_name = layer_params[1]
-            counter = f"[{i + 1}/{count}] " if count > 1 else ""
+            # Each layer is taken as soon as it and all previous layers are
+            # created
+            for i, (insertion_id, future) in enumerate(futures, start=1):
+                layer = future.result()
+                self.__layers[insertion_id] = layer
+                self.layer_created.emit(insertion_id, layer)
+                self.setProgress(i * 100 / count)
 
-            logger.debug(f'{counter}Creating {provider} layer "{layer_name}"')
+        return True
 
-            if provider.lower() in VectorProviders:
-                layer = QgsVectorLayer(*layer_params)
-            else:
-                layer = QgsRasterLayer(*layer_params)
+    def __create_layer(
+        self, layer_params: LayerParams, number: int, count: int
+    ) -> QgsMapLayer:
+        provider = layer_params[-1]
+        layer_name = layer_params[1]
+        counter = f"[{number}/{count}] " if count > 1 else ""
 
-            layer.setParent(None)
-            layer.moveToThread(main_thread)
+        logger.debug(f'{counter}Creating {provider} layer "{layer_name}"')
 
-            if not layer.isValid():
-                error = layer.error().summary()
-                logger.warning(f'Layer "{layer_name}" is not valid: {error}')
+        if provider.lower() in VectorProviders:
+            layer = QgsVectorLayer(*layer_params)
+        else:
+            layer = QgsRasterLayer(*layer_params)
 
-            self.__fix_crs(layer)
+        if not layer.isValid():
+            error = layer.error().summary()
+            logger.warning(f'Layer "{layer_name}" is not valid: {error}')
 
-            self.__layers[insertion_id] = layer
+        self.__fix_crs(layer)
 
-        return True
+        layer.setParent(None)
+        layer.moveToThread(QgsApplication.instance().thread())
+
+        return layer
 
     def __fix_crs(self, layer: QgsMapLayer) -> None:
         # Workaround for NGQ-202
@@ -225,6 +278,9 @@ class NgwResourcesAdder(QObject):
 
     __layers_params: Dict[InsertionId, LayerParams]
     __layers: Dict[InsertionId, QgsMapLayer]
+    __is_creation_finished: bool
+    __has_valid_layer: bool
+    __creation_event_loop: QEventLoop
     __default_styles: Dict[QModelIndex, int]
     __skip_wfs_with_z: Optional[bool]
     __skipped_resources: Set[InsertionId]
@@ -252,6 +308,9 @@ class NgwResourcesAdder(QObject):
 
         self.__layers = {}
         self.__layers_params = {}
+        self.__is_creation_finished = True
+        self.__has_valid_layer = False
+        self.__creation_event_loop = QEventLoop(self)
         self.__default_styles = {}
         self.__skip_wfs_with_z = None
         self.__skipped_resources = set()
@@ -304,6 +363,10 @@ class NgwResourcesAdder(QObject):
 
         return (True, result)
 
+    @property
+    def indices(self) -> List[QModelIndex]:
+        return self.__indices
+
     @property
     def warnings(self) -> List[NgConnectWarning]:
         return self.__warnings
@@ -341,6 +404,7 @@ class NgwResourcesAdder(QObject):
             return False
 
         finally:
+            self.__wait_layers_creation()
             self.__insertion_stack.clear()
             self.__layers_params.clear()
             self.__layers.clear()
@@ -415,14 +479,13 @@ class NgwResourcesAdder(QObject):
 
         insertion_point = self.__insertion_stack[-1]
 
-        if index not in self.__layers:
+        layer = self.__created_layer(index)
+        if layer is None:
             logger.debug(
                 f"Layer {layer_resource.resource_id} was not added to QGIS"
             )
             raise RuntimeError
 
-        layer = self.__layers[index]
-
         layer.setName(layer_resource.display_name)
 
         # TODO: it's not obvious that default style attached to style_index
@@ -471,7 +534,8 @@ class NgwResourcesAdder(QObject):
     ) -> None:
         insertion_point = self.__insertion_stack[-1]
 
-        if id(service_layer) not in self.__layers:
+        layer = self.__created_layer(id(service_layer))
+        if layer is None:
             message = (
                 f'Layer "{service_layer.display_name}" was not added to QGIS'
             )
@@ -479,7 +543,6 @@ class NgwResourcesAdder(QObject):
                 code=ErrorCode.AddingError, log_message=message
             )
 
-        layer = self.__layers[id(service_layer)]
         layer.setName(service_layer.display_name)
 
         if isinstance(layer, QgsVectorLayer):
@@ -563,7 +626,8 @@ class NgwResourcesAdder(QObject):
         ):
             return
 
-        if id(webmap_layer) not in self.__layers:
+        layer = self.__created_layer(id(webmap_layer))
+        if layer is None:
             message = (
                 f'Layer "{webmap_layer.display_name}" was not added to QGIS'
             )
@@ -573,7 +637,6 @@ class NgwResourcesAdder(QObject):
 
         insertion_point = self.__insertion_stack[-1]
 
-        layer = self.__layers[id(webmap_layer)]
         layer.setName(webmap_layer.display_name)
 
         style_resource = self.__model.resource(webmap_layer.layer_style_id)
@@ -613,7 +676,13 @@ class NgwResourcesAdder(QObject):
             if basemap.resource_id in self.__skipped_resources:
                 continue
 
-            basemap_layer = self.__layers[id(basemap)]
+            basemap_layer = self.__created_layer(id(basemap))
+            if basemap_layer is None:
+                message = f'Basemap "{basemap.display_name}" was not created'
+                raise NgConnectError(
+                    code=ErrorCode.AddingError, log_message=message
+                )
+
             basemap_layer.setName(basemap.display_name)
 
             basemap_layer.setCustomProperty(
@@ -1004,9 +1073,23 @@ class NgwResourcesAdder(QObject):
             Path(cache_manager.cache_directory) / connection.domain_uuid
         )
 
-        uri = detached_layer_uri(
-            connection_path / f"{vector_layer.resource_id}.gpkg"
-        )
+        container_path = connection_path / f"{vector_layer.resource_id}.gpkg"
+
+        # Container creation failed, other layers are added anyway
+        if not container_path.exists():
+            self.__skipped_resources.add(vector_layer.resource_id)
+
+            user_message = self.tr(
+                f'Layer "{vector_layer.display_name}" was not added to the map'
+            )
+            detail = self.tr("Failed to download layer. See logs for details.")
+            self.__warnings.append(
+                NgConnectWarning(user_message=user_message, detail=detail)
+            )
+            logger.warning(user_message)
+            return ("", "", "")
+
+        uri = detached_layer_uri(container_path)
 
         return (uri, vector_layer.display_name, "ogr")
 
@@ -1065,25 +1148,50 @@ class NgwResourcesAdder(QObject):
         if len(self.__layers_params) == 0:
             return
 
+        # Layers are added to the map as soon as they are created
         task = LayerCreatorTask(self.__layers_params)
-
-        event_loop = QEventLoop()
-        task.taskCompleted.connect(event_loop.exit)
-        task.taskTerminated.connect(event_loop.exit)
+        task.layer_created.connect(self.__on_layer_created)
+        task.taskCompleted.connect(self.__on_layers_creation_finished)
+        task.taskTerminated.connect(self.__on_layers_creation_finished)
+        self.__is_creation_finished = False
         NgConnectInterface.instance().task_manager.addTask(task)
-        event_loop.exec()
 
-        self.__layers = task.layers
+    def __on_layer_created(
+        self, insertion_id: InsertionId, layer: QgsMapLayer
+    ) -> None:
+        self.__layers[insertion_id] = layer
+        self.__has_valid_layer = self.__has_valid_layer or layer.isValid()
+        self.__creation_event_loop.exit()
+
+    def __on_layers_creation_finished(self) -> None:
+        self.__is_creation_finished = True
+        self.__creation_event_loop.exit()
+
+    def __created_layer(
+        self, insertion_id: InsertionId
+    ) -> Optional[QgsMapLayer]:
+        """Wait for the layer creation and register it in the project"""
+        # Invalid layers are not added while no valid layer is created
+        while not self.__is_creation_finished and (
+            insertion_id not in self.__layers or not self.__has_valid_layer
+        ):
+            self.__creation_event_loop.exec()
 
-        if all(not layer.isValid() for layer in self.__layers.values()):
+        if not self.__has_valid_layer:
             message = "All layers are invalid"
             raise NgConnectError(
                 code=ErrorCode.AddingError, log_message=message
             )
 
-        QgsProject.instance().addMapLayers(
-            self.__layers.values(), addToLegend=False
-        )
+        layer = self.__layers.get(insertion_id)
+        if layer is not None and self.__project.mapLayer(layer.id()) is None:
+            self.__project.addMapLayer(layer, addToLegend=False)
+
+        return layer
+
+    def __wait_layers_creation(self) -> None:
+        while not self.__is_creation_finished:
+            self.__creation_event_loop.exec()
 
     def __add_fields_aliases(
         self,
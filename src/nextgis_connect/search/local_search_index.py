@@ -0,0 +1,220 @@
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple
+
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
+from nextgis_connect.ngw_connection import NgwConnectionsManager
+from nextgis_connect.settings.ng_connect_cache_manager import (
+    NgConnectCacheManager,
+)
+
+ResourceJson = Dict[str, Any]
+
+
+class LocalSearchIndex:
+    """
+    Full-text index of resources fetched from NGW instance.
+
+    Display names, keynames, types, owners and metadata of resources are
+    indexed with SQLite FTS5 in the instance subdirectory of the plugin
+    cache, so already known resources are found without requests. Resources
+    are partitioned by connection, since different users see different
+    resources.
+    """
+
+    FILE_NAME: ClassVar[str] = "resources_index.sqlite"
+    MAX_RESULTS: ClassVar[int] = 1000
+
+    # bm25 weights of connection_id, resource_id, display_name, keyname,
+    # cls, owner and metadata columns
+    RANK_WEIGHTS: ClassVar[str] = "0, 0, 10.0, 5.0, 1.0, 1.0, 2.0"
+
+    __is_fts5_supported: ClassVar[Optional[bool]] = None
+
+    __path: Path
+    __connection_id: str
+
+    def __init__(self, path: Path, connection_id: str) -> None:
+        self.__path = path
+        self.__connection_id = connection_id
+
+    @classmethod
+    def for_connection(
+        cls, connection_id: str
+    ) -> Optional["LocalSearchIndex"]:
+        if not cls.is_supported():
+            return None
+
+        connection = NgwConnectionsManager().connection(connection_id)
+        if connection is None:
+            return None
+
+        cache_directory = Path(NgConnectCacheManager().cache_directory)
+        instance_cache_path = cache_directory / connection.domain_uuid
+        instance_cache_path.mkdir(parents=True, exist_ok=True)
+        return cls(instance_cache_path / cls.FILE_NAME, connection_id)
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """Check if SQLite is built with FTS5"""
+        if cls.__is_fts5_supported is None:
+            with closing(sqlite3.connect(":memory:")) as connection:
+                try:
+                    connection.execute("CREATE VIRTUAL TABLE t USING fts5(a)")
+                    cls.__is_fts5_supported = True
+                except sqlite3.OperationalError:
+                    cls.__is_fts5_supported = False
+        return cls.__is_fts5_supported
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @staticmethod
+    def match_expression(
+        search_string: str, is_strict: bool = True
+    ) -> Optional[str]:
+        """
+        Build FTS5 query from user search string.
+
+        Quoted string is matched as a phrase in display names. Otherwise
+        each word is matched as a prefix in any column. Non-strict query
+        matches any of the words.
+        """
+        search_string = search_string.strip()
+        is_phrase = (
+            len(search_string) > 1
+            and search_string.startswith('"')
+            and search_string.endswith('"')
+        )
+        words = re.findall(r"\w+", search_string)
+        if len(words) == 0:
+            return None
+
+        if is_phrase:
+            return f'display_name : "{" ".join(words)}"'
+
+        operator = " AND " if is_strict else " OR "
+        return operator.join(f'"{word}"*' for word in words)
+
+    def search(self, search_string: str) -> List[int]:
+        """
+        Find resources ranked by relevance.
+
+        If no resource matches all words, resources matching any of them
+        are returned.
+        """
+        for is_strict in (True, False):
+            expression = self.match_expression(search_string, is_strict)
+            if expression is None:
+                return []
+
+            with closing(self.__connect()) as connection:
+                rows = connection.execute(
+                    f"""
+                    SELECT resource_id FROM ngw_resources_index
+                    WHERE ngw_resources_index MATCH :expression
+                        AND connection_id = :connection_id
+                    ORDER BY bm25(ngw_resources_index, {self.RANK_WEIGHTS})
+                    LIMIT :limit
+                    """,
+                    {
+                        "expression": expression,
+                        "connection_id": self.__connection_id,
+                        "limit": self.MAX_RESULTS,
+                    },
+                ).fetchall()
+
+            if len(rows) > 0:
+                return [row[0] for row in rows]
+
+        return []
+
+    def add(self, resources_json: List[ResourceJson]) -> None:
+        """Index new resources or reindex changed ones"""
+        if len(resources_json) == 0:
+            return
+
+        with closing(self.__connect()) as connection, connection:
+            cursor = connection.cursor()
+            self.__delete(
+                cursor,
+                (
+                    resource_json["resource"]["id"]
+                    for resource_json in resources_json
+                ),
+            )
+            cursor.executemany(
+                """
+                INSERT INTO ngw_resources_index (
+                    connection_id, resource_id, display_name, keyname, cls,
+                    owner, metadata
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    self.__row(resource_json)
+                    for resource_json in resources_json
+                ),
+            )
+
+    def remove(self, resources_id: Iterable[int]) -> None:
+        with closing(self.__connect()) as connection, connection:
+            self.__delete(connection.cursor(), resources_id)
+
+    def clear(self) -> None:
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM ngw_resources_index WHERE connection_id = ?",
+                (self.__connection_id,),
+            )
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.__path))
+        connection.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS ngw_resources_index USING fts5(
+                connection_id UNINDEXED,
+                resource_id UNINDEXED,
+                display_name,
+                keyname,
+                cls,
+                owner,
+                metadata,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        return connection
+
+    def __delete(
+        self, cursor: sqlite3.Cursor, resources_id: Iterable[int]
+    ) -> None:
+        with temporary_ids_table(cursor, resources_id) as ids_table:
+            cursor.execute(
+                f"""
+                DELETE FROM ngw_resources_index
+                WHERE connection_id = ?
+                    AND resource_id IN (SELECT id FROM {ids_table})
+                """,
+                (self.__connection_id,),
+            )
+
+    def __row(self, resource_json: ResourceJson) -> Tuple[Any, ...]:
+        resource = resource_json["resource"]
+        owner = resource.get("owner_user") or {}
+        metadata_items = (resource_json.get("resmeta") or {}).get("items", {})
+        metadata = " ".join(
+            f"{key} {value}" for key, value in metadata_items.items()
+        )
+        return (
+            self.__connection_id,
+            resource["id"],
+            resource.get("display_name") or "",
+            resource.get("keyname") or "",
+            resource.get("cls") or "",
+            str(owner.get("id", "")),
+            metadata,
+        )
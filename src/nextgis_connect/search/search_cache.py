@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+ResourceJson = Dict[str, Any]
+CacheKey = Tuple[str, str]
+
+DISPLAY_NAME_ILIKE = "display_name__ilike"
+ILIKE_WILDCARDS = ("%", "_", "\\")
+
+
+@dataclass
+class _CacheEntry:
+    resources: List[ResourceJson]
+    expires_at: float
+
+
+class SearchCache:
+    """
+    LRU cache of resources search results with limited lifetime.
+
+    Results are stored by connection and normalized search query. Results
+    of display name patterns which are not cached yet are refined from
+    cached results of shorter patterns, so typing doesn't send a request on
+    every keystroke.
+    """
+
+    MAX_ENTRIES: ClassVar[int] = 128
+    TTL: ClassVar[float] = 300.0  # seconds
+
+    __instance: ClassVar[Optional["SearchCache"]] = None
+    __instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    __lock: threading.Lock
+    __entries: "OrderedDict[CacheKey, _CacheEntry]"
+    __max_entries: int
+    __ttl: float
+    __clock: Callable[[], float]
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__max_entries = (
+            max_entries if max_entries is not None else self.MAX_ENTRIES
+        )
+        self.__ttl = ttl if ttl is not None else self.TTL
+        self.__clock = clock
+
+    @classmethod
+    def instance(cls) -> "SearchCache":
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls()
+            return cls.__instance
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize search query string.
+
+        Parameters are sorted, serialization parameter is skipped and
+        case-insensitive patterns are lowercased.
+        """
+        parameters = [
+            (name, value.lower() if name.endswith("__ilike") else value)
+            for name, value in parse_qsl(query, keep_blank_values=True)
+            if name != "serialization"
+        ]
+        return urlencode(sorted(parameters))
+
+    def get(
+        self, connection_id: str, query: str
+    ) -> Optional[List[ResourceJson]]:
+        """Cached or refined results of query. None if there are no ones"""
+        normalized_query = self.normalize_query(query)
+        with self.__lock:
+            resources = self.__get((connection_id, normalized_query))
+            if resources is None:
+                resources = self.__refine(connection_id, normalized_query)
+        return resources
+
+    def put(
+        self, connection_id: str, query: str, resources: List[ResourceJson]
+    ) -> None:
+        with self.__lock:
+            self.__put((connection_id, self.normalize_query(query)), resources)
+
+    def invalidate(self, connection_id: Optional[str] = None) -> None:
+        """Forget results of connection or all results"""
+        with self.__lock:
+            if connection_id is None:
+                self.__entries.clear()
+                return
+
+            for key in list(self.__entries.keys()):
+                if key[0] == connection_id:
+                    del self.__entries[key]
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+    def __get(self, key: CacheKey) -> Optional[List[ResourceJson]]:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= self.__clock():
+            del self.__entries[key]
+            return None
+
+        self.__entries.move_to_end(key)
+        return entry.resources
+
+    def __put(self, key: CacheKey, resources: List[ResourceJson]) -> None:
+        self.__entries[key] = _CacheEntry(
+            list(resources), self.__clock() + self.__ttl
+        )
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    def __refine(
+        self, connection_id: str, normalized_query: str
+    ) -> Optional[List[ResourceJson]]:
+        """
+        Filter cached results of shorter display name pattern.
+
+        Only "text%" and "%text%" patterns without other wildcards are
+        refined.
+        """
+        parameters = parse_qsl(normalized_query, keep_blank_values=True)
+        if len(parameters) != 1 or parameters[0][0] != DISPLAY_NAME_ILIKE:
+            return None
+
+        pattern = parameters[0][1]
+        is_contains = pattern.startswith("%")
+        text = pattern[1:-1] if is_contains else pattern[:-1]
+        if not pattern.endswith("%") or any(
+            wildcard in text for wildcard in ILIKE_WILDCARDS
+        ):
+            return None
+
+        for length in range(len(text) - 1, 0, -1):
+            patterns = [f"%{text[:length]}%"]
+            if not is_contains:
+                patterns.insert(0, f"{text[:length]}%")
+
+            for shorter_pattern in patterns:
+                key = (
+                    connection_id,
+                    urlencode([(DISPLAY_NAME_ILIKE, shorter_pattern)]),
+                )
+                cached_resources = self.__get(key)
+                if cached_resources is None:
+                    continue
+
+                resources = [
+                    resource
+                    for resource in cached_resources
+                    if self.__is_matched(
+                        resource["resource"]["display_name"],
+                        text,
+                        is_contains,
+                    )
+                ]
+                self.__put((connection_id, normalized_query), resources)
+                return resources
+
+        return None
+
+    @staticmethod
+    def __is_matched(display_name: str, text: str, is_contains: bool) -> bool:
+        display_name = display_name.lower()
+        if is_contains:
+            return text in display_name
+        return display_name.startswith(text)
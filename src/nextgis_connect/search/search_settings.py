@@ -31,6 +31,17 @@ class SearchSettings:
     def last_used_type(self, value: SearchType) -> None:
         self.__settings.setValue(self.__group + "/lastUsedType", str(value))
 
+    @property
+    def is_local_index_enabled(self) -> bool:
+        """Search fetched resources in local index before server"""
+        return self.__settings.value(
+            self.__group + "/localIndex", defaultValue=True, type=bool
+        )
+
+    @is_local_index_enabled.setter
+    def is_local_index_enabled(self, value: bool) -> None:
+        self.__settings.setValue(self.__group + "/localIndex", value)
+
     @property
     def text_queries_history(self) -> List[str]:
         return self.__settings.value(self.__group + "/queries/text", [])
@@ -1,5 +1,6 @@
 import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from urllib.parse import quote_plus
 
 from qgis.core import QgsNetworkAccessManager
 from qgis.PyQt.QtCore import (
@@ -16,6 +17,7 @@ from nextgis_connect.logging import logger
 from nextgis_connect.ngw_connection.ngw_connections_manager import (
     NgwConnectionsManager,
 )
+from nextgis_connect.search.search_cache import ResourceJson, SearchCache
 from nextgis_connect.search.search_settings import SearchSettings
 
 
@@ -28,6 +30,7 @@ class TextSearchCompleterModel(QStringListModel):
     __bouncing_timer: QTimer
     __network_manager: Optional[QgsNetworkAccessManager]
     __suggestions_network_reply: Optional[QNetworkReply]
+    __suggestions_request: Optional[Tuple[str, str]]
 
     __prefix: str
     __history_suggestions: List[str]
@@ -47,6 +50,7 @@ class TextSearchCompleterModel(QStringListModel):
         # Network manager and reply for handling network requests
         self.__network_manager = None
         self.__suggestions_network_reply = None
+        self.__suggestions_request = None
 
         # Prefix string for the search
         self.__prefix = ""
@@ -133,12 +137,22 @@ class TextSearchCompleterModel(QStringListModel):
         ):
             return
 
+        query = f"display_name__ilike={quote_plus(search_string + '%')}"
+
+        cached_resources = SearchCache.instance().get(
+            self.__connection_id, query
+        )
+        if cached_resources is not None:
+            logger.debug(f"Cached suggestions are used for: {search_string}")
+            self.__set_search_suggestions(cached_resources)
+            return
+
         connections_manager = NgwConnectionsManager()
         connection = connections_manager.connection(self.__connection_id)
         assert connection is not None
 
-        query = f"display_name__ilike={search_string}%&serialization=resource"
         search_url = f"/api/resource/search/?{query}&serialization=resource"
+        self.__suggestions_request = (self.__connection_id, query)
 
         # Setup network request to fetch suggestions
         request = QNetworkRequest(QUrl(connection.url + search_url))
@@ -172,14 +186,23 @@ class TextSearchCompleterModel(QStringListModel):
         results = json.loads(
             self.__suggestions_network_reply.readAll().data().decode()
         )
-        display_names = list(
-            set(resource["resource"]["display_name"] for resource in results)
-        )
 
         self.__suggestions_network_reply.close()
         self.__suggestions_network_reply.deleteLater()
         self.__suggestions_network_reply = None
 
+        if self.__suggestions_request is not None:
+            connection_id, query = self.__suggestions_request
+            SearchCache.instance().put(connection_id, query, results)
+            self.__suggestions_request = None
+
+        self.__set_search_suggestions(results)
+
+    def __set_search_suggestions(self, results: List[ResourceJson]) -> None:
+        display_names = list(
+            set(resource["resource"]["display_name"] for resource in results)
+        )
+
         logger.debug(f"Fetched suggestions: {display_names}")
 
         # Update the search suggestions and combine them with history
@@ -6,6 +6,9 @@ from typing import List, Optional, Tuple, Union
 
 from qgis.core import QgsProject
 
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+)
 from nextgis_connect.detached_editing.utils import (
     container_metadata,
     container_path,
@@ -42,6 +45,7 @@ class NgConnectCacheManager:
 
         old_cache_directory = Path(old_value)
         new_cache_directory = Path(new_value)
+        ContainerConnectionPool.instance().close_all()
         shutil.copytree(
             old_cache_directory, new_cache_directory, dirs_exist_ok=True
         )
@@ -109,6 +113,7 @@ class NgConnectCacheManager:
         logger = logging.getLogger(NgConnectInterface.PLUGIN_NAME)
 
         try:
+            ContainerConnectionPool.instance().close_all()
             shutil.rmtree(cache_path)
         except Exception:
             logger.debug("Cache clearing error")
@@ -180,6 +185,7 @@ class NgConnectCacheManager:
                     continue
 
                 try:
+                    ContainerConnectionPool.instance().close(file_path)
                     file_path.unlink()
                     cache_size -= file_size
                 except Exception:
@@ -266,6 +266,145 @@ class NgConnectSettings:
             value.total_seconds(),
         )
 
+    @property
+    def synchronization_max_parallel(self) -> int:
+        """Max number of simultaneously synchronized layers"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/maxParallel",
+            defaultValue=4,
+            type=int,
+        )
+
+    @synchronization_max_parallel.setter
+    def synchronization_max_parallel(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/maxParallel", value
+        )
+
+    @property
+    def synchronization_max_parallel_per_connection(self) -> int:
+        """Max number of simultaneously synchronized layers of one NGW"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/maxParallelPerConnection",
+            defaultValue=2,
+            type=int,
+        )
+
+    @synchronization_max_parallel_per_connection.setter
+    def synchronization_max_parallel_per_connection(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/maxParallelPerConnection",
+            value,
+        )
+
+    @property
+    def upload_batch_min_size(self) -> int:
+        """Min number of actions in one uploading request"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/uploadBatchMinSize",
+            defaultValue=1,
+            type=int,
+        )
+
+    @upload_batch_min_size.setter
+    def upload_batch_min_size(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/uploadBatchMinSize", value
+        )
+
+    @property
+    def upload_batch_max_size(self) -> int:
+        """Max number of actions in one uploading request"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/uploadBatchMaxSize",
+            defaultValue=10000,
+            type=int,
+        )
+
+    @upload_batch_max_size.setter
+    def upload_batch_max_size(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/uploadBatchMaxSize", value
+        )
+
+    @property
+    def upload_batch_max_payload(self) -> int:
+        """Max size of one uploading request body in bytes"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/uploadBatchMaxPayload",
+            defaultValue=16 * 1024 * 1024,
+            type=int,
+        )
+
+    @upload_batch_max_payload.setter
+    def upload_batch_max_payload(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/uploadBatchMaxPayload",
+            value,
+        )
+
+    @property
+    def container_synchronous(self) -> str:
+        """SQLite synchronous mode of container connections"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/containerSynchronous",
+            defaultValue="NORMAL",
+            type=str,
+        )
+
+    @container_synchronous.setter
+    def container_synchronous(self, value: str) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/containerSynchronous",
+            value,
+        )
+
+    @property
+    def container_cache_size(self) -> int:
+        """SQLite page cache size of container connections, KiB if negative"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/containerCacheSize",
+            defaultValue=-16 * 1024,
+            type=int,
+        )
+
+    @container_cache_size.setter
+    def container_cache_size(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/containerCacheSize", value
+        )
+
+    @property
+    def container_mmap_size(self) -> int:
+        """Size of memory-mapped I/O of container connections in bytes"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/containerMmapSize",
+            defaultValue=64 * 1024 * 1024,
+            type=int,
+        )
+
+    @container_mmap_size.setter
+    def container_mmap_size(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/containerMmapSize", value
+        )
+
+    @property
+    def container_busy_timeout(self) -> int:
+        """Timeout of waiting for locked container in milliseconds"""
+        return self.__settings.value(
+            self.__plugin_group + "/synchronization/containerBusyTimeout",
+            defaultValue=5000,
+            type=int,
+        )
+
+    @container_busy_timeout.setter
+    def container_busy_timeout(self, value: int) -> None:
+        self.__settings.setValue(
+            self.__plugin_group + "/synchronization/containerBusyTimeout",
+            value,
+        )
+
     @property
     def did_last_launch_fail(self) -> bool:
         value = self.__settings.value(
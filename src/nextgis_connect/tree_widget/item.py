@@ -1,10 +1,10 @@
-from typing import cast
+from typing import Dict, List, Optional, Tuple, cast
 from urllib.parse import urlparse
 
 from qgis.PyQt.QtCore import Qt, QVariant
-from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QTreeWidgetItem
 
+from nextgis_connect.core.icon_cache import IconCache
 from nextgis_connect.ngw_api.core import (
     NGWGroupResource,
     NGWResource,
@@ -23,6 +23,9 @@ class QModelItem(QTreeWidgetItem):
         self._locked = False
         self.unlock()
 
+        # Child rows by child item id. Built lazily and reset on changes
+        self._children_rows: Optional[Dict[int, int]] = None
+
     def lock(self):
         self._locked = True
         # self.setFlags(Qt.NoItemFlags)
@@ -38,6 +41,45 @@ class QModelItem(QTreeWidgetItem):
             # self.removeChild(self.locked_item)
             self._locked = False
 
+    def insertChild(self, index: int, child: QTreeWidgetItem) -> None:
+        super().insertChild(index, child)
+        self._children_rows = None
+
+    def addChild(self, child: QTreeWidgetItem) -> None:
+        super().addChild(child)
+        self._children_rows = None
+
+    def addChildren(self, children: List[QTreeWidgetItem]) -> None:
+        super().addChildren(children)
+        self._children_rows = None
+
+    def insertChildren(
+        self, index: int, children: List[QTreeWidgetItem]
+    ) -> None:
+        super().insertChildren(index, children)
+        self._children_rows = None
+
+    def removeChild(self, child: QTreeWidgetItem) -> None:
+        super().removeChild(child)
+        self._children_rows = None
+
+    def takeChild(self, index: int) -> QTreeWidgetItem:
+        child = super().takeChild(index)
+        self._children_rows = None
+        return child
+
+    def takeChildren(self) -> List[QTreeWidgetItem]:
+        children = super().takeChildren()
+        self._children_rows = None
+        return children
+
+    def indexOfChild(self, child: QTreeWidgetItem) -> int:
+        if self._children_rows is None:
+            self._children_rows = {
+                id(self.child(row)): row for row in range(self.childCount())
+            }
+        return self._children_rows.get(id(child), -1)
+
     def flags(self) -> Qt.ItemFlags:
         if self._locked:
             return Qt.ItemFlags() | Qt.ItemFlag.NoItemFlags
@@ -73,13 +115,12 @@ class QNGWResourceItem(QModelItem):
 
         self._title = title
         self._ngw_resource = ngw_resource
-        self._icon = QIcon(self._ngw_resource.icon_path)
 
     def data(self, role):
         if role == Qt.ItemDataRole.DisplayRole:
             return self._title
         if role == Qt.ItemDataRole.DecorationRole:
-            return self._icon
+            return IconCache.instance().file_icon(self._ngw_resource.icon_path)
         if role == Qt.ItemDataRole.ToolTipRole and self.ngw_resource_id() == 0:
             return self._ngw_resource.connection.server_url
         if role == QNGWResourceItem.NGWResourceRole:
@@ -95,11 +136,20 @@ class QNGWResourceItem(QModelItem):
         ngw_resource = cast(NGWResource, self.data(self.NGWResourceRole))
         return ngw_resource.type_id == NGWGroupResource.type_id
 
+    def sort_key(self) -> Tuple[bool, str]:
+        """Groups go first, then resources are sorted by title"""
+        return not self.is_group(), self._title.lower()
+
+    @staticmethod
+    def resource_sort_key(ngw_resource: NGWResource) -> Tuple[bool, str]:
+        """Sort key of item for resource without creating the item"""
+        return (
+            ngw_resource.type_id != NGWGroupResource.type_id,
+            ngw_resource.display_name.lower(),
+        )
+
     def more_priority(self, item):
         if not isinstance(item, QNGWResourceItem):
             return True
 
-        if self.is_group() != item.is_group():
-            return self.is_group() > item.is_group()
-
-        return self._title.lower() < item._title.lower()
+        return self.sort_key() < item.sort_key()
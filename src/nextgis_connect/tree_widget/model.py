@@ -1,13 +1,17 @@
 import functools
 import itertools
 import re
+import threading
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 from typing import (
     Any,
     Callable,
     ClassVar,
+    Deque,
     Dict,
     List,
     Optional,
@@ -24,6 +28,7 @@ from qgis.PyQt.QtCore import (
     QObject,
     Qt,
     QThread,
+    QTimer,
     QVariant,
     pyqtSignal,
 )
@@ -64,7 +69,6 @@ from nextgis_connect.ngw_api.qt.qt_ngw_resource_model_job import (
     NGWCreateVectorLayer,
     NGWCreateWfsService,
     NGWGroupCreater,
-    NGWMissingResourceUpdater,
     NGWRenameResource,
     NGWResourceDelete,
     NGWResourceModelJob,
@@ -77,11 +81,15 @@ from nextgis_connect.ngw_api.qt.qt_ngw_resource_model_job_error import (
     NGWResourceModelJobError,
 )
 from nextgis_connect.ngw_connection import NgwConnectionsManager
+from nextgis_connect.search.local_search_index import LocalSearchIndex
+from nextgis_connect.search.search_cache import SearchCache
 from nextgis_connect.settings.ng_connect_cache_manager import (
     NgConnectCacheManager,
 )
+from nextgis_connect.settings.ng_connect_settings import NgConnectSettings
 
 from .item import QModelItem, QNGWResourceItem
+from .resources_cache import ResourcesTreeCache
 
 __all__ = ["QNGWResourceTreeModel"]
 
@@ -192,9 +200,25 @@ class NGWResourcesModelJob(QObject):
 
 
 class NgwCreateVectorLayersStubs(NGWResourceModelJob):
+    """
+    Creates initial containers for vector layers.
+
+    Actual layers metadata is fetched with one search request per batch on
+    new NGW versions. Containers are created concurrently and a failed layer
+    doesn't prevent containers of other layers from being created. Failed
+    layers are reported with layers_failed signal, job fails only if no
+    container was created.
+    """
+
+    METADATA_BATCH_SIZE: ClassVar[int] = 100
+    MAX_PARALLEL_CONTAINERS: ClassVar[int] = 4
+
+    layers_failed = pyqtSignal(list)
+
     def __init__(
         self,
         ngw_resources: Union[NGWVectorLayer, List[NGWVectorLayer]],
+        is_new_api: bool = False,
     ) -> None:
         super().__init__()
         if isinstance(ngw_resources, list):
@@ -202,39 +226,324 @@ class NgwCreateVectorLayersStubs(NGWResourceModelJob):
         else:
             self.ngw_resources = [ngw_resources]
             self.result.main_resource_id = ngw_resources.resource_id
+        self.is_new_api = is_new_api
+        self.__thread_data = threading.local()
+
+    def _do(self):
+        if len(self.ngw_resources) == 0:
+            return
+
+        # The same layer can be requested from a group and from a web map
+        ngw_resources = list(
+            {
+                ngw_resource.resource_id: ngw_resource
+                for ngw_resource in self.ngw_resources
+            }.values()
+        )
+        actual_resources = self.__fetch_actual_resources()
+
+        errors: Dict[int, Exception] = {}
+        total = len(ngw_resources)
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_PARALLEL_CONTAINERS, total),
+            thread_name_prefix="ngc_stubs",
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self.__create_container,
+                    ngw_resource,
+                    actual_resources.get(ngw_resource.resource_id),
+                ): ngw_resource
+                for ngw_resource in ngw_resources
+            }
+            for processed, future in enumerate(as_completed(futures), start=1):
+                name = futures[future].display_name
+                progress = "" if total == 1 else f"\n({processed}/{total})"
+                self.statusChanged.emit(
+                    self.tr('Processing layer "{name}"').format(name=name)
+                    + progress
+                )
+
+                error = future.exception()
+                if error is None:
+                    continue
+
+                logger.error(
+                    f'Failed to create container for layer "{name}"',
+                    exc_info=error,
+                )
+                errors[futures[future].resource_id] = error
+
+        if len(errors) == 0:
+            return
+
+        if len(errors) == total:
+            raise next(iter(errors.values()))
+
+        self.layers_failed.emit(list(errors.keys()))
+
+    def __fetch_actual_resources(self) -> Dict[int, NGWVectorLayer]:
+        """Fetch metadata of layers in batches if search supports it"""
+        if not self.is_new_api:
+            return {}
+
+        resources_factory = NGWResourceFactory(
+            self.ngw_resources[0].connection
+        )
+        resources_id = sorted(
+            set(
+                ngw_resource.resource_id for ngw_resource in self.ngw_resources
+            )
+        )
+
+        result: Dict[int, NGWVectorLayer] = {}
+        for i in range(0, len(resources_id), self.METADATA_BATCH_SIZE):
+            batch = resources_id[i : i + self.METADATA_BATCH_SIZE]
+            joined_resources_id = ",".join(map(str, batch))
+            resources_json = resources_factory.connection.get(
+                f"/api/resource/search/?id__in={joined_resources_id}"
+                "&serialization=full"
+            )
+            for resource_json in resources_json:
+                ngw_resource = resources_factory.get_resource_by_json(
+                    resource_json
+                )
+                if isinstance(ngw_resource, NGWVectorLayer):
+                    result[ngw_resource.resource_id] = ngw_resource
+
+        return result
+
+    def __create_container(
+        self,
+        ngw_resource: NGWVectorLayer,
+        actual_resource: Optional[NGWVectorLayer],
+    ) -> None:
+        connection = NgwConnectionsManager().connection(
+            ngw_resource.connection_id
+        )
+        assert connection is not None
+
+        # Layers absent from search results are fetched one by one. Each
+        # thread uses its own connection
+        if actual_resource is None:
+            ngw_connection = getattr(self.__thread_data, "connection", None)
+            if ngw_connection is None:
+                ngw_connection = QgsNgwConnection(ngw_resource.connection_id)
+                self.__thread_data.connection = ngw_connection
+
+            resources_factory = NGWResourceFactory(ngw_connection)
+            actual_resource = cast(
+                NGWVectorLayer,
+                resources_factory.get_resource(ngw_resource.resource_id),
+            )
+
+        cache_directory = Path(NgConnectCacheManager().cache_directory)
+        instance_cache_path = cache_directory / connection.domain_uuid
+        instance_cache_path.mkdir(parents=True, exist_ok=True)
+        gpkg_path = instance_cache_path / f"{ngw_resource.resource_id}.gpkg"
+
+        DetachedLayerFactory().create_initial_container(
+            actual_resource, gpkg_path
+        )
+
+
+class NgwRevalidateChildren(NGWResourceModelJob):
+    """Compares known children of resource with actual ones"""
+
+    def __init__(
+        self, ngw_resource: NGWResource, children: List[NGWResource]
+    ) -> None:
+        super().__init__()
+        self.ngw_resource = ngw_resource
+        self.children = children
+        self.result.main_resource_id = ngw_resource.resource_id
+
+    def _do(self):
+        resources_factory = NGWResourceFactory(self.ngw_resource.connection)
+        children_json = NGWResource.receive_resource_children(
+            resources_factory.connection, self.ngw_resource.resource_id
+        )
+
+        known_etags = {
+            child.resource_id: ResourcesTreeCache.etag(child._json)
+            for child in self.children
+        }
+        actual_children_id = set()
+
+        for child_json in children_json:
+            child_id = child_json["resource"]["id"]
+            actual_children_id.add(child_id)
+
+            known_etag = known_etags.get(child_id)
+            if known_etag == ResourcesTreeCache.etag(child_json):
+                continue
+
+            child = resources_factory.get_resource_by_json(child_json)
+            if known_etag is None:
+                self.result.added_resources.append(child)
+            else:
+                self.result.edited_resources.append(child)
+
+        self.result.deleted_resources = [
+            child
+            for child in self.children
+            if child.resource_id not in actual_children_id
+        ]
+
+
+class NgwSubtreesFetcher(NGWResourceModelJob):
+    """
+    Fetches whole subtrees of resources with one recursive search request
+    per resource. Descendants of dangling resources become dangling too.
+    """
+
+    def __init__(
+        self,
+        ngw_resources: List[NGWResource],
+        dangling_resources: List[NGWResource],
+        is_new_api: bool = False,
+    ) -> None:
+        super().__init__()
+        self.ngw_resources = ngw_resources
+        self.dangling_resources = dangling_resources
+        self.is_new_api = is_new_api
 
     def _do(self):
         connections_manager = NgwConnectionsManager()
+        connection_id = connections_manager.current_connection_id
+        assert connection_id is not None
+        ngw_connection = QgsNgwConnection(connection_id)
 
-        cache_manager = NgConnectCacheManager()
-        cache_directory = Path(cache_manager.cache_directory)
+        resources_factory = NGWResourceFactory(ngw_connection)
 
-        detached_factory = DetachedLayerFactory()
+        self.result.added_resources = self.__fetch_descendants(
+            resources_factory, self.ngw_resources
+        )
+        self.result.dangling_resources = self.__fetch_descendants(
+            resources_factory, self.dangling_resources
+        )
+
+    def __fetch_descendants(
+        self,
+        resources_factory: NGWResourceFactory,
+        ngw_resources: List[NGWResource],
+    ) -> List[NGWResource]:
+        """Descendants of resources ordered from parents to children"""
+        query_name = "root" if self.is_new_api else "parent_id__recursive"
+
+        descendants: Dict[int, NGWResource] = {}
+        for ngw_resource in ngw_resources:
+            resource_id = ngw_resource.resource_id
+            if resource_id in descendants:
+                continue
 
-        total = str(len(self.ngw_resources))
-        for i, ngw_resource in enumerate(self.ngw_resources):
-            name = ngw_resource.display_name
-            progress = "" if total == "1" else f"\n({i + 1}/{total})"
             self.statusChanged.emit(
-                self.tr('Processing layer "{name}"').format(name=name)
-                + progress
+                self.tr('Fetching "{name}" content').format(
+                    name=ngw_resource.display_name
+                )
             )
+            search_url = (
+                f"/api/resource/search/?{query_name}={resource_id}"
+                "&serialization=resource"
+            )
+            for resource_json in resources_factory.connection.get(search_url):
+                descendant = resources_factory.get_resource_by_json(
+                    resource_json
+                )
+                if descendant.resource_id != resource_id:
+                    descendants[descendant.resource_id] = descendant
 
-            connection = connections_manager.connection(
-                ngw_resource.connection_id
+        children_by_parent: Dict[int, List[NGWResource]] = {}
+        for descendant in descendants.values():
+            children_by_parent.setdefault(descendant.parent_id, []).append(
+                descendant
             )
-            assert connection is not None
 
-            # TODO: optimizations. e.g. fetch common dir for resources
-            ngw_resource.update(skip_children=True)
+        result: List[NGWResource] = []
+        parents_id = [
+            ngw_resource.resource_id
+            for ngw_resource in ngw_resources
+            if ngw_resource.resource_id not in descendants
+        ]
+        while len(parents_id) > 0:
+            children = children_by_parent.pop(parents_id.pop(), [])
+            result.extend(children)
+            parents_id.extend(child.resource_id for child in children)
 
-            instance_subdir = connection.domain_uuid
-            instance_cache_path = cache_directory / instance_subdir
-            instance_cache_path.mkdir(parents=True, exist_ok=True)
-            gpkg_path = (
-                instance_cache_path / f"{ngw_resource.resource_id}.gpkg"
+        return result
+
+
+class NgwAddToMapPrefetcher(NGWResourceModelJob):
+    """
+    Fetches everything needed to add resources to the map in one job.
+
+    Subtrees, linked resources, vector layer containers and styles don't
+    depend on each other, so jobs for them are run concurrently and their
+    results are merged.
+    """
+
+    MAX_PARALLEL_JOBS: ClassVar[int] = 4
+
+    def __init__(self, workers: List[NGWResourceModelJob]) -> None:
+        super().__init__()
+        self.workers = workers
+
+    def _do(self):
+        for worker in self.workers:
+            worker.statusChanged.connect(self.statusChanged.emit)
+
+        try:
+            self.__run_workers()
+        finally:
+            for worker in self.workers:
+                worker.statusChanged.disconnect(self.statusChanged.emit)
+
+        self.__merge_results()
+
+    def __run_workers(self) -> None:
+        total = len(self.workers)
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_PARALLEL_JOBS, total),
+            thread_name_prefix="ngc_prefetch",
+        ) as executor:
+            futures = [executor.submit(worker._do) for worker in self.workers]
+            try:
+                for finished, future in enumerate(
+                    as_completed(futures), start=1
+                ):
+                    future.result()
+                    self.statusChanged.emit(
+                        self.tr(
+                            "Preparing resources ({finished}/{total})"
+                        ).format(finished=finished, total=total)
+                    )
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def __merge_results(self) -> None:
+        """Merge results keeping parents before children"""
+        added_resources_id: Set[int] = set()
+        dangling_resources_id: Set[int] = set()
+        for worker in self.workers:
+            worker_result = worker.result
+            for ngw_resource in worker_result.added_resources:
+                if ngw_resource.resource_id in added_resources_id:
+                    continue
+                added_resources_id.add(ngw_resource.resource_id)
+                self.result.added_resources.append(ngw_resource)
+
+            for ngw_resource in worker_result.dangling_resources:
+                if ngw_resource.resource_id in dangling_resources_id:
+                    continue
+                dangling_resources_id.add(ngw_resource.resource_id)
+                self.result.dangling_resources.append(ngw_resource)
+
+            self.result.edited_resources.extend(worker_result.edited_resources)
+            self.result.not_permitted_resources.update(
+                worker_result.not_permitted_resources
             )
-            detached_factory.create_initial_container(ngw_resource, gpkg_path)
 
 
 class NgwSearch(NGWResourceModelJob):
@@ -260,20 +569,33 @@ class NgwSearch(NGWResourceModelJob):
         Tag("owner", "owner", "owner_user_id"),
     ]
 
+    PARENTS_BATCH_SIZE: ClassVar[int] = 100
+    MAX_PARALLEL_QUERIES: ClassVar[int] = 4
+
+    found_resources_updated = pyqtSignal(list)
+
     def __init__(
         self,
         search_string: str,
         populated_resources: Set[int],
         is_new_api: bool = False,
+        local_index: Optional[LocalSearchIndex] = None,
+        known_resources: Optional[Set[int]] = None,
     ) -> None:
         super().__init__()
         self.result.found_resources = []
         self.search_string = search_string.strip()
         self.populated_resources = populated_resources
         self.is_new_api = is_new_api
+        self.local_index = local_index
+        self.known_resources = (
+            known_resources if known_resources is not None else set()
+        )
         self.users_keyname = {}
         self.users_username = {}
         self.parents = []
+        self.__found_resources_id: Set[int] = set()
+        self.__thread_data = threading.local()
 
     def _do(self):
         connections_manager = NgwConnectionsManager()
@@ -283,13 +605,19 @@ class NgwSearch(NGWResourceModelJob):
 
         resources_factory = NGWResourceFactory(ngw_connection)
 
-        for query in self.__queries():
-            logger.debug(f"Search for {query}")
-            search_url = (
-                f"/api/resource/search/?{query}&serialization=resource"
-            )
-            query_result = ngw_connection.get(search_url)
-            self.__process_results(resources_factory, query_result)
+        # Already known resources are shown before server responds
+        local_resources_id = self.__search_locally()
+        if len(local_resources_id) > 0:
+            self.found_resources_updated.emit(local_resources_id)
+
+        try:
+            self.__search_on_server(connection_id)
+        except NgwConnectionError:
+            if len(local_resources_id) == 0:
+                raise
+            logger.warning("Server is unavailable. Local results are shown")
+            self.result.found_resources = local_resources_id
+            return
 
         assert self.result.found_resources is not None
         logger.debug(
@@ -305,19 +633,84 @@ class NgwSearch(NGWResourceModelJob):
             self.result.added_resources = []
             raise
 
-    def __process_results(
-        self, factory: NGWResourceFactory, resources: List[Dict[str, Any]]
-    ) -> None:
-        self.result.found_resources.extend(
-            resource_json["resource"]["id"] for resource_json in resources
-        )
+    def __search_locally(self) -> List[int]:
+        """Find already known resources in local index"""
+        if self.local_index is None or self.search_string.startswith("@"):
+            return []
+
+        try:
+            resources_id = self.local_index.search(self.search_string)
+        except Exception:
+            logger.exception("Can't search in local index")
+            return []
+
+        return [
+            resource_id
+            for resource_id in resources_id
+            if resource_id in self.known_resources
+        ]
+
+    def __search_on_server(self, connection_id: str) -> None:
+        # Queries are sent in parallel and found resources are shown as
+        # soon as any query returns
+        queries = self.__queries()
+        with ThreadPoolExecutor(
+            max_workers=self.MAX_PARALLEL_QUERIES,
+            thread_name_prefix="ngc_search",
+        ) as executor:
+            futures = [
+                executor.submit(self.__search, connection_id, query)
+                for query in queries
+            ]
+            try:
+                for future in as_completed(futures):
+                    is_updated = self.__process_results(future.result())
+                    if is_updated and len(futures) > 1:
+                        self.found_resources_updated.emit(
+                            list(self.result.found_resources)
+                        )
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def __search(self, connection_id: str, query: str) -> List[Dict[str, Any]]:
+        search_cache = SearchCache.instance()
+        resources = search_cache.get(connection_id, query)
+        if resources is not None:
+            logger.debug(f"Cached results are used for {query}")
+            return resources
+
+        connection = getattr(self.__thread_data, "connection", None)
+        if connection is None:
+            connection = QgsNgwConnection(connection_id)
+            self.__thread_data.connection = connection
+
+        logger.debug(f"Search for {query}")
+        search_url = f"/api/resource/search/?{query}&serialization=resource"
+        resources = connection.get(search_url)
+        search_cache.put(connection_id, query, resources)
+        return resources
+
+    def __process_results(self, resources: List[Dict[str, Any]]) -> bool:
+        """Add resources not found before. Returns True if any added"""
+        is_updated = False
         for resource_json in resources:
+            resource_id = resource_json["resource"]["id"]
+            if resource_id in self.__found_resources_id:
+                continue
+            self.__found_resources_id.add(resource_id)
+            self.result.found_resources.append(resource_id)
+            is_updated = True
+
             parent = resource_json["resource"].get("parent")
             parent_id = 0
             if parent is not None:
                 parent_id = parent["id"]
             self.parents.append(parent_id)
 
+        return is_updated
+
     def __queries(self) -> List[str]:
         if not self.search_string.startswith("@"):
             return [self.__default_query()]
@@ -565,54 +958,108 @@ class NgwSearch(NGWResourceModelJob):
     def __fetch_parents(self, resources_factory: NGWResourceFactory) -> None:
         logger.debug("◴ Fetching intermediate resources")
 
-        for parent_id in self.parents:
-            if parent_id in self.populated_resources:
-                continue
-            self.__fetch_children(resources_factory, parent_id)
+        # Children of all parents of the same level are fetched at once
+        parents_id = set(self.parents) - self.populated_resources
+        while len(parents_id) > 0:
+            children = self.__fetch_children(resources_factory, parents_id)
+            self.populated_resources.update(parents_id)
+            self.result.added_resources.extend(children)
+
+            parents_id = set(
+                child.grandparent_id
+                for child in children
+                if child.grandparent_id is not None
+            )
+            parents_id -= self.populated_resources
+
+        sorted_resources, orphans = self.sort_by_hierarchy(
+            self.result.added_resources, self.populated_resources
+        )
+        if len(orphans) > 0:
+            logger.warning(
+                f"Skipped {len(orphans)} resources with unknown parents: "
+                f"{[orphan.resource_id for orphan in orphans]}"
+            )
+
+        self.result.added_resources = sorted_resources
 
-        sorted_added_resources = []
+        logger.debug("✓ All intermediate resources are fetched")
 
-        # Add toppest items
-        for resource in self.result.added_resources:
-            has_parent_ln_list = False
-            for other_resource in self.result.added_resources:
-                if other_resource.resource_id == resource.parent_id:
-                    has_parent_ln_list = True
-                    break
-            if not has_parent_ln_list:
-                sorted_added_resources.append(resource)
+    @staticmethod
+    def sort_by_hierarchy(
+        resources: List[NGWResource], populated_resources: Set[int]
+    ) -> Tuple[List[NGWResource], List[NGWResource]]:
+        """
+        Order resources from parents to children in linear time.
+
+        Resources are attached to resources from the list or to populated
+        ones. Resources which can't be attached are returned as orphans.
+        Duplicates are skipped.
+        """
+        unique_resources: Dict[int, NGWResource] = {}
+        for resource in resources:
+            unique_resources.setdefault(resource.resource_id, resource)
+
+        children_by_parent: Dict[int, List[NGWResource]] = {}
+        top_resources: List[NGWResource] = []
+        orphans: List[NGWResource] = []
+        for resource in unique_resources.values():
+            parent_id = resource.parent_id
+            if parent_id in unique_resources:
+                children_by_parent.setdefault(parent_id, []).append(resource)
+            elif parent_id in populated_resources:
+                top_resources.append(resource)
+            else:
+                orphans.append(resource)
 
-        while len(sorted_added_resources) != len(self.result.added_resources):
-            for parent_resource in sorted_added_resources:
-                for other_resource in self.result.added_resources:
-                    if parent_resource.resource_id == other_resource.parent_id:
-                        sorted_added_resources.append(other_resource)
+        sorted_resources: List[NGWResource] = []
+        queue = deque(top_resources)
+        while len(queue) > 0:
+            resource = queue.popleft()
+            sorted_resources.append(resource)
+            queue.extend(children_by_parent.pop(resource.resource_id, []))
 
-        self.result.added_resources = sorted_added_resources
+        # Children of orphans and cycles are not reachable from the top
+        for children in children_by_parent.values():
+            orphans.extend(children)
 
-        logger.debug("✓ All intermediate resources are fetched")
+        return sorted_resources, orphans
 
     def __fetch_children(
-        self, resources_factory: NGWResourceFactory, resource_id: int
-    ) -> None:
-        children_json = NGWResource.receive_resource_children(
-            resources_factory.connection, resource_id
-        )
+        self, resources_factory: NGWResourceFactory, parents_id: Set[int]
+    ) -> List[NGWResource]:
+        connection = resources_factory.connection
 
-        children: List[NGWResource] = []
-        for child_json in children_json:
-            children.append(resources_factory.get_resource_by_json(child_json))
+        children_json: List[Dict[str, Any]] = []
+        if self.is_new_api:
+            sorted_parents_id = sorted(parents_id)
+            for i in range(0, len(sorted_parents_id), self.PARENTS_BATCH_SIZE):
+                batch = sorted_parents_id[i : i + self.PARENTS_BATCH_SIZE]
+                joined_parents_id = ",".join(map(str, batch))
+                children_json.extend(
+                    connection.get(
+                        f"/api/resource/search/?parent__in={joined_parents_id}"
+                        "&serialization=resource"
+                    )
+                )
+        else:
+            for parent_id in parents_id:
+                children_json.extend(
+                    NGWResource.receive_resource_children(
+                        connection, parent_id
+                    )
+                )
 
-        self.populated_resources.add(resource_id)
+        children = [
+            resources_factory.get_resource_by_json(child_json)
+            for child_json in children_json
+        ]
 
-        if len(children) == 0:
-            logger.error(f"Empty children list for resource {resource_id}")
-            return
+        fetched_parents_id = set(child.parent_id for child in children)
+        for parent_id in parents_id - fetched_parents_id:
+            logger.error(f"Empty children list for resource {parent_id}")
 
-        self.result.added_resources = children + self.result.added_resources
-        grandparent_id = children[0].grandparent_id
-        if grandparent_id not in self.populated_resources:
-            self.__fetch_children(resources_factory, grandparent_id)
+        return children
 
 
 class QNGWResourceTreeModelBase(QAbstractItemModel):
@@ -626,6 +1073,9 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
 
     found_resources_changed = pyqtSignal(list)
 
+    CHILDREN_PAGE_SIZE: ClassVar[int] = 500
+    MAX_BACKGROUND_REVALIDATIONS: ClassVar[int] = 2
+
     def __init__(self, parent: Optional[QObject] = None):
         super().__init__(parent)
 
@@ -638,6 +1088,26 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
 
         self._dangling_resources: Dict[int, NGWResource] = {}
         self.__not_permitted_resources = set()
+        # Layers which containers can't be created are not retried until
+        # the tree is reloaded
+        self.__failed_stubs_id: Set[int] = set()
+        self.__items_by_id: Dict[int, QNGWResourceItem] = {}
+        # Sorted children of large groups which have no items yet. Items
+        # are created page by page in fetchMore
+        self.__pending_children: Dict[int, List[NGWResource]] = {}
+        self.__pending_parents_id: Dict[int, int] = {}
+
+        self.__resources_cache: Optional[ResourcesTreeCache] = None
+        # Branches restored from cache and not revalidated yet
+        self.__unverified_branches: Set[int] = set()
+        self.__is_root_unverified = False
+        # Restored branches are revalidated in background from the root
+        self.__revalidation_queue: Deque[int] = deque()
+        self.__background_revalidations: Set[str] = set()
+        self._search_index: Optional[LocalSearchIndex] = None
+        # Tree cache and search index are updated in order without blocking
+        # GUI. Writer is recreated for every connection
+        self.__cache_writer = self.__create_cache_writer()
 
         self._found_resources_id = []
 
@@ -656,12 +1126,22 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
 
         self.__cleanModel()
         self.root_item = QModelItem()
+        self.__items_by_id = {}
+        self.__pending_children = {}
+        self.__pending_parents_id = {}
 
         self.jobs = []
         self.__indexes_locked_by_jobs = {}
         self.__indexes_locked_by_job_errors = {}
         self._dangling_resources = {}
         self.__not_permitted_resources = set()
+        self.__failed_stubs_id = set()
+        self.__resources_cache = None
+        self._search_index = None
+
+        # Queued writes of the previous connection are finished first
+        self.__cache_writer.shutdown(wait=True)
+        self.__cache_writer = self.__create_cache_writer()
 
         request_error = None
         # Get NGW version.
@@ -687,21 +1167,283 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
                 self.ngw_version = None
                 self.support_status = None
 
+        if self.is_ngw_version_supported:
+            self.__restore_cached_tree()
+            if NgConnectSettings().search.is_local_index_enabled:
+                self._search_index = LocalSearchIndex.for_connection(
+                    self._ngw_connection.connection_id
+                )
+
         self.endResetModel()
 
+        # Let the view fetch expanded branches first
+        if len(self.__revalidation_queue) > 0:
+            QTimer.singleShot(0, self.revalidate_in_background)
+
         if request_error is not None:
             self.errorOccurred.emit(None, None, request_error)
 
     def cleanModel(self):
         self.__cleanModel()
 
+    def wait_for_cache_writes(self) -> None:
+        """Block until queued cache and search index updates are written"""
+        self.__cache_writer.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Finish queued cache writes and stop the writer thread"""
+        self.__resources_cache = None
+        self._search_index = None
+        self.__cache_writer.shutdown(wait=True)
+
+    @staticmethod
+    def __create_cache_writer() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ngc_cache_writer"
+        )
+
     def __cleanModel(self):
         c = self.root_item.childCount()
         self.beginRemoveRows(QModelIndex(), 0, c - 1)
         for i in range(c - 1, -1, -1):
             self.root_item.removeChild(self.root_item.child(i))
+        self.__items_by_id = {}
+        self.__pending_children = {}
+        self.__pending_parents_id = {}
+        self.__unverified_branches = set()
+        self.__is_root_unverified = False
+        self.__revalidation_queue = deque()
         self.endRemoveRows()
 
+    def __restore_cached_tree(self) -> None:
+        """Fill empty tree with resources fetched in previous sessions"""
+        assert self._ngw_connection is not None
+        self.__resources_cache = ResourcesTreeCache.for_connection(
+            self._ngw_connection.connection_id
+        )
+        if self.__resources_cache is None:
+            return
+
+        try:
+            root_json = self.__resources_cache.root()
+            if root_json is None:
+                return
+
+            branches = self.__resources_cache.branches()
+
+            factory = NGWResourceFactory(self._ngw_connection)
+            root_resource = factory.get_resource_by_json(root_json)
+            pending_children = {}
+            # Branches in breadth-first order
+            unverified_branches: Dict[int, None] = {}
+
+            # All restored children are pending, items are created only
+            # for first pages of restored branches
+            resources = deque([root_resource])
+            while len(resources) > 0:
+                ngw_resource = resources.popleft()
+                children_json = branches.get(ngw_resource.resource_id)
+                if children_json is None:
+                    continue
+
+                children = sorted(
+                    (
+                        factory.get_resource_by_json(child_json)
+                        for child_json in children_json
+                    ),
+                    key=QNGWResourceItem.resource_sort_key,
+                )
+                resources.extend(children)
+
+                ngw_resource.set_children_count(len(children))
+                unverified_branches[ngw_resource.resource_id] = None
+                if len(children) > 0:
+                    pending_children[ngw_resource.resource_id] = children
+
+        except Exception:
+            logger.exception("Can't restore resources tree from cache")
+            return
+
+        root_item = QNGWResourceItem(root_resource)
+        self.root_item.addChild(root_item)
+        self.__items_by_id = {root_item.ngw_resource_id(): root_item}
+        self.__pending_children = pending_children
+        self.__pending_parents_id = {
+            child.resource_id: parent_id
+            for parent_id, children in pending_children.items()
+            for child in children
+        }
+        self.__unverified_branches = set(unverified_branches)
+        self.__revalidation_queue = deque(unverified_branches)
+        self.__is_root_unverified = True
+
+        items = [root_item]
+        while len(items) > 0:
+            item = items.pop()
+            new_items = self.__take_pending_page(item.ngw_resource_id())
+            item.addChildren(new_items)
+            items.extend(new_items)
+
+        logger.debug(
+            f"Restored {len(self.__pending_parents_id) + 1} resources "
+            "from cache"
+        )
+
+    def __cache_job_result(
+        self, job: NGWResourcesModelJob, job_result: NGWResourceModelJobResult
+    ) -> None:
+        """Store complete children lists changed by job"""
+        if self.__resources_cache is None:
+            return
+
+        root_json = None
+        parents_id = set()
+        for ngw_resource in itertools.chain(
+            job_result.added_resources,
+            job_result.edited_resources,
+            job_result.deleted_resources,
+        ):
+            if ngw_resource.common.parent is None:
+                root_json = ngw_resource._json
+            else:
+                parents_id.add(ngw_resource.parent_id)
+
+        if job.getJobId() in (
+            NGWResourceUpdater.__name__,
+            NgwRevalidateChildren.__name__,
+        ):
+            parents_id.add(job_result.main_resource_id)
+
+        branches = {}
+        for parent_id in parents_id:
+            item = self.__items_by_id.get(parent_id)
+            if item is None or not self.__has_all_children(item):
+                continue
+            branches[parent_id] = [
+                ngw_resource._json
+                for ngw_resource in self.__item_children_resources(item)
+            ]
+
+        if root_json is None and len(branches) == 0:
+            return
+
+        self.__cache_writer.submit(
+            self.__update_resources_cache,
+            self.__resources_cache,
+            root_json,
+            branches,
+        )
+
+    @staticmethod
+    def __update_resources_cache(
+        resources_cache: ResourcesTreeCache,
+        root_json: Optional[Dict[str, Any]],
+        branches: Dict[int, List[Dict[str, Any]]],
+    ) -> None:
+        try:
+            if root_json is not None:
+                resources_cache.store_root(root_json)
+            if len(branches) > 0:
+                resources_cache.store_branches(branches)
+        except Exception:
+            logger.exception("Can't update resources tree cache")
+
+    def __index_job_result(
+        self, job_result: NGWResourceModelJobResult
+    ) -> None:
+        """Keep local search index in sync with fetched resources"""
+        if self._search_index is None:
+            return
+
+        resources_json = [
+            ngw_resource._json
+            for ngw_resource in itertools.chain(
+                job_result.added_resources, job_result.edited_resources
+            )
+        ]
+        deleted_resources_id = [
+            ngw_resource.resource_id
+            for ngw_resource in job_result.deleted_resources
+        ]
+        if len(resources_json) == 0 and len(deleted_resources_id) == 0:
+            return
+
+        self.__cache_writer.submit(
+            self.__update_search_index,
+            self._search_index,
+            resources_json,
+            deleted_resources_id,
+        )
+
+    @staticmethod
+    def __update_search_index(
+        search_index: LocalSearchIndex,
+        resources_json: List[Dict[str, Any]],
+        deleted_resources_id: List[int],
+    ) -> None:
+        try:
+            search_index.add(resources_json)
+            if len(deleted_resources_id) > 0:
+                search_index.remove(deleted_resources_id)
+        except Exception:
+            logger.exception("Can't update local search index")
+
+    def __invalidate_search_cache(
+        self, job: NGWResourcesModelJob, job_result: NGWResourceModelJobResult
+    ) -> None:
+        """Forget search results after resources are changed"""
+        if self._ngw_connection is None:
+            return
+
+        is_fetching_job = job.getJobId() in (
+            NGWRootResourcesLoader.__name__,
+            NGWResourceUpdater.__name__,
+            NgwRevalidateChildren.__name__,
+            NgwSubtreesFetcher.__name__,
+            NgwAddToMapPrefetcher.__name__,
+            NgwSearch.__name__,
+            ResourcesDownloader.__name__,
+            NgwStylesDownloader.__name__,
+        )
+        is_changed = (
+            len(job_result.edited_resources) > 0
+            or len(job_result.deleted_resources) > 0
+            or (not is_fetching_job and len(job_result.added_resources) > 0)
+        )
+        if not is_changed:
+            return
+
+        SearchCache.instance().invalidate(self._ngw_connection.connection_id)
+
+    def __has_all_children(self, item: QNGWResourceItem) -> bool:
+        ngw_resource = item.data(QNGWResourceItem.NGWResourceRole)
+        if not ngw_resource.common.children:
+            return True
+        if ngw_resource.children_count is not None:
+            return self.__children_count(item) >= ngw_resource.children_count
+        return self.__children_count(item) > 0
+
+    def __children_count(self, item: QModelItem) -> int:
+        """Count of children including pending ones"""
+        pending_count = 0
+        if isinstance(item, QNGWResourceItem):
+            pending_count = len(
+                self.__pending_children.get(item.ngw_resource_id(), [])
+            )
+        return item.childCount() + pending_count
+
+    def __item_children_resources(self, item: QModelItem) -> List[NGWResource]:
+        """Resources of children including pending ones"""
+        resources = [
+            item.child(row).data(QNGWResourceItem.NGWResourceRole)
+            for row in range(item.childCount())
+        ]
+        if isinstance(item, QNGWResourceItem):
+            resources.extend(
+                self.__pending_children.get(item.ngw_resource_id(), [])
+            )
+        return resources
+
     def item(self, index: QModelIndex) -> QModelItem:
         return (
             index.internalPointer()
@@ -759,17 +1501,58 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
             if self._ngw_connection is None:
                 return False
             # We expect only one root resource group
-            return item.childCount() == 0
+            return item.childCount() == 0 or self.__is_root_unverified
 
         ngw_resource = item.data(QNGWResourceItem.NGWResourceRole)
+        if (
+            ngw_resource.resource_id in self.__unverified_branches
+            or ngw_resource.resource_id in self.__pending_children
+        ):
+            return True
+
         if (
             ngw_resource.common.children
             and ngw_resource.children_count is not None
         ):
-            return ngw_resource.children_count > item.childCount()
+            return ngw_resource.children_count > self.__children_count(item)
 
         return ngw_resource.common.children and item.childCount() == 0
 
+    def revalidate_in_background(self) -> None:
+        """
+        Revalidate branches restored from cache without user interaction.
+
+        Branches are revalidated from the root within the limit of parallel
+        jobs, the next one is started when a previous job is finished.
+        Branches inside not created pages are revalidated when the page is
+        shown.
+        """
+        while (
+            len(self.__background_revalidations)
+            < self.MAX_BACKGROUND_REVALIDATIONS
+            and len(self.__revalidation_queue) > 0
+        ):
+            resource_id = self.__revalidation_queue.popleft()
+            if resource_id not in self.__unverified_branches:
+                continue
+
+            item = self.__items_by_id.get(resource_id)
+            if item is None:
+                continue
+
+            index = self.__index_from_item(item)
+            is_locked = self._isIndexLockedByJob(index)
+            if is_locked or self._isIndexLockedByJobError(index):
+                continue
+
+            self.__unverified_branches.remove(resource_id)
+            worker = NgwRevalidateChildren(
+                item.data(QNGWResourceItem.NGWResourceRole),
+                self.children_resources(index),
+            )
+            job = self._startJob(worker, index)
+            self.__background_revalidations.add(job.getJobUuid())
+
     def fetchMore(self, parent: QModelIndex) -> None:
         if not self.canFetchMore(parent):
             return
@@ -778,10 +1561,23 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
         assert isinstance(parent_item, QModelItem)
         if parent_item is self.root_item:
             worker = NGWRootResourcesLoader(self._ngw_connection)
+            self.__is_root_unverified = False
             logger.debug("↓ Fetch root resource")
         else:
             ngw_resource = parent_item.data(QNGWResourceItem.NGWResourceRole)
-            worker = NGWResourceUpdater(ngw_resource, [])
+            resource_id = ngw_resource.resource_id
+            if resource_id in self.__pending_children:
+                self.__fetch_pending(parent)
+                if resource_id not in self.__unverified_branches:
+                    return
+
+            if resource_id in self.__unverified_branches:
+                self.__unverified_branches.remove(resource_id)
+                worker = NgwRevalidateChildren(
+                    ngw_resource, self.children_resources(parent)
+                )
+            else:
+                worker = NGWResourceUpdater(ngw_resource, [])
 
         self._startJob(worker, parent)
 
@@ -862,8 +1658,15 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
         self.jobs.remove(job)
         job.deleteLater()
 
+        if job.getJobUuid() in self.__background_revalidations:
+            self.__background_revalidations.remove(job.getJobUuid())
+            self.revalidate_in_background()
+
     def __jobErrorOccurredProcess(self, error):
         job = cast(NGWResourcesModelJob, self.sender())
+        # Don't repeat failed requests for every restored branch
+        if job.getJobUuid() in self.__background_revalidations:
+            self.__revalidation_queue.clear()
         self.errorOccurred.emit(job.getJobId(), job.getJobUuid(), error)
 
     def __jobWarningOccurredProcess(self, error):
@@ -874,17 +1677,17 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
         parent_item = self.item(parent)
         parent_resource = parent_item.data(QNGWResourceItem.NGWResourceRole)
 
+        if self.__add_pending_child(parent_item, ngw_resource):
+            new_item = self.__item_by_id(ngw_resource.resource_id)
+            assert new_item is not None
+            return self.__index_from_item(new_item)
+
         new_item = QNGWResourceItem(ngw_resource)
-        i = -1
-        for i in range(parent_item.childCount()):
-            item = parent_item.child(i)
-            if new_item.more_priority(item):
-                break
-        else:
-            i += 1
+        i = self.__child_position(parent_item, new_item)
 
         self.beginInsertRows(parent, i, i)
         parent_item.insertChild(i, new_item)
+        self.__items_by_id[ngw_resource.resource_id] = new_item
         if (
             isinstance(parent_resource, NGWResource)
             and not parent_resource.common.children
@@ -894,6 +1697,151 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
 
         return self.index(i, 0, parent)
 
+    def addNGWResourcesToTree(
+        self, parent: QModelIndex, ngw_resources: List[NGWResource]
+    ) -> List[QModelIndex]:
+        """
+        Add resources with one rows insertion if parent has no children.
+
+        Only the first page of children gets items, the rest are pending
+        until they are fetched. Returns indexes of added items.
+        """
+        parent_item = self.item(parent)
+
+        if (
+            parent_item.childCount() > 0
+            or len(ngw_resources) <= 1
+            or not isinstance(parent_item, QNGWResourceItem)
+            or parent_item.ngw_resource_id() in self.__pending_children
+        ):
+            new_items = [
+                self.addNGWResourceToTree(
+                    parent, ngw_resource
+                ).internalPointer()
+                for ngw_resource in ngw_resources
+            ]
+            return [self.__index_from_item(item) for item in new_items]
+
+        parent_id = parent_item.ngw_resource_id()
+        self.__pending_children[parent_id] = sorted(
+            ngw_resources, key=QNGWResourceItem.resource_sort_key
+        )
+        for ngw_resource in ngw_resources:
+            self.__pending_parents_id[ngw_resource.resource_id] = parent_id
+
+        parent_resource = parent_item.data(QNGWResourceItem.NGWResourceRole)
+        if not parent_resource.common.children:
+            parent_resource.common.children = True
+
+        new_items = self.__fetch_pending(parent)
+        return [self.__index_from_item(item) for item in new_items]
+
+    def __fetch_pending(self, parent: QModelIndex) -> List[QNGWResourceItem]:
+        """Create items for the next page of pending children"""
+        parent_item = self.item(parent)
+        assert isinstance(parent_item, QNGWResourceItem)
+
+        new_items = self.__take_pending_page(parent_item.ngw_resource_id())
+        if len(new_items) == 0:
+            return []
+
+        row = parent_item.childCount()
+        self.beginInsertRows(parent, row, row + len(new_items) - 1)
+        parent_item.addChildren(new_items)
+        self.endInsertRows()
+
+        return new_items
+
+    def __take_pending_page(self, parent_id: int) -> List[QNGWResourceItem]:
+        pending_children = self.__pending_children.get(parent_id)
+        if pending_children is None:
+            return []
+
+        page = pending_children[: self.CHILDREN_PAGE_SIZE]
+        if len(pending_children) > len(page):
+            self.__pending_children[parent_id] = pending_children[len(page) :]
+        else:
+            del self.__pending_children[parent_id]
+
+        new_items = []
+        for ngw_resource in page:
+            del self.__pending_parents_id[ngw_resource.resource_id]
+            new_item = QNGWResourceItem(ngw_resource)
+            self.__items_by_id[ngw_resource.resource_id] = new_item
+            new_items.append(new_item)
+
+        return new_items
+
+    def __add_pending_child(
+        self, parent_item: QModelItem, ngw_resource: NGWResource
+    ) -> bool:
+        """Add resource to pending children if it is sorted among them"""
+        if not isinstance(parent_item, QNGWResourceItem):
+            return False
+
+        parent_id = parent_item.ngw_resource_id()
+        pending_children = self.__pending_children.get(parent_id)
+        if pending_children is None:
+            return False
+
+        sort_key = QNGWResourceItem.resource_sort_key(ngw_resource)
+        children_count = parent_item.childCount()
+        if (
+            children_count > 0
+            and sort_key < parent_item.child(children_count - 1).sort_key()
+        ):
+            return False
+
+        low = 0
+        high = len(pending_children)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = QNGWResourceItem.resource_sort_key(
+                pending_children[middle]
+            )
+            if sort_key < middle_key:
+                high = middle
+            else:
+                low = middle + 1
+
+        pending_children.insert(low, ngw_resource)
+        self.__pending_parents_id[ngw_resource.resource_id] = parent_id
+        return True
+
+    def __item_by_id(self, resource_id: int) -> Optional[QNGWResourceItem]:
+        """Find item by resource id creating pending items if needed"""
+        item = self.__items_by_id.get(resource_id)
+        if item is not None:
+            return item
+
+        parent_id = self.__pending_parents_id.get(resource_id)
+        if parent_id is None:
+            return None
+
+        parent_item = self.__item_by_id(parent_id)
+        if parent_item is None:
+            return None
+
+        parent_index = self.__index_from_item(parent_item)
+        while resource_id in self.__pending_parents_id:
+            self.__fetch_pending(parent_index)
+
+        return self.__items_by_id.get(resource_id)
+
+    def __child_position(
+        self, parent_item: QModelItem, new_item: QNGWResourceItem
+    ) -> int:
+        # Children are sorted, so position is found by binary search
+        low = 0
+        high = parent_item.childCount()
+        while low < high:
+            middle = (low + high) // 2
+            if new_item.more_priority(parent_item.child(middle)):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
     def _lockIndexByJob(self, indexes: List[QModelIndex], job):
         if job not in self.__indexes_locked_by_jobs:
             self.__indexes_locked_by_jobs[job] = []
@@ -929,26 +1877,74 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
     def _isIndexLockedByJobError(self, index):
         return index in self.__indexes_locked_by_job_errors
 
-    def index_from_id(self, ngw_resource_id, parent=None):
-        if parent is None:
-            parent = self.index(0, 0, QModelIndex())
-        item = parent.internalPointer()
+    def index_from_id(
+        self, ngw_resource_id: int, parent: Optional[QModelIndex] = None
+    ) -> Optional[QModelIndex]:
+        item = self.__item_by_id(ngw_resource_id)
+        if item is None:
+            return None
+
+        if parent is not None and parent.isValid():
+            parent_item = parent.internalPointer()
+            ancestor = item
+            while ancestor is not None and ancestor is not parent_item:
+                ancestor = ancestor.parent()
+            if ancestor is None:
+                return None
 
-        if (
-            isinstance(item, QNGWResourceItem)
-            and item.ngw_resource_id() == ngw_resource_id
-        ):
-            return parent
+        return self.__index_from_item(item)
 
-        for i in range(item.childCount()):
-            index = self.index_from_id(
-                ngw_resource_id, self.index(i, 0, parent)
-            )
+    def _resources_id(self) -> Set[int]:
+        """Ids of resources in tree including pending ones"""
+        return set(self.__items_by_id.keys()).union(self.__pending_parents_id)
 
-            if index is not None:
-                return index
+    def __index_from_item(self, item: QModelItem) -> QModelIndex:
+        parent_item = item.parent()
+        if parent_item is None:
+            parent_item = self.root_item
+        return self.createIndex(parent_item.indexOfChild(item), 0, item)
 
-        return None
+    def __remove_child(
+        self, parent: QModelIndex, child_item: QModelItem
+    ) -> None:
+        parent_item = self.item(parent)
+        row = parent_item.indexOfChild(child_item)
+
+        self.beginRemoveRows(parent, row, row)
+        parent_item.removeChild(child_item)
+        self.__forget_items(child_item)
+        self.endRemoveRows()
+
+    def __forget_items(self, item: QModelItem) -> None:
+        """Remove item and its descendants from the id index"""
+        items = [item]
+        while len(items) > 0:
+            current_item = items.pop()
+            items.extend(
+                current_item.child(row)
+                for row in range(current_item.childCount())
+            )
+            if not isinstance(current_item, QNGWResourceItem):
+                continue
+
+            resource_id = current_item.ngw_resource_id()
+            if self.__items_by_id.get(resource_id) is current_item:
+                del self.__items_by_id[resource_id]
+                self.__unverified_branches.discard(resource_id)
+                self.__forget_pending(resource_id)
+
+    def __forget_pending(self, parent_id: int) -> None:
+        """Remove pending descendants of resource"""
+        parents_id = [parent_id]
+        while len(parents_id) > 0:
+            pending_children = self.__pending_children.pop(
+                parents_id.pop(), []
+            )
+            for ngw_resource in pending_children:
+                resource_id = ngw_resource.resource_id
+                self.__pending_parents_id.pop(resource_id, None)
+                self.__unverified_branches.discard(resource_id)
+                parents_id.append(resource_id)
 
     def resource(
         self, identifier: Union[int, QModelIndex, None]
@@ -976,13 +1972,7 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
         )
 
         if parent_index is not None and parent_index.isValid():
-            result = []
-            for row in range(self.rowCount(parent_index)):
-                child_index = self.index(row, 0, parent_index)
-                result.append(
-                    child_index.data(QNGWResourceItem.NGWResourceRole)
-                )
-            return result
+            return self.__item_children_resources(self.item(parent_index))
 
         return [
             resource
@@ -990,6 +1980,19 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
             if resource.parent_id == parent_identifier
         ]
 
+    def fetch_pending_descendants(self, parent: QModelIndex) -> None:
+        """Create items for all pending resources in subtree"""
+        parent_item = self.item(parent)
+        if (
+            isinstance(parent_item, QNGWResourceItem)
+            and parent_item.ngw_resource_id() in self.__pending_children
+        ):
+            while len(self.__fetch_pending(parent)) > 0:
+                pass
+
+        for row in range(self.rowCount(parent)):
+            self.fetch_pending_descendants(self.index(row, 0, parent))
+
     def is_forbidden(self, resource_id: int) -> bool:
         return resource_id in self.__not_permitted_resources
 
@@ -1010,36 +2013,79 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
 
         indexes = {}
         added_resources_id = []
+        children_by_parent: Dict[int, List[NGWResource]] = {}
         for ngw_resource in job_result.added_resources:
             if ngw_resource.common.parent is None:
-                resource_id = QModelIndex()
+                existing_item = self.__items_by_id.get(
+                    ngw_resource.resource_id
+                )
+                if existing_item is not None:
+                    # Root is restored from cache
+                    existing_resource = existing_item.data(
+                        QNGWResourceItem.NGWResourceRole
+                    )
+                    if ResourcesTreeCache.etag(
+                        existing_resource._json
+                    ) == ResourcesTreeCache.etag(ngw_resource._json):
+                        continue
+                    self.cleanModel()
+
                 new_index = self.addNGWResourceToTree(
-                    resource_id, ngw_resource
+                    QModelIndex(), ngw_resource
                 )
+                added_resources_id.append(ngw_resource.resource_id)
+
+                if job_result.main_resource_id == ngw_resource.resource_id:
+                    if job.model_response is not None:
+                        job.model_response.done.emit(new_index)
             else:
-                parent_id = ngw_resource.parent_id
-                if parent_id not in indexes:
-                    indexes[parent_id] = self.index_from_id(parent_id)
-                resource_id = indexes[parent_id]
+                # Resources are ordered from parents to children, so
+                # children of each parent are inserted at once after it
+                children_by_parent.setdefault(
+                    ngw_resource.parent_id, []
+                ).append(ngw_resource)
+
+        for parent_id, children in children_by_parent.items():
+            parent_index = self.index_from_id(parent_id)
+            indexes[parent_id] = parent_index
+            if parent_index is None:
+                continue
 
-                item = resource_id.internalPointer()
-                current_ids = [
-                    item.child(i).ngw_resource_id()
-                    for i in range(item.childCount())
-                    if isinstance(item.child(i), QNGWResourceItem)
-                ]
-                if ngw_resource.resource_id not in current_ids:
-                    new_index = self.addNGWResourceToTree(
-                        resource_id, ngw_resource
+            parent_item = self.item(parent_index)
+            new_resources = []
+            new_resources_id = set()
+            for ngw_resource in children:
+                resource_id = ngw_resource.resource_id
+                existing_item = self.__items_by_id.get(resource_id)
+                if (
+                    (
+                        existing_item is not None
+                        and existing_item.parent() is parent_item
                     )
-                else:
+                    or self.__pending_parents_id.get(resource_id) == parent_id
+                    or resource_id in new_resources_id
+                ):
                     continue
+                new_resources.append(ngw_resource)
+                new_resources_id.add(resource_id)
 
-            added_resources_id.append(ngw_resource.resource_id)
+            new_indexes = self.addNGWResourcesToTree(
+                parent_index, new_resources
+            )
+
+            # Pending resources are not selected
+            added_resources_id.extend(
+                index.data(QNGWResourceItem.NGWResourceIdRole)
+                for index in new_indexes
+            )
 
-            if job_result.main_resource_id == ngw_resource.resource_id:
-                if job.model_response is not None:
-                    job.model_response.done.emit(new_index)
+            if (
+                job_result.main_resource_id in new_resources_id
+                and job.model_response is not None
+            ):
+                job.model_response.done.emit(
+                    self.index_from_id(job_result.main_resource_id)
+                )
 
         if len(added_resources_id) > 0 and job.model_response is not None:
             indexes_for_select = []
@@ -1083,19 +2129,13 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
                 )
                 item = resource_id.internalPointer()
 
-                for i in range(item.childCount()):
-                    if (
-                        item.child(i).ngw_resource_id()
-                        == ngw_resource.resource_id
-                    ):
-                        self.beginRemoveRows(resource_id, i, i)
-                        item.removeChild(item.child(i))
-                        self.endRemoveRows()
-                        break
-                else:
+                edited_item = self.__item_by_id(ngw_resource.resource_id)
+                if edited_item is None or edited_item.parent() is not item:
                     # TODO exception: not find deleted resource in corrent tree
                     return
 
+                self.__remove_child(resource_id, edited_item)
+
             new_index = self.addNGWResourceToTree(resource_id, ngw_resource)
 
             if job.model_response is not None:
@@ -1107,22 +2147,28 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
             )
             item = resource_id.internalPointer()
 
-            for i in range(item.childCount()):
-                if item.child(i).ngw_resource_id() == ngw_resource.resource_id:
-                    self.beginRemoveRows(resource_id, i, i)
-                    item.removeChild(item.child(i))
-                    self.endRemoveRows()
-                    break
-            else:
+            deleted_item = self.__item_by_id(ngw_resource.resource_id)
+            if deleted_item is None or deleted_item.parent() is not item:
                 # TODO exception: not find deleted resource in corrent tree
                 return
 
+            self.__remove_child(resource_id, deleted_item)
+
             ngw_resource = item.data(QNGWResourceItem.NGWResourceRole)
             ngw_resource.update()
 
             if job.model_response is not None:
                 job.model_response.done.emit(resource_id)
 
+        if job.getJobId() == NgwRevalidateChildren.__name__:
+            revalidated_item = self.__items_by_id.get(
+                job_result.main_resource_id
+            )
+            if revalidated_item is not None:
+                revalidated_item.data(
+                    QNGWResourceItem.NGWResourceRole
+                ).set_children_count(self.__children_count(revalidated_item))
+
         for ngw_resource in job_result.dangling_resources:
             self._dangling_resources[ngw_resource.resource_id] = ngw_resource
 
@@ -1134,6 +2180,10 @@ class QNGWResourceTreeModelBase(QAbstractItemModel):
             job_result.not_permitted_resources
         )
 
+        self.__cache_job_result(job, job_result)
+        self.__index_job_result(job_result)
+        self.__invalidate_search_cache(job, job_result)
+
     @property
     def is_ngw_version_supported(self) -> bool:
         if self.support_status is None:
@@ -1377,6 +2427,56 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
     def fetch_not_expanded(
         self, resources_id: List[int]
     ) -> Optional[NGWResourcesModelJob]:
+        job_params = self.__subtrees_fetcher(resources_id)
+        if job_params is None:
+            return None
+        return self._startJob(*job_params)
+
+    @modelRequest
+    def fetch_missing(
+        self, resources_id: List[int]
+    ) -> Optional[NGWResourcesModelJob]:
+        job_params = self.__resources_downloader(resources_id)
+        if job_params is None:
+            return None
+        return self._startJob(*job_params)
+
+    @modelRequest
+    def prefetch_for_adding(
+        self,
+        indexes: List[QModelIndex],
+        missing_resources_id: List[int],
+        missing_styles_id: List[int],
+    ) -> Optional[NGWResourcesModelJob]:
+        """
+        Fetch subtrees, missing resources, styles and create vector layers
+        containers concurrently in one job
+        """
+        jobs_params = [
+            self.__subtrees_fetcher(missing_resources_id),
+            self.__resources_downloader(missing_resources_id),
+            self.__vector_layers_stubs_creator(indexes),
+            self.__styles_downloader(missing_styles_id),
+        ]
+        workers: List[NGWResourceModelJob] = []
+        indexes_for_lock: List[QModelIndex] = []
+        for job_params in jobs_params:
+            if job_params is None:
+                continue
+            workers.append(job_params[0])
+            indexes_for_lock.extend(job_params[1])
+
+        if len(workers) == 0:
+            return None
+
+        worker = workers[0]
+        if len(workers) > 1:
+            worker = NgwAddToMapPrefetcher(workers)
+        return self._startJob(worker, lock_indexes=list(set(indexes_for_lock)))
+
+    def __subtrees_fetcher(
+        self, resources_id: List[int]
+    ) -> Optional[Tuple[NGWResourceModelJob, List[QModelIndex]]]:
         indexes_for_fetch: List[QModelIndex] = [
             self.index_from_id(resource_id) for resource_id in resources_id
         ]
@@ -1400,15 +2500,14 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
             cast(NGWResource, self.resource(index)) for index in ids_for_fetch
         ]
 
-        worker = NGWMissingResourceUpdater(
-            resources, dangling_resources, recursive=True
+        worker = NgwSubtreesFetcher(
+            resources, dangling_resources, self.__has_new_search_api()
         )
-        return self._startJob(worker, lock_indexes=indexes_for_fetch)
+        return worker, indexes_for_fetch
 
-    @modelRequest
-    def fetch_missing(
+    def __resources_downloader(
         self, resources_id: List[int]
-    ) -> Optional[NGWResourcesModelJob]:
+    ) -> Optional[Tuple[NGWResourceModelJob, List[QModelIndex]]]:
         def is_not_downloaded(resource_id: int) -> bool:
             resource = self.resource(resource_id)
             return resource is None and not self.is_forbidden(resource_id)
@@ -1424,20 +2523,30 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
         worker = ResourcesDownloader(
             self._ngw_connection.connection_id, not_donloaded_resources_id
         )
-        return self._startJob(worker)
+        return worker, []
 
     @modelRequest
     def search(self, search_string) -> Optional[NGWResourcesModelJob]:
-        has_new_search_api = self.ngw_version is not None and parse_version(
-            self.ngw_version
-        ) >= parse_version("5.0.0.dev13")
         worker = NgwSearch(
             search_string,
             self.__collect_populated_resources(),
-            has_new_search_api,
+            self.__has_new_search_api(),
+            self._search_index,
+            self._resources_id(),
         )
+        worker.found_resources_updated.connect(self.__update_found_resources)
         return self._startJob(worker)
 
+    def __update_found_resources(self, resources_id: List[int]) -> None:
+        """Show partial search results while search is in progress"""
+        self.found_resources_changed.emit(resources_id)
+        self._found_resources_id = resources_id
+
+    def __has_new_search_api(self) -> bool:
+        return self.ngw_version is not None and parse_version(
+            self.ngw_version
+        ) >= parse_version("5.0.0.dev13")
+
     def reset_search(self) -> None:
         self.found_resources_changed.emit([])
         self._found_resources_id = []
@@ -1446,9 +2555,33 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
     def download_vector_layers_if_needed(
         self, indexes: Union[QModelIndex, List[QModelIndex]]
     ):
+        job_params = self.__vector_layers_stubs_creator(indexes)
+        if job_params is None:
+            return None
+        return self._startJob(*job_params)
+
+    @modelRequest
+    def fetch_missing_styles(
+        self, resources_id: List[int]
+    ) -> Optional[NGWResourcesModelJob]:
+        job_params = self.__styles_downloader(resources_id)
+        if job_params is None:
+            return None
+        return self._startJob(*job_params)
+
+    def __vector_layers_stubs_creator(
+        self, indexes: Union[QModelIndex, List[QModelIndex]]
+    ) -> Optional[Tuple[NGWResourceModelJob, List[QModelIndex]]]:
         cache_manager = NgConnectCacheManager()
         connections_manager = NgwConnectionsManager()
 
+        def need_stub(resource_id: int, instance_subdir: str) -> bool:
+            if resource_id in self.__failed_stubs_id:
+                return False
+            return not cache_manager.exists(
+                f"{instance_subdir}/{resource_id}.gpkg"
+            )
+
         def collect_indexes(
             index: QModelIndex,
         ) -> Tuple[List[QModelIndex], List[QModelIndex]]:
@@ -1460,11 +2593,9 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
             instance_subdir = connection.domain_uuid
 
             if isinstance(ngw_resource, NGWVectorLayer):
-                if cache_manager.exists(
-                    f"{instance_subdir}/{ngw_resource.resource_id}.gpkg"
-                ):
-                    return [index], []
-                return [index], [index]
+                if need_stub(ngw_resource.resource_id, instance_subdir):
+                    return [index], [index]
+                return [index], []
 
             if isinstance(ngw_resource, NGWQGISVectorStyle):
                 parent = index.parent()
@@ -1472,19 +2603,18 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
                 if not isinstance(parent_resource, NGWVectorLayer):
                     return [], []
 
-                if cache_manager.exists(
-                    f"{instance_subdir}/{parent_resource.resource_id}.gpkg"
-                ):
-                    return [parent, index], []
-                return [parent, index], [parent]
+                if need_stub(parent_resource.resource_id, instance_subdir):
+                    return [parent, index], [parent]
+                return [parent, index], []
 
             if not isinstance(ngw_resource, NGWGroupResource):
                 return [], []
 
             indexes_for_lock: List[QModelIndex] = []
             indexes_for_fetch: List[QModelIndex] = []
-            for row in range(self.rowCount(index)):
-                child_index = self.index(row, 0, index)
+            for child in self.children_resources(index):
+                child_index = self.index_from_id(child.resource_id)
+                assert child_index is not None
                 lock_indexes, fetch_indexes = collect_indexes(child_index)
                 indexes_for_lock.extend(lock_indexes)
                 indexes_for_fetch.extend(fetch_indexes)
@@ -1507,9 +2637,7 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
                 assert connection is not None
                 instance_subdir = connection.domain_uuid
 
-                if cache_manager.exists(
-                    f"{instance_subdir}/{ngw_resource.resource_id}.gpkg"
-                ):
+                if not need_stub(ngw_resource.resource_id, instance_subdir):
                     continue
 
                 result.append(ngw_resource)
@@ -1540,13 +2668,18 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
         if len(vector_layers) == 0:
             return None
 
-        worker = NgwCreateVectorLayersStubs(vector_layers)
-        return self._startJob(worker, lock_indexes=list(set(indexes_for_lock)))
+        worker = NgwCreateVectorLayersStubs(
+            vector_layers, self.__has_new_search_api()
+        )
+        worker.layers_failed.connect(self.__skip_failed_stubs)
+        return worker, list(set(indexes_for_lock))
 
-    @modelRequest
-    def fetch_missing_styles(
+    def __skip_failed_stubs(self, resources_id: List[int]) -> None:
+        self.__failed_stubs_id.update(resources_id)
+
+    def __styles_downloader(
         self, resources_id: List[int]
-    ) -> Optional[NGWResourcesModelJob]:
+    ) -> Optional[Tuple[NGWResourceModelJob, List[QModelIndex]]]:
         if len(resources_id) == 0:
             return None
 
@@ -1562,7 +2695,7 @@ class QNGWResourceTreeModel(QNGWResourceTreeModelBase):
         ]
 
         worker = NgwStylesDownloader(resources)  # type: ignore
-        return self._startJob(worker, lock_indexes=list(set(indexes_for_lock)))
+        return worker, list(set(indexes_for_lock))
 
     def __collect_populated_resources(
         self,
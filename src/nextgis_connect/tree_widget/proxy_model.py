@@ -1,29 +1,63 @@
-from typing import List, Optional, cast
+from typing import Dict, List, Optional, Set, cast
 
-from qgis.PyQt.QtCore import QModelIndex, QObject, QSortFilterProxyModel
+from qgis.PyQt.QtCore import (
+    QAbstractItemModel,
+    QModelIndex,
+    QObject,
+    QSortFilterProxyModel,
+)
 
 from .model import QNGWResourceItem, QNGWResourceTreeModel
 
 
 class NgConnectProxyModel(QSortFilterProxyModel):
+    """
+    Shows found resources with their ancestors and descendants.
+
+    Found resources and their ancestors are collected once per search, so
+    each row is accepted by set lookup. Whether a row lies inside a found
+    resource is memoized per resource, so rows fetched later are checked
+    without walking up to the root.
+    """
+
+    __resources_id: Set[int]
+    __visible_resources_id: Set[int]
+    __inside_found: Dict[int, bool]
+    __expanded_resources: List[int]
+
     def __init__(self, parent: Optional[QObject]) -> None:
         super().__init__(parent)
         self.setDynamicSortFilter(True)
-        self.__resources_id = []
-        self.__expandex_resources = []
+        self.__resources_id = set()
+        self.__visible_resources_id = set()
+        self.__inside_found = {}
+        self.__expanded_resources = []
+
+    def setSourceModel(self, source_model: QAbstractItemModel) -> None:
+        previous_model = self.sourceModel()
+        if previous_model is not None:
+            previous_model.modelReset.disconnect(self.__reset_cache)
+            previous_model.rowsRemoved.disconnect(self.__reset_cache)
+
+        super().setSourceModel(source_model)
+
+        if source_model is not None:
+            source_model.modelReset.connect(self.__reset_cache)
+            source_model.rowsRemoved.connect(self.__reset_cache)
 
     def set_resources_id(self, resources_id: List[int]) -> None:
-        self.__resources_id = resources_id
+        self.__resources_id = set(resources_id)
+        self.__inside_found = {}
+        self.__collect_resources()
 
         self.invalidateFilter()
 
         self.layoutAboutToBeChanged.emit()
-        self.__extract_expanded_resources()
         self.layoutChanged.emit()
 
     @property
     def expanded_resources(self) -> List[int]:
-        return self.__expandex_resources
+        return self.__expanded_resources
 
     def filterAcceptsRow(
         self, source_row: int, source_parent: QModelIndex
@@ -32,85 +66,61 @@ class NgConnectProxyModel(QSortFilterProxyModel):
             return True
 
         source_index = self.sourceModel().index(source_row, 0, source_parent)
-        return (
-            self.__accept_resource(source_index)
-            or self.__accept_ancestor(source_index)
-            or self.__accept_descendant(source_index)
-        )
-
-    def __accept_resource(self, source_index: QModelIndex) -> bool:
         resource_id = source_index.data(QNGWResourceItem.NGWResourceIdRole)
+        return resource_id in self.__visible_resources_id or (
+            self.__is_inside_found(source_parent)
+        )
 
-        return resource_id in self.__resources_id
-
-    def __accept_ancestor(self, source_index: QModelIndex) -> bool:
-        parent_index = source_index.parent()
-        if not parent_index.isValid():
+    def __is_inside_found(self, source_index: QModelIndex) -> bool:
+        """Check if resource or any of its ancestors is found"""
+        if not source_index.isValid():
             return False
 
-        if self.__accept_resource(parent_index):
-            return True
-
-        return self.__accept_ancestor(parent_index)
-
-    def __accept_descendant(self, source_index: QModelIndex) -> bool:
-        for row in range(self.sourceModel().rowCount(source_index)):
-            child_index = self.sourceModel().index(row, 0, source_index)
-            if self.__accept_resource(child_index):
-                return True
-            if self.__accept_descendant(child_index):
-                return True
-
-        return False
-
-    def __extract_expanded_resources(self) -> None:
-        self.__expandex_resources = []
-
-        if self.sourceModel() is None or (
-            len(self.__resources_id) == 1 and self.__resources_id[0] == -1
-        ):
+        resource_id = source_index.data(QNGWResourceItem.NGWResourceIdRole)
+        is_inside_found = self.__inside_found.get(resource_id)
+        if is_inside_found is None:
+            is_inside_found = resource_id in self.__resources_id or (
+                self.__is_inside_found(source_index.parent())
+            )
+            self.__inside_found[resource_id] = is_inside_found
+
+        return is_inside_found
+
+    def __collect_resources(self) -> None:
+        """
+        Collect found resources with their ancestors and ancestors of found
+        resources closest to root which should be expanded
+        """
+        self.__visible_resources_id = set(self.__resources_id)
+        self.__expanded_resources = []
+
+        if self.sourceModel() is None or self.__resources_id == {-1}:
             return
 
         model = cast(QNGWResourceTreeModel, self.sourceModel())
-
-        closest_to_root = self.__extract_closest_to_root()
         expanded_resources = set()
 
-        for resource_id in closest_to_root:
-            index = model.index_from_id(resource_id)
-            while index and index.isValid():
-                parent = index.parent()
-                if not parent.isValid():
-                    break
-                parent_id = model.resource(parent).resource_id
-                expanded_resources.add(parent_id)
-                index = parent
-
-        self.__expandex_resources = list(expanded_resources)
-
-    def __extract_closest_to_root(self) -> List[int]:
-        closest_to_root = set()
-
-        model = cast(QNGWResourceTreeModel, self.sourceModel())
-
         for resource_id in self.__resources_id:
             index = model.index_from_id(resource_id)
+            if index is None:
+                continue
 
+            ancestors_id = []
             has_parent_in_found_list = False
 
-            while index and index.isValid():
-                parent = index.parent()
-                if not parent.isValid():
-                    break
-
-                parent_id = model.resource(parent).resource_id
+            parent = index.parent()
+            while parent.isValid():
+                parent_id = parent.data(QNGWResourceItem.NGWResourceIdRole)
+                ancestors_id.append(parent_id)
                 if parent_id != 0 and parent_id in self.__resources_id:
                     has_parent_in_found_list = True
-                    break
-
-                index = parent
+                parent = parent.parent()
 
+            self.__visible_resources_id.update(ancestors_id)
             if not has_parent_in_found_list:
-                closest_to_root.add(resource_id)
+                expanded_resources.update(ancestors_id)
+
+        self.__expanded_resources = list(expanded_resources)
 
-        return list(closest_to_root)
+    def __reset_cache(self, *args) -> None:
+        self.__inside_found = {}
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional
+
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
+from nextgis_connect.ngw_connection import NgwConnectionsManager
+from nextgis_connect.settings.ng_connect_cache_manager import (
+    NgConnectCacheManager,
+)
+
+ResourceJson = Dict[str, Any]
+
+
+class ResourcesTreeCache:
+    """
+    Persistent cache of fetched resources tree of NGW instance.
+
+    Resources JSON are stored in SQLite database in the instance
+    subdirectory of the plugin cache. Resources are partitioned by
+    connection, since different users see different resources. Children are
+    stored only as complete lists, so restored branches match the fetched
+    ones.
+    """
+
+    FILE_NAME: ClassVar[str] = "resources_tree.sqlite"
+
+    __path: Path
+    __connection_id: str
+
+    def __init__(self, path: Path, connection_id: str) -> None:
+        self.__path = path
+        self.__connection_id = connection_id
+
+    @classmethod
+    def for_connection(
+        cls, connection_id: str
+    ) -> Optional["ResourcesTreeCache"]:
+        connection = NgwConnectionsManager().connection(connection_id)
+        if connection is None:
+            return None
+
+        cache_directory = Path(NgConnectCacheManager().cache_directory)
+        instance_cache_path = cache_directory / connection.domain_uuid
+        instance_cache_path.mkdir(parents=True, exist_ok=True)
+        return cls(instance_cache_path / cls.FILE_NAME, connection_id)
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @staticmethod
+    def etag(resource_json: ResourceJson) -> str:
+        """Digest of resource JSON to find changed resources"""
+        serialized_json = json.dumps(resource_json, sort_keys=True)
+        return hashlib.sha1(serialized_json.encode()).hexdigest()
+
+    def root(self) -> Optional[ResourceJson]:
+        with closing(self.__connect()) as connection:
+            row = connection.execute(
+                """
+                SELECT json FROM ngw_resources
+                WHERE connection_id = ? AND parent_id IS NULL
+                """,
+                (self.__connection_id,),
+            ).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    def branches(self) -> Dict[int, List[ResourceJson]]:
+        """Cached children lists by parent id"""
+        with closing(self.__connect()) as connection:
+            rows = connection.execute(
+                """
+                SELECT parent.resource_id, child.json
+                FROM ngw_resources parent
+                LEFT JOIN ngw_resources child
+                    ON child.connection_id = parent.connection_id
+                    AND child.parent_id = parent.resource_id
+                WHERE parent.connection_id = ? AND parent.is_children_cached
+                """,
+                (self.__connection_id,),
+            ).fetchall()
+
+        branches: Dict[int, List[ResourceJson]] = {}
+        for parent_id, resource_json in rows:
+            children_json = branches.setdefault(parent_id, [])
+            if resource_json is not None:
+                children_json.append(json.loads(resource_json))
+        return branches
+
+    def store_root(self, resource_json: ResourceJson) -> None:
+        with closing(self.__connect()) as connection, connection:
+            self.__upsert(connection.cursor(), None, [resource_json])
+
+    def store_branches(self, branches: Dict[int, List[ResourceJson]]) -> None:
+        """
+        Replace cached children of resources.
+
+        Subtrees of children which are absent in the new lists are removed.
+        """
+        with closing(self.__connect()) as connection, connection:
+            cursor = connection.cursor()
+            for parent_id, children_json in branches.items():
+                children_id = (
+                    child_json["resource"]["id"]
+                    for child_json in children_json
+                )
+                with temporary_ids_table(cursor, children_id) as ids_table:
+                    cursor.execute(
+                        f"""
+                        WITH RECURSIVE removed(resource_id) AS (
+                            SELECT resource_id FROM ngw_resources
+                            WHERE connection_id = :connection_id
+                                AND parent_id = :parent_id
+                                AND resource_id NOT IN (
+                                    SELECT id FROM {ids_table}
+                                )
+                            UNION
+                            SELECT resources.resource_id
+                            FROM ngw_resources resources
+                            JOIN removed
+                                ON resources.parent_id = removed.resource_id
+                            WHERE resources.connection_id = :connection_id
+                        )
+                        DELETE FROM ngw_resources
+                        WHERE connection_id = :connection_id
+                            AND resource_id IN (
+                                SELECT resource_id FROM removed
+                            )
+                        """,
+                        {
+                            "connection_id": self.__connection_id,
+                            "parent_id": parent_id,
+                        },
+                    )
+
+                self.__upsert(cursor, parent_id, children_json)
+                cursor.execute(
+                    """
+                    UPDATE ngw_resources SET is_children_cached = 1
+                    WHERE connection_id = ? AND resource_id = ?
+                    """,
+                    (self.__connection_id, parent_id),
+                )
+
+    def clear(self) -> None:
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM ngw_resources WHERE connection_id = ?",
+                (self.__connection_id,),
+            )
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.__path))
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ngw_resources (
+                connection_id TEXT NOT NULL,
+                resource_id INTEGER NOT NULL,
+                parent_id INTEGER,
+                json TEXT NOT NULL,
+                is_children_cached INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (connection_id, resource_id)
+            );
+            CREATE INDEX IF NOT EXISTS ngw_resources_parent_idx
+                ON ngw_resources (connection_id, parent_id);
+            """
+        )
+        return connection
+
+    def __upsert(
+        self,
+        cursor: sqlite3.Cursor,
+        parent_id: Optional[int],
+        resources_json: List[ResourceJson],
+    ) -> None:
+        cursor.executemany(
+            """
+            INSERT INTO ngw_resources
+                (connection_id, resource_id, parent_id, json)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (connection_id, resource_id) DO UPDATE SET
+                parent_id = excluded.parent_id,
+                json = excluded.json
+            """,
+            (
+                (
+                    self.__connection_id,
+                    resource_json["resource"]["id"],
+                    parent_id,
+                    json.dumps(resource_json),
+                )
+                for resource_json in resources_json
+            ),
+        )
@@ -345,11 +345,17 @@ class QNGWResourceTreeView(QTreeView):
 
         super().setModel(self._proxy_model)
 
+        # Tree may be restored from cache on reset
+        self._proxy_model.modelReset.connect(self.__resetProcess)
+
     def __insertRowsProcess(self, parent: QModelIndex):
         if not parent.isValid():
             self.expandToDepth(0)
             return
 
+    def __resetProcess(self):
+        self.expandToDepth(0)
+
     def __expand_filtered(self) -> None:
         for resource_id in self._proxy_model.expanded_resources:  # type: ignore
             index = self._source_model.index_from_id(resource_id)
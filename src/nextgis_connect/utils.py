@@ -1,3 +1,4 @@
+import functools
 import platform
 from enum import Enum, auto
 from itertools import islice
@@ -19,8 +20,7 @@ from qgis.PyQt.QtCore import (
     QSize,
     Qt,
 )
-from qgis.PyQt.QtGui import QClipboard, QIcon, QPainter, QPixmap
-from qgis.PyQt.QtSvg import QSvgRenderer
+from qgis.PyQt.QtGui import QClipboard, QIcon
 from qgis.PyQt.QtWidgets import (
     QAction,
     QDialog,
@@ -34,6 +34,7 @@ from qgis.PyQt.QtWidgets import (
 from qgis.utils import iface
 
 from nextgis_connect.compat import QGIS_3_30
+from nextgis_connect.core.icon_cache import IconCache
 from nextgis_connect.core.ui.about_dialog import AboutDialog
 from nextgis_connect.settings.ng_connect_settings import NgConnectSettings
 
@@ -259,34 +260,20 @@ def render_svg_icon(
     :type color: Optional[str]
     :param size: Output icon size in pixels. If None, use SVG default size.
     :type size: Optional[int]
-    :returns: Rendered QIcon.
+    :returns: Rendered QIcon shared through the icon cache.
     :rtype: QIcon
     :raises ValueError: If the SVG cannot be loaded.
     """
-    svg_content = svg_path.read_text(encoding="utf-8")
+    return IconCache.instance().svg_icon(svg_path, color=color, size=size)
 
-    # Replace only pure white fills to preserve multi-colored icons
-    if color:
-        modified_svg = svg_content.replace('fill="#ffffff"', f'fill="{color}"')
-        modified_svg = modified_svg.replace("fill:#ffffff", f"fill:{color}")
-    else:
-        modified_svg = svg_content
-
-    byte_array = QByteArray(modified_svg.encode("utf-8"))
-    renderer = QSvgRenderer()
-    if not renderer.load(byte_array):
-        message = f"Failed to load SVG: {svg_path}"
-        raise ValueError(message)
-
-    target_size = renderer.defaultSize() if size is None else QSize(size, size)
-    pixmap = QPixmap(target_size)
-    pixmap.fill(Qt.GlobalColor.transparent)
-
-    painter = QPainter(pixmap)
-    renderer.render(painter)
-    painter.end()
 
-    return QIcon(pixmap)
+@functools.lru_cache(maxsize=None)
+def _material_icon_path(name: str) -> Optional[Path]:
+    material_icons_path = Path(__file__).parent / "icons" / "material"
+    for path in material_icons_path.glob(f"{name}*"):
+        if path.is_file():
+            return path
+    return None
 
 
 def material_icon(
@@ -305,16 +292,9 @@ def material_icon(
     :raises FileNotFoundError: If the SVG file is not found.
     :raises ValueError: If the SVG cannot be loaded.
     """
-    material_icons_path = Path(__file__).parent / "icons" / "material"
-
-    svg_path = None
-    for path in material_icons_path.glob(f"{name}*"):
-        if path.is_file():
-            svg_path = path
-            break
-
+    svg_path = _material_icon_path(name)
     if svg_path is None:
-        message = f"SVG file not found: {svg_path}"
+        message = f"SVG file not found: {name}"
         raise FileNotFoundError(message)
 
     effective_color = color or QgsApplication.palette().text().color().name()
@@ -0,0 +1,76 @@
+import unittest
+from pathlib import Path
+
+import nextgis_connect
+from nextgis_connect.core.icon_cache import IconCache
+from tests.ng_connect_testcase import NgConnectTestCase
+
+ICONS_PATH = Path(nextgis_connect.__file__).parent / "icons"
+
+
+class TestIconCache(NgConnectTestCase):
+    def test_shared_icons(self) -> None:
+        cache = IconCache()
+        logo_path = ICONS_PATH / "logo.svg"
+
+        icon = cache.file_icon(logo_path)
+        self.assertIs(cache.file_icon(str(logo_path)), icon)
+        self.assertEqual(len(cache), 1)
+
+        check_path = ICONS_PATH / "material" / "check.svg"
+        red_icon = cache.svg_icon(check_path, color="#ff0000", size=16)
+        self.assertIs(
+            cache.svg_icon(check_path, color="#ff0000", size=16), red_icon
+        )
+        self.assertIsNot(
+            cache.svg_icon(check_path, color="#00ff00", size=16), red_icon
+        )
+        self.assertIsNot(
+            cache.svg_icon(check_path, color="#ff0000", size=24), red_icon
+        )
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(
+            cache.cost,
+            IconCache.FILE_ICON_COST + (16 * 16 + 16 * 16 + 24 * 24) * 4,
+        )
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.cost, 0)
+
+    def test_eviction(self) -> None:
+        icon_cost = 16 * 16 * 4
+        cache = IconCache(max_cost=icon_cost * 3)
+        check_path = ICONS_PATH / "material" / "check.svg"
+        colors = ["#000000", "#111111", "#222222", "#333333"]
+
+        icons = [
+            cache.svg_icon(check_path, color=color, size=16)
+            for color in colors[:3]
+        ]
+
+        # Touch the oldest icon
+        self.assertIs(
+            cache.svg_icon(check_path, color=colors[0], size=16), icons[0]
+        )
+
+        cache.svg_icon(check_path, color=colors[3], size=16)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.cost, icon_cost * 3)
+        self.assertIs(
+            cache.svg_icon(check_path, color=colors[0], size=16), icons[0]
+        )
+        self.assertIsNot(
+            cache.svg_icon(check_path, color=colors[1], size=16), icons[1]
+        )
+
+    def test_invalid_svg(self) -> None:
+        svg_path = self.create_temp_file(".svg")
+        svg_path.write_text("not svg")
+
+        with self.assertRaises(ValueError):
+            IconCache().svg_icon(svg_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sqlite3
+import unittest
+from contextlib import closing
+
+from nextgis_connect.core.sqlite_utils import temporary_ids_table
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestSqliteUtils(NgConnectTestCase):
+    def test_temporary_ids_table(self) -> None:
+        ids_count = 1_000_000
+
+        with closing(sqlite3.connect(":memory:")) as connection:
+            cursor = connection.cursor()
+            cursor.execute("CREATE TABLE features (fid INTEGER PRIMARY KEY)")
+            cursor.executemany(
+                "INSERT INTO features (fid) VALUES (?)",
+                ((fid,) for fid in range(0, 2 * ids_count, 2)),
+            )
+
+            with temporary_ids_table(cursor, range(ids_count)) as ids_table:
+                cursor.execute(
+                    f"""
+                    DELETE FROM features
+                    WHERE fid IN (SELECT id FROM {ids_table})
+                    """
+                )
+                self.assertEqual(cursor.rowcount, ids_count // 2)
+
+            # Table is dropped and its name is not reused
+            with temporary_ids_table(cursor, [1, 1, 2]) as other_table:
+                self.assertNotEqual(other_table, ids_table)
+                cursor.execute(f"SELECT count(*) FROM {other_table}")
+                self.assertEqual(cursor.fetchone()[0], 2)
+
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_temp_master WHERE type='table'"
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_temporary_ids_table_transaction(self) -> None:
+        with closing(sqlite3.connect(":memory:")) as connection:
+            cursor = connection.cursor()
+
+            # Filling table doesn't leave implicit transaction open
+            with temporary_ids_table(cursor, [1, 2, 3]):
+                self.assertFalse(connection.in_transaction)
+            self.assertFalse(connection.in_transaction)
+
+            # Transaction opened by caller is not committed
+            cursor.execute("CREATE TABLE features (fid INTEGER PRIMARY KEY)")
+            cursor.execute("INSERT INTO features (fid) VALUES (1)")
+            with temporary_ids_table(cursor, [1, 2, 3]):
+                self.assertTrue(connection.in_transaction)
+            connection.rollback()
+
+            cursor.execute("SELECT count(*) FROM features")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+import unittest
+from contextlib import closing
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from qgis.core import QgsFeature, QgsVectorLayer, edit
+
+from nextgis_connect.detached_editing.action_applier import ActionApplier
+from nextgis_connect.detached_editing.actions import (
+    FeatureCreateAction,
+    FeatureDeleteAction,
+    FeatureRestoreAction,
+    FeatureUpdateAction,
+)
+from nextgis_connect.detached_editing.utils import (
+    container_transaction,
+    make_connection,
+)
+from tests.detached_editing.utils import mock_container
+from tests.ng_connect_testcase import NgConnectTestCase, TestData
+
+
+class TestActionApplier(NgConnectTestCase):
+    @mock_container(
+        TestData.Points, is_versioning_enabled=True, extra_features_count=10
+    )
+    def test_apply(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        ngw_fids = self.__ngw_fids(container_mock)
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+
+        updated_fid, deleted_fid, restored_fid = ngw_fids[:3]
+        missing_fid = max(ngw_fids) + 1
+
+        applier = ActionApplier(container_mock.path, container_mock.metadata)
+        applier.apply(
+            [
+                FeatureUpdateAction(
+                    updated_fid, 2, fields=[[integer_field.ngw_id, 100500]]
+                ),
+                FeatureDeleteAction(deleted_fid, 2),
+                FeatureRestoreAction(
+                    restored_fid, 2, fields=[[integer_field.ngw_id, 42]]
+                ),
+                FeatureRestoreAction(
+                    missing_fid, 2, fields=[[integer_field.ngw_id, 7]]
+                ),
+            ]
+        )
+
+        with closing(make_connection(container_mock.path)) as connection:
+            versions = dict(
+                connection.execute(
+                    "SELECT ngw_fid, version FROM ngw_features_metadata"
+                )
+            )
+
+        self.assertEqual(versions[updated_fid], 2)
+        self.assertNotIn(deleted_fid, versions)
+        self.assertEqual(versions[restored_fid], 2)
+        self.assertEqual(versions[missing_fid], 2)
+        self.assertEqual(len(versions), len(ngw_fids))
+
+    @mock_container(
+        TestData.Points, is_versioning_enabled=True, extra_features_count=10
+    )
+    def test_apply_without_open_transaction(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        ngw_fids = self.__ngw_fids(container_mock)
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+
+        updated_fid, deleted_fid = ngw_fids[:2]
+        created_fid = max(ngw_fids) + 1
+
+        with container_transaction(container_mock.path) as cursor:
+            connection = cursor.connection
+
+        # Provider commits features through its own connection, so pooled
+        # connection must not hold container lock at that moment
+        transaction_states: List[bool] = []
+
+        def traced_edit(layer: QgsVectorLayer):
+            transaction_states.append(connection.in_transaction)
+            return edit(layer)
+
+        applier = ActionApplier(container_mock.path, container_mock.metadata)
+        with patch(
+            "nextgis_connect.detached_editing.action_applier.edit",
+            side_effect=traced_edit,
+        ):
+            applier.apply(
+                [
+                    FeatureCreateAction(
+                        created_fid, 2, fields=[[integer_field.ngw_id, 1]]
+                    ),
+                    FeatureUpdateAction(
+                        updated_fid, 2, fields=[[integer_field.ngw_id, 2]]
+                    ),
+                    FeatureDeleteAction(deleted_fid, 2),
+                ]
+            )
+
+        self.assertEqual(transaction_states, [False])
+        self.assertFalse(connection.in_transaction)
+
+        # Container is writable by provider and by pooled connection
+        with edit(qgs_layer):
+            qgs_layer.deleteFeature(next(qgs_layer.getFeatures()).id())
+        with container_transaction(container_mock.path) as cursor:
+            cursor.execute(
+                "UPDATE ngw_features_metadata SET version=3 WHERE ngw_fid=?",
+                (created_fid,),
+            )
+
+        with closing(make_connection(container_mock.path)) as other:
+            versions = dict(
+                other.execute(
+                    "SELECT ngw_fid, version FROM ngw_features_metadata"
+                )
+            )
+
+        self.assertEqual(versions[created_fid], 3)
+        self.assertEqual(versions[updated_fid], 2)
+        self.assertNotIn(deleted_fid, versions)
+
+    @mock_container(
+        TestData.Points, is_versioning_enabled=True, extra_features_count=10
+    )
+    def test_recover(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        ngw_fids = self.__ngw_fids(container_mock)
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+
+        updated_fid, deleted_fid = ngw_fids[:2]
+        created_fid = max(ngw_fids) + 1
+        actions = [
+            FeatureCreateAction(
+                created_fid, 2, fields=[[integer_field.ngw_id, 1]]
+            ),
+            FeatureUpdateAction(
+                updated_fid, 2, fields=[[integer_field.ngw_id, 2]]
+            ),
+            FeatureDeleteAction(deleted_fid, 2),
+        ]
+
+        with closing(make_connection(container_mock.path)) as connection:
+            deleted_metadata = connection.execute(
+                "SELECT * FROM ngw_features_metadata WHERE ngw_fid=?",
+                (deleted_fid,),
+            ).fetchone()
+
+        applier = ActionApplier(container_mock.path, container_mock.metadata)
+
+        inserted_fids: List[int] = []
+        applier.apply(actions, before_commit=inserted_fids.extend)
+        self.assertEqual(len(inserted_fids), 1)
+
+        # Features are committed, metadata is rolled back
+        with closing(make_connection(container_mock.path)) as connection:
+            with connection:
+                connection.execute(
+                    "DELETE FROM ngw_features_metadata WHERE fid=?",
+                    (inserted_fids[0],),
+                )
+                connection.execute(
+                    "INSERT INTO ngw_features_metadata VALUES (?, ?, ?, ?)",
+                    deleted_metadata,
+                )
+                connection.execute(
+                    "UPDATE ngw_features_metadata SET version=1"
+                    " WHERE ngw_fid=?",
+                    (updated_fid,),
+                )
+
+        # Metadata of local feature is not logged yet
+        with edit(qgs_layer):
+            qgs_layer.addFeature(QgsFeature(qgs_layer.fields()))
+
+        features_count = len(ngw_fids) + 1
+        self.assertEqual(self.__features_count(container_mock), features_count)
+        self.assertEqual(self.__ngw_fids(container_mock), ngw_fids)
+
+        applier.apply(applier.recover(actions, inserted_fids))
+
+        with closing(make_connection(container_mock.path)) as connection:
+            versions = dict(
+                connection.execute(
+                    "SELECT ngw_fid, version FROM ngw_features_metadata"
+                )
+            )
+
+        self.assertEqual(versions[created_fid], 2)
+        self.assertEqual(versions[updated_fid], 2)
+        self.assertNotIn(deleted_fid, versions)
+        self.assertEqual(len(versions), len(ngw_fids))
+        self.assertEqual(self.__features_count(container_mock), features_count)
+
+    def test_metadata_lookup_count(self) -> None:
+        features_counts = (200, 800)
+        lookups_counts: List[int] = []
+
+        for features_count in features_counts:
+
+            @mock_container(
+                TestData.Points,
+                is_versioning_enabled=True,
+                extra_features_count=features_count,
+            )
+            def count_lookups(
+                self: "TestActionApplier",
+                container_mock: MagicMock,
+                qgs_layer: QgsVectorLayer,
+            ) -> None:
+                lookups_counts.append(
+                    self.__count_metadata_lookups(container_mock)
+                )
+
+            count_lookups(self)
+
+        # Metadata is fetched in bulk, not per action
+        self.assertEqual(lookups_counts[0], lookups_counts[1])
+
+    def __count_metadata_lookups(self, container_mock: MagicMock) -> int:
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+        actions = [
+            FeatureUpdateAction(
+                ngw_fid, 2, fields=[[integer_field.ngw_id, ngw_fid]]
+            )
+            for ngw_fid in self.__ngw_fids(container_mock)
+        ]
+
+        applier = ActionApplier(container_mock.path, container_mock.metadata)
+
+        statements: List[str] = []
+        with container_transaction(container_mock.path) as cursor:
+            connection = cursor.connection
+        connection.set_trace_callback(statements.append)
+        try:
+            applier.apply(actions)
+        finally:
+            connection.set_trace_callback(None)
+
+        return sum(
+            1
+            for statement in statements
+            if statement.lstrip().upper().startswith("SELECT")
+            and "ngw_features_metadata" in statement
+        )
+
+    def __features_count(self, container_mock: MagicMock) -> int:
+        table_name = container_mock.metadata.table_name
+        with closing(make_connection(container_mock.path)) as connection:
+            return connection.execute(
+                f"SELECT COUNT(*) FROM '{table_name}'"
+            ).fetchone()[0]
+
+    def __ngw_fids(self, container_mock: MagicMock) -> List[int]:
+        with closing(make_connection(container_mock.path)) as connection:
+            return [
+                row[0]
+                for row in connection.execute(
+                    "SELECT ngw_fid FROM ngw_features_metadata ORDER BY fid"
+                )
+            ]
+
+
+if __name__ == "__main__":
+    unittest.main()
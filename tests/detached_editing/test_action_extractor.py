@@ -0,0 +1,149 @@
+import unittest
+from contextlib import closing
+from typing import Dict
+from unittest.mock import MagicMock, patch
+
+from qgis.core import QgsVectorLayer
+
+from nextgis_connect.detached_editing.action_extractor import ActionExtractor
+from nextgis_connect.detached_editing.actions import (
+    ActionType,
+    FeatureDeleteAction,
+    FeatureUpdateAction,
+)
+from nextgis_connect.detached_editing.conflicts.detector import (
+    ConflictsDetector,
+)
+from nextgis_connect.detached_editing.utils import make_connection
+from tests.detached_editing.utils import mock_container
+from tests.ng_connect_testcase import NgConnectTestCase, TestData
+
+
+class TestActionExtractor(NgConnectTestCase):
+    @mock_container(
+        TestData.Points, is_versioning_enabled=True, extra_features_count=20
+    )
+    def test_iter_all(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        ngw_fids = self.__mark_changes(container_mock)
+
+        extractor = ActionExtractor(
+            container_mock.path, container_mock.metadata
+        )
+        with patch.object(ActionExtractor, "EXTRACTION_CHUNK_SIZE", 2):
+            actions = list(extractor.iter_all())
+
+        self.assertEqual(
+            [(action.action, action.fid) for action in actions],
+            [(ActionType.FEATURE_CREATE, fid) for fid in range(1, 6)]
+            + [
+                (ActionType.FEATURE_DELETE, ngw_fids[fid])
+                for fid in range(6, 9)
+            ]
+            + [(ActionType.FEATURE_RESTORE, ngw_fids[9])]
+            + [
+                (ActionType.FEATURE_UPDATE, ngw_fids[fid])
+                for fid in range(10, 17)
+            ],
+        )
+
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+        updated_actions = {
+            action.fid: action
+            for action in actions
+            if isinstance(action, FeatureUpdateAction)
+        }
+        for fid in range(10, 17):
+            action = updated_actions[ngw_fids[fid]]
+            self.assertEqual(action.geom is not None, fid >= 12)
+            self.assertEqual(
+                [field_id for field_id, _ in action.fields],
+                [integer_field.ngw_id] if fid <= 14 else [],
+            )
+
+        # Lists are the same as streams
+        self.assertEqual(
+            len(extractor.extract_all()), len(list(extractor.iter_all()))
+        )
+
+    @mock_container(
+        TestData.Points, is_versioning_enabled=True, extra_features_count=20
+    )
+    def test_detect_conflicts(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        ngw_fids = self.__mark_changes(container_mock)
+
+        remote_actions = [
+            FeatureDeleteAction(ngw_fids[fid], 2) for fid in (7, 12, 20)
+        ]
+
+        detector = ConflictsDetector(
+            container_mock.path, container_mock.metadata
+        )
+        with patch.object(
+            ActionExtractor, "EXTRACTION_CHUNK_SIZE", 2
+        ), patch.object(
+            ActionExtractor,
+            "iter_existing_features",
+            autospec=True,
+            side_effect=ActionExtractor.iter_existing_features,
+        ) as iter_mock:
+            # Remote actions are checked page by page
+            conflicts = detector.detect(remote_actions[:1])
+            conflicts += detector.detect(remote_actions[1:])
+
+            # Local changes are extracted once for all pages
+            self.assertEqual(iter_mock.call_count, 1)
+
+            detector.reset()
+            detector.detect(remote_actions)
+            self.assertEqual(iter_mock.call_count, 2)
+
+        self.assertEqual(
+            sorted(conflict.remote_action.fid for conflict in conflicts),
+            sorted([ngw_fids[7], ngw_fids[12]]),
+        )
+
+    def __mark_changes(self, container_mock: MagicMock) -> Dict[int, int]:
+        integer_field = container_mock.metadata.fields.get_with(
+            keyname="INTEGER"
+        )
+
+        with closing(make_connection(container_mock.path)) as connection:
+            connection.executemany(
+                "INSERT INTO ngw_added_features (fid) VALUES (?)",
+                ((fid,) for fid in range(5, 0, -1)),
+            )
+            connection.executemany(
+                "INSERT INTO ngw_removed_features (fid) VALUES (?)",
+                ((fid,) for fid in range(6, 9)),
+            )
+            connection.execute(
+                "INSERT INTO ngw_restored_features (fid) VALUES (9)"
+            )
+            connection.executemany(
+                """
+                INSERT INTO ngw_updated_attributes (fid, attribute)
+                VALUES (?, ?)
+                """,
+                ((fid, integer_field.attribute) for fid in range(10, 15)),
+            )
+            connection.executemany(
+                "INSERT INTO ngw_updated_geometries (fid) VALUES (?)",
+                ((fid,) for fid in range(12, 17)),
+            )
+            connection.commit()
+
+            return dict(
+                connection.execute(
+                    "SELECT fid, ngw_fid FROM ngw_features_metadata"
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import threading
+import unittest
+
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+    ContainerConnectionSettings,
+)
+from nextgis_connect.settings import NgConnectSettings
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestContainerConnectionPool(NgConnectTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pool = ContainerConnectionPool()
+        self.path = self.create_temp_file(".gpkg")
+        with self.pool.transaction(self.path) as cursor:
+            cursor.execute("CREATE TABLE test (value INTEGER)")
+
+    def tearDown(self) -> None:
+        self.pool.close_all()
+        super().tearDown()
+
+    def test_connection_reuse(self) -> None:
+        with self.pool.transaction(self.path) as cursor:
+            first_connection = cursor.connection
+
+        with self.pool.transaction(self.path) as cursor:
+            self.assertIs(cursor.connection, first_connection)
+
+        self.assertEqual(self.pool.connections_count, 1)
+
+    def test_connection_serial(self) -> None:
+        with self.pool.transaction(self.path) as cursor:
+            first_serial = cursor.connection.serial
+
+        self.pool.close_all()
+
+        # Closed connection address may be reused, serial is not
+        with self.pool.transaction(self.path) as cursor:
+            self.assertNotEqual(cursor.connection.serial, first_serial)
+
+    def test_thread_affinity(self) -> None:
+        with self.pool.transaction(self.path) as cursor:
+            main_connection = cursor.connection
+
+        worker_connections = []
+
+        def worker() -> None:
+            with self.pool.transaction(self.path) as cursor:
+                worker_connections.append(cursor.connection)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(worker_connections), 1)
+        self.assertIsNot(worker_connections[0], main_connection)
+        self.assertEqual(self.pool.connections_count, 2)
+
+    def test_nested_transactions(self) -> None:
+        with self.subTest("Commit"):
+            with self.pool.transaction(self.path) as cursor:
+                cursor.execute("INSERT INTO test VALUES (1)")
+                with self.pool.transaction(self.path) as nested_cursor:
+                    nested_cursor.execute("INSERT INTO test VALUES (2)")
+                self.assertTrue(cursor.connection.in_transaction)
+
+            with self.pool.transaction(self.path) as cursor:
+                cursor.execute("SELECT COUNT(*) FROM test")
+                self.assertEqual(cursor.fetchone()[0], 2)
+
+        with self.subTest("Rollback"):
+            with self.assertRaises(RuntimeError):
+                with self.pool.transaction(self.path) as cursor:
+                    cursor.execute("INSERT INTO test VALUES (3)")
+                    with self.pool.transaction(self.path) as nested_cursor:
+                        nested_cursor.execute("INSERT INTO test VALUES (4)")
+                    raise RuntimeError
+
+            with self.pool.transaction(self.path) as cursor:
+                cursor.execute("SELECT COUNT(*) FROM test")
+                self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_pragmas(self) -> None:
+        self.pool.settings = ContainerConnectionSettings(
+            synchronous="OFF", cache_size=-1024
+        )
+        with self.pool.transaction(self.path) as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -1024)
+            cursor.execute("PRAGMA foreign_keys")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_pragmas_from_settings(self) -> None:
+        # Defaults are the same as without plugin settings
+        self.assertEqual(
+            ContainerConnectionSettings.from_settings(),
+            ContainerConnectionSettings(),
+        )
+
+        settings = NgConnectSettings()
+        synchronous = settings.container_synchronous
+        busy_timeout = settings.container_busy_timeout
+        try:
+            settings.container_synchronous = "full"
+            settings.container_busy_timeout = 100
+            connection_settings = ContainerConnectionSettings.from_settings()
+            self.assertEqual(connection_settings.synchronous, "FULL")
+            self.assertEqual(connection_settings.busy_timeout, 100)
+
+            # Unknown mode is not passed to SQLite
+            settings.container_synchronous = "NORMAL; DROP TABLE test"
+            connection_settings = ContainerConnectionSettings.from_settings()
+            self.assertIsNone(connection_settings.synchronous)
+        finally:
+            settings.container_synchronous = synchronous
+            settings.container_busy_timeout = busy_timeout
+
+    def test_close(self) -> None:
+        with self.pool.transaction(self.path):
+            pass
+        self.assertEqual(self.pool.connections_count, 1)
+
+        self.pool.close(self.path)
+        self.assertEqual(self.pool.connections_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
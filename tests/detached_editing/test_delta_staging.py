@@ -0,0 +1,169 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from qgis.core import QgsVectorLayer
+
+from nextgis_connect.detached_editing.actions import (
+    ContinueAction,
+    DescriptionPutAction,
+    FeatureCreateAction,
+    FeatureDeleteAction,
+    FeatureUpdateAction,
+)
+from nextgis_connect.detached_editing.delta_staging import (
+    DeltaStage,
+    DeltaStaging,
+)
+from tests.detached_editing.utils import mock_container
+from tests.ng_connect_testcase import NgConnectTestCase, TestData
+
+
+class TestDeltaStaging(NgConnectTestCase):
+    @mock_container(TestData.Points, is_versioning_enabled=True)
+    def test_fetching(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        staging = DeltaStaging(container_mock.path, container_mock.metadata)
+        self.assertIsNone(staging.state)
+
+        timestamp = datetime(2024, 1, 1, 12, 0, 0)
+        staging.begin(5, timestamp, "/fetch/1")
+
+        state = staging.state
+        assert state is not None
+        self.assertEqual(state.target, 5)
+        self.assertEqual(state.timestamp, timestamp)
+        self.assertEqual(state.next_url, "/fetch/1")
+        self.assertEqual(state.stage, DeltaStage.Fetching)
+
+        staging.append_page(
+            [
+                FeatureCreateAction(100, 2, geom="POINT (1 1)"),
+                FeatureUpdateAction(1, 3, fields=[[1, "value"]]),
+                ContinueAction("/fetch/2"),
+            ],
+            "/fetch/2",
+        )
+
+        state = staging.state
+        assert state is not None
+        self.assertEqual(state.next_url, "/fetch/2")
+        self.assertEqual(state.stage, DeltaStage.Fetching)
+
+        staging.append_page(
+            [FeatureDeleteAction(2, 4), DescriptionPutAction(3, 5, "text")],
+            None,
+        )
+
+        state = staging.state
+        assert state is not None
+        self.assertIsNone(state.next_url)
+        self.assertEqual(state.stage, DeltaStage.Fetched)
+        self.assertEqual(staging.actions_count, 4)
+
+        pages = list(staging.pages())
+        self.assertEqual(len(pages), 2)
+
+        first_page = pages[0][1]
+        self.assertIsInstance(first_page[0], FeatureCreateAction)
+        self.assertEqual(first_page[0].geom, "POINT (1 1)")
+        self.assertIsInstance(first_page[1], FeatureUpdateAction)
+        self.assertEqual(first_page[1].fields, [(1, "value")])
+
+        second_page = pages[1][1]
+        self.assertIsInstance(second_page[0], FeatureDeleteAction)
+        self.assertIsInstance(second_page[1], DescriptionPutAction)
+        self.assertEqual(second_page[1].value, "text")
+
+    @mock_container(TestData.Points, is_versioning_enabled=True)
+    def test_checkpoint(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        staging = DeltaStaging(container_mock.path, container_mock.metadata)
+        staging.begin(5, datetime.now(), "/fetch/1")
+
+        state = staging.state
+        assert state is not None
+        self.assertEqual(state.applied_count, 0)
+
+        staging.begin_apply([5, 6])
+        state = staging.state
+        assert state is not None
+        self.assertTrue(state.is_applying)
+        self.assertEqual(staging.inserted_fids, [5, 6])
+
+        staging.checkpoint("/fetch/2", 1000)
+        state = staging.state
+        assert state is not None
+        self.assertEqual(state.next_url, "/fetch/2")
+        self.assertEqual(state.applied_count, 1000)
+        self.assertEqual(state.stage, DeltaStage.Fetching)
+        self.assertFalse(state.is_applying)
+        self.assertEqual(staging.inserted_fids, [])
+
+        staging.checkpoint(None, 1500)
+        state = staging.state
+        assert state is not None
+        self.assertIsNone(state.next_url)
+        self.assertEqual(state.applied_count, 1500)
+        self.assertEqual(state.stage, DeltaStage.Fetched)
+        self.assertEqual(staging.actions_count, 0)
+
+    @mock_container(TestData.Points, is_versioning_enabled=True)
+    def test_processing(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        staging = DeltaStaging(container_mock.path, container_mock.metadata)
+        staging.begin(5, datetime.now(), "/fetch/1")
+        staging.append_page([FeatureDeleteAction(1, 2)], "/fetch/2")
+        staging.append_page([FeatureDeleteAction(2, 3)], "/fetch/3")
+        staging.append_page([FeatureDeleteAction(3, 4)], None)
+
+        first_id, second_id, third_id = (
+            page_id for page_id, _ in staging.pages()
+        )
+
+        with self.subTest("Replace"):
+            staging.replace_page(second_id, [])
+            staging.replace_page(
+                third_id,
+                [FeatureDeleteAction(4, 4), FeatureDeleteAction(5, 4)],
+            )
+            staging.add_page([FeatureDeleteAction(6, 5)])
+
+            fids = [
+                action.fid
+                for _, actions in staging.pages()
+                for action in actions
+            ]
+            self.assertEqual(fids, [1, 4, 5, 6])
+            self.assertEqual(staging.actions_count, 4)
+
+        with self.subTest("Applying"):
+            staging.begin_apply([7])
+            staging.mark_applied(first_id)
+            state = staging.state
+            assert state is not None
+            self.assertFalse(state.is_applying)
+            self.assertEqual(staging.inserted_fids, [])
+
+            page_ids = [
+                page_id for page_id, _ in staging.pages(skip_applied=True)
+            ]
+            self.assertNotIn(first_id, page_ids)
+            self.assertEqual(page_ids[0], third_id)
+
+        with self.subTest("Clear"):
+            staging.set_stage(DeltaStage.Resolved)
+            state = staging.state
+            assert state is not None
+            self.assertEqual(state.stage, DeltaStage.Resolved)
+
+            staging.clear()
+            self.assertIsNone(staging.state)
+            self.assertEqual(staging.actions_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import sqlite3
 import unittest
 from contextlib import closing
 from datetime import datetime
@@ -143,6 +144,65 @@ class TestDetachedLayerFactory(NgConnectTestCase):
                 check_test_metadata(metadata)
                 self.assertEqual(metadata.layer_name, display_name)
 
+    def test_create_from_template(self) -> None:
+        connection = self.connection(TestConnection.SandboxGuest)
+        ngw_layer = cast(
+            NGWVectorLayer,
+            self.resource(self.resource_json(TestData.Points), connection),
+        )
+
+        containers_count = 3
+        schemas: Dict[bool, List[Any]] = {}
+        created_tables: Dict[bool, List[str]] = {}
+        for use_template in (False, True):
+            factory = DetachedLayerFactory(use_template=use_template)
+
+            # Template is created with the first container
+            container_path = self.create_temp_file(".gpkg")
+            factory.create_initial_container(ngw_layer, container_path)
+            with closing(make_connection(container_path)) as sqlite_connection:
+                schemas[use_template] = sqlite_connection.execute(
+                    "SELECT type, name, tbl_name FROM sqlite_master "
+                    "ORDER BY type, name"
+                ).fetchall()
+
+            statements: List[str] = []
+
+            def traced_connection(
+                path: Path, statements: List[str] = statements
+            ) -> sqlite3.Connection:
+                sqlite_connection = make_connection(path)
+                sqlite_connection.set_trace_callback(statements.append)
+                return sqlite_connection
+
+            containers_path = [
+                self.create_temp_file(".gpkg") for _ in range(containers_count)
+            ]
+            with mock.patch(
+                "nextgis_connect.detached_editing.detached_layer_factory"
+                ".make_connection",
+                side_effect=traced_connection,
+            ):
+                for container_path in containers_path:
+                    factory.create_initial_container(ngw_layer, container_path)
+
+            created_tables[use_template] = [
+                statement
+                for statement in statements
+                if "CREATE TABLE" in statement.upper() and "ngw_" in statement
+            ]
+
+            metadata = container_metadata(containers_path[-1])
+            self._check_common_metadata(metadata, ngw_layer, connection)
+            self._check_fields(metadata, containers_path[-1])
+
+        # Containers don't depend on the way they are created
+        self.assertEqual(schemas[True], schemas[False])
+
+        # Service tables are copied from template instead of being created
+        self.assertGreater(len(created_tables[False]), 0)
+        self.assertEqual(created_tables[True], [])
+
     @mock.patch(
         "nextgis_connect.ngw_api.core.NGWVectorLayer.is_versioning_enabled",
         new_callable=mock.PropertyMock,
@@ -389,6 +449,7 @@ class TestDetachedLayerFactory(NgConnectTestCase):
 
         self._compare_layers(exported_layer, detached_layer)
         self._check_features_metadata(detached_layer)
+        self._check_spatial_index(detached_layer, metadata)
 
     def _create_pseudo_export(
         self,
@@ -572,6 +633,40 @@ class TestDetachedLayerFactory(NgConnectTestCase):
         for fid, ngw_fid in fid_to_ngw_fid.items():
             self.assertEqual(fid, ngw_fid)
 
+    def _check_spatial_index(
+        self,
+        detached_layer: QgsVectorLayer,
+        metadata: DetachedContainerMetaData,
+    ) -> None:
+        rtree_name = f"rtree_{metadata.table_name}_{metadata.geom_field}"
+        with closing(make_connection(detached_layer)) as connection:
+            indexed_count = connection.execute(
+                f'SELECT COUNT(*) FROM "{rtree_name}"'
+            ).fetchone()[0]
+            triggers_count = connection.execute(
+                """
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='trigger' AND name LIKE ? || '%'
+                """,
+                (rtree_name,),
+            ).fetchone()[0]
+
+        features_with_geometry = sum(
+            1
+            for feature in detached_layer.getFeatures()
+            if not feature.geometry().isEmpty()
+        )
+        self.assertEqual(indexed_count, features_with_geometry)
+        self.assertGreater(triggers_count, 0)
+
+        # Index is used by spatial requests
+        extent = detached_layer.extent()
+        self.assertFalse(extent.isEmpty())
+        self.assertEqual(
+            len(list(detached_layer.getFeatures(extent))),
+            features_with_geometry,
+        )
+
     def _check_fields(
         self, metadata: DetachedContainerMetaData, layer_path: Path
     ) -> None:
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import unittest
+from contextlib import closing
+from typing import List
+
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+)
+from nextgis_connect.detached_editing.metadata_cache import (
+    ContainerMetadataCache,
+)
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestContainerMetadataCache(NgConnectTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pool = ContainerConnectionPool()
+        self.cache = ContainerMetadataCache()
+        self.path = self.create_temp_file(".gpkg")
+        self.loads: List[int] = []
+        with self.pool.transaction(self.path) as cursor:
+            cursor.execute("CREATE TABLE test (value INTEGER)")
+
+    def tearDown(self) -> None:
+        self.pool.close_all()
+        super().tearDown()
+
+    def load(self, cursor: sqlite3.Cursor) -> int:
+        """Count of rows stands for metadata"""
+        count = cursor.execute("SELECT COUNT(*) FROM test").fetchone()[0]
+        self.loads.append(count)
+        return count
+
+    def metadata(self) -> int:
+        with self.pool.transaction(self.path) as cursor:
+            return self.cache.get(self.path, cursor, self.load)  # type: ignore
+
+    def insert(self, value: int) -> None:
+        with self.pool.transaction(self.path) as cursor:
+            cursor.execute("INSERT INTO test VALUES (?)", (value,))
+
+    def test_repeated_reads(self) -> None:
+        for _ in range(10):
+            self.assertEqual(self.metadata(), 0)
+        self.assertEqual(self.loads, [0])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_invalidation(self) -> None:
+        self.assertEqual(self.metadata(), 0)
+
+        with self.subTest("Changes of the same connection"):
+            self.insert(1)
+            self.assertEqual(self.metadata(), 1)
+
+        with self.subTest("Changes of another connection"):
+            with closing(sqlite3.connect(str(self.path))) as connection:
+                connection.execute("INSERT INTO test VALUES (2)")
+                connection.commit()
+            self.assertEqual(self.metadata(), 2)
+
+        with self.subTest("Changes of another thread"):
+            thread = threading.Thread(target=self.insert, args=(3,))
+            thread.start()
+            thread.join()
+            self.assertEqual(self.metadata(), 3)
+
+        with self.subTest("Explicit invalidation"):
+            self.cache.invalidate(self.path)
+            self.assertEqual(len(self.cache), 0)
+            self.assertEqual(self.metadata(), 3)
+
+        self.assertEqual(self.loads, [0, 1, 2, 3, 3])
+        self.assertEqual(self.metadata(), 3)
+        self.assertEqual(len(self.loads), 5)
+
+    def test_reopened_connection(self) -> None:
+        self.assertEqual(self.metadata(), 0)
+
+        # New connection has its own changes counter
+        self.pool.close_all()
+        self.assertEqual(self.metadata(), 0)
+        self.assertEqual(self.loads, [0, 0])
+
+        # Connections not created by the pool are not cached
+        with closing(sqlite3.connect(str(self.path))) as connection:
+            self.assertEqual(
+                self.cache.get(self.path, connection.cursor(), self.load),  # type: ignore
+                0,
+            )
+        self.assertEqual(self.loads, [0, 0, 0])
+
+    def test_uncommitted_changes(self) -> None:
+        self.assertEqual(self.metadata(), 0)
+
+        with self.assertRaises(ValueError):
+            with self.pool.transaction(self.path) as cursor:
+                cursor.execute("INSERT INTO test VALUES (1)")
+                self.assertEqual(
+                    self.cache.get(self.path, cursor, self.load),  # type: ignore
+                    1,
+                )
+                raise ValueError
+
+        # Rolled back changes are not cached
+        self.assertEqual(self.metadata(), 0)
+
+    def test_size_limit(self) -> None:
+        cache = ContainerMetadataCache(max_entries=2)
+        paths = [self.create_temp_file(".gpkg") for _ in range(3)]
+        for path in paths:
+            with self.pool.transaction(path) as cursor:
+                cursor.execute("CREATE TABLE test (value INTEGER)")
+            with self.pool.transaction(path) as cursor:
+                cache.get(path, cursor, self.load)  # type: ignore
+
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from typing import List
+
+from nextgis_connect.detached_editing.conflicts.resolving_queue import (
+    ConflictsResolvingQueue,
+)
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestConflictsResolvingQueue(NgConnectTestCase):
+    def test_one_at_a_time(self) -> None:
+        queue = ConflictsResolvingQueue()
+        events: List[str] = []
+
+        def resolving(name: str, nested: List[str]) -> None:
+            events.append(f"{name} started")
+            self.assertTrue(queue.is_resolving)
+
+            # Synchronizations finished while dialog is shown wait for it
+            for nested_name in nested:
+                queue.enqueue(lambda name=nested_name: resolving(name, []))
+                events.append(f"{nested_name} queued")
+
+            events.append(f"{name} finished")
+
+        queue.enqueue(lambda: resolving("first", ["second", "third"]))
+
+        self.assertEqual(
+            events,
+            [
+                "first started",
+                "second queued",
+                "third queued",
+                "first finished",
+                "second started",
+                "second finished",
+                "third started",
+                "third finished",
+            ],
+        )
+        self.assertFalse(queue.is_resolving)
+        self.assertEqual(len(queue), 0)
+
+    def test_failed_resolving(self) -> None:
+        queue = ConflictsResolvingQueue()
+        events: List[str] = []
+
+        def failed() -> None:
+            queue.enqueue(lambda: events.append("next"))
+            raise RuntimeError
+
+        queue.enqueue(failed)
+
+        self.assertEqual(events, ["next"])
+        self.assertFalse(queue.is_resolving)
+
+
+if __name__ == "__main__":
+    unittest.main()
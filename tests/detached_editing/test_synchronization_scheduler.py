@@ -0,0 +1,113 @@
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from unittest.mock import MagicMock
+
+from nextgis_connect.detached_editing.synchronization_scheduler import (
+    SynchronizationScheduler,
+)
+from nextgis_connect.detached_editing.utils import DetachedLayerState
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestSynchronizationScheduler(NgConnectTestCase):
+    def test_limits(self) -> None:
+        containers = [
+            self.__container(f"a_{index}", "first") for index in range(3)
+        ] + [self.__container(f"b_{index}", "second") for index in range(3)]
+
+        scheduler = SynchronizationScheduler(
+            max_parallel=3, max_parallel_per_connection=2
+        )
+
+        started = scheduler.schedule(containers)
+        self.assertEqual(len(started), 3)
+        self.assertEqual(
+            sorted(container.metadata.connection_id for container in started),
+            ["first", "first", "second"],
+        )
+
+        # All slots are busy
+        self.assertEqual(scheduler.schedule(containers), [])
+
+        # Freed slot is given to the next container
+        started[0].state = DetachedLayerState.Synchronized
+        started[0].can_start = False
+        next_started = scheduler.schedule(containers)
+        self.assertEqual(len(next_started), 1)
+        self.assertNotIn(next_started[0], started)
+
+    def test_priority(self) -> None:
+        now = datetime.now()
+        stale = self.__container("stale", check_date=now - timedelta(hours=2))
+        fresh = self.__container("fresh", check_date=now)
+        changed = self.__container("changed", has_changes=True)
+        stub = self.__container("stub", is_not_initialized=True)
+
+        scheduler = SynchronizationScheduler(
+            max_parallel=1, max_parallel_per_connection=1
+        )
+
+        order = []
+        containers = [fresh, stale, changed, stub]
+        for _ in containers:
+            started = scheduler.schedule(containers)
+            self.assertEqual(len(started), 1)
+            order.append(started[0])
+            started[0].state = DetachedLayerState.Synchronized
+            started[0].can_start = False
+
+        self.assertEqual(order, [stub, changed, stale, fresh])
+
+    def test_backoff(self) -> None:
+        failing = self.__container("failing")
+        other = self.__container("other", check_date=datetime.now())
+
+        scheduler = SynchronizationScheduler(
+            max_parallel=1, max_parallel_per_connection=1
+        )
+
+        self.assertEqual(scheduler.schedule([failing, other]), [failing])
+        failing.state = DetachedLayerState.Error
+
+        # Failed container is postponed and doesn't block others
+        self.assertEqual(scheduler.schedule([failing, other]), [other])
+        other.state = DetachedLayerState.Synchronized
+        other.can_start = False
+        self.assertEqual(scheduler.schedule([failing, other]), [])
+
+        scheduler.forget(failing.path)
+        self.assertEqual(scheduler.schedule([failing, other]), [failing])
+
+    def __container(
+        self,
+        name: str,
+        connection_id: str = "connection",
+        *,
+        is_not_initialized: bool = False,
+        has_changes: bool = False,
+        check_date: Optional[datetime] = None,
+    ) -> MagicMock:
+        container = MagicMock()
+        container.path = Path(f"{name}.gpkg")
+        container.state = DetachedLayerState.NotSynchronized
+        container.is_not_initialized = is_not_initialized
+        container.check_date = check_date
+        container.metadata.connection_id = connection_id
+        container.metadata.has_changes = has_changes
+
+        container.can_start = True
+
+        def synchronize() -> bool:
+            if not container.can_start:
+                return False
+            container.state = DetachedLayerState.Synchronization
+            return True
+
+        container.synchronize = MagicMock(side_effect=synchronize)
+        return container
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from contextlib import closing
+from unittest.mock import MagicMock
+
+from qgis.core import QgsVectorLayer
+
+from nextgis_connect.detached_editing.actions import FeatureDeleteAction
+from nextgis_connect.detached_editing.transaction_applier import (
+    TransactionApplier,
+)
+from nextgis_connect.detached_editing.utils import make_connection
+from tests.detached_editing.utils import mock_container
+from tests.ng_connect_testcase import NgConnectTestCase, TestData
+
+
+class TestTransactionApplier(NgConnectTestCase):
+    @mock_container(
+        TestData.Points, is_versioning_enabled=False, extra_features_count=10
+    )
+    def test_apply_million_deleted(
+        self, container_mock: MagicMock, qgs_layer: QgsVectorLayer
+    ) -> None:
+        with closing(make_connection(container_mock.path)) as connection:
+            ngw_fids = dict(
+                connection.execute(
+                    "SELECT fid, ngw_fid FROM ngw_features_metadata"
+                )
+            )
+            removed_fids = sorted(ngw_fids.keys())[:5]
+            connection.executemany(
+                "INSERT INTO ngw_removed_features (fid) VALUES (?)",
+                ((fid,) for fid in removed_fids),
+            )
+            connection.commit()
+
+        # Most of ids are absent in container
+        max_ngw_fid = max(ngw_fids.values())
+        actions = [
+            FeatureDeleteAction(ngw_fid)
+            for ngw_fid in range(max_ngw_fid + 1, max_ngw_fid + 1_000_000)
+        ]
+        actions.extend(
+            FeatureDeleteAction(ngw_fids[fid]) for fid in removed_fids
+        )
+
+        applier = TransactionApplier(
+            container_mock.path, container_mock.metadata
+        )
+        applier.apply(actions)
+
+        with closing(make_connection(container_mock.path)) as connection:
+            removed_count = connection.execute(
+                "SELECT count(*) FROM ngw_removed_features"
+            ).fetchone()[0]
+            remaining_fids = set(
+                row[0]
+                for row in connection.execute(
+                    "SELECT fid FROM ngw_features_metadata"
+                )
+            )
+
+        self.assertEqual(removed_count, 0)
+        self.assertEqual(
+            remaining_fids, set(ngw_fids.keys()) - set(removed_fids)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import threading
+import time
+import unittest
+from typing import Any, List, Tuple
+
+from nextgis_connect.detached_editing.actions import (
+    FeatureCreateAction,
+    FeatureDeleteAction,
+)
+from nextgis_connect.detached_editing.upload_pipeline import (
+    ActionsBatch,
+    ActionsBatcher,
+    UploadPipeline,
+)
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestUploadPipeline(NgConnectTestCase):
+    def test_run(self) -> None:
+        actions = [FeatureDeleteAction(fid) for fid in range(25)]
+
+        lock = threading.Lock()
+        in_flight = 0
+        max_in_flight = 0
+        handled: List[Tuple[List[int], Any]] = []
+
+        def serialize(batch: ActionsBatch, first_number: int) -> str:
+            return f"{first_number}:{len(batch)}"
+
+        def send(body: str) -> str:
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+
+            # Earlier batches are answered later
+            first_number = int(body.split(":")[0])
+            time.sleep(0.05 - first_number / 1000)
+
+            with lock:
+                in_flight -= 1
+            return body
+
+        def handle(batch: ActionsBatch, answer: Any) -> None:
+            self.assertEqual(threading.current_thread(), main_thread)
+            handled.append(([action.fid for action in batch], answer))
+
+        main_thread = threading.current_thread()
+
+        pipeline = UploadPipeline(
+            serialize=serialize,
+            send=send,
+            handle=handle,
+            batcher=ActionsBatcher(min_size=10, max_size=10),
+            max_requests=2,
+        )
+        sent_count = pipeline.run(iter(actions))
+
+        self.assertEqual(sent_count, 25)
+        self.assertLessEqual(max_in_flight, 2)
+        self.assertEqual(
+            [answer for _, answer in handled], ["0:10", "10:10", "20:5"]
+        )
+        self.assertEqual(
+            [fid for fids, _ in handled for fid in fids], list(range(25))
+        )
+
+    def test_error(self) -> None:
+        actions = [FeatureDeleteAction(fid) for fid in range(100)]
+        handled = []
+
+        def send(body: str) -> str:
+            if body == "30":
+                raise RuntimeError
+            return body
+
+        pipeline = UploadPipeline(
+            serialize=lambda batch, first_number: str(first_number),
+            send=send,
+            handle=lambda batch, answer: handled.append(answer),
+            batcher=ActionsBatcher(min_size=10, max_size=10),
+            max_requests=3,
+        )
+
+        with self.assertRaises(RuntimeError):
+            pipeline.run(actions)
+
+        # Requests sent before the error are handled
+        self.assertEqual(handled, ["0", "10", "20", "40", "50"])
+
+    def test_batches_by_payload(self) -> None:
+        batcher = ActionsBatcher(
+            min_size=1, max_size=1000, max_payload=1024 * 1024
+        )
+
+        points = [
+            FeatureCreateAction(fid, geom="POINT (0 0)") for fid in range(5000)
+        ]
+        polygons = [
+            FeatureCreateAction(fid, geom="0" * 400 * 1024) for fid in range(5)
+        ]
+
+        # Small actions are limited by count
+        self.assertEqual(
+            [len(batch) for batch in batcher.batches(points)],
+            [1000] * 5,
+        )
+        # Large actions are limited by payload, but never below min size
+        self.assertEqual(
+            [len(batch) for batch in batcher.batches(polygons)], [2, 2, 1]
+        )
+        huge = [FeatureCreateAction(0, geom="0" * 2048 * 1024)]
+        self.assertEqual([len(batch) for batch in batcher.batches(huge)], [1])
+
+    def test_batches_by_response_time(self) -> None:
+        max_payload = 1024 * 1024
+        batcher = ActionsBatcher(
+            min_size=1, max_size=1000, max_payload=max_payload
+        )
+        target_time = ActionsBatcher.TARGET_RESPONSE_TIME
+
+        # Slow answers decrease payload limit
+        batcher.update(max_payload, target_time * 4)
+        decreased_limit = batcher.payload_limit
+        self.assertLess(decreased_limit, max_payload)
+
+        actions = [
+            FeatureCreateAction(fid, geom="0" * 100 * 1024)
+            for fid in range(10)
+        ]
+        self.assertLess(len(next(batcher.batches(actions))), 10)
+
+        # Fast answers increase it up to max payload
+        for _ in range(10):
+            batcher.update(decreased_limit, target_time / 10)
+        self.assertEqual(batcher.payload_limit, max_payload)
+
+        # Limit never falls below the minimum
+        for _ in range(20):
+            batcher.update(ActionsBatcher.MIN_PAYLOAD, target_time * 100)
+        self.assertEqual(batcher.payload_limit, ActionsBatcher.MIN_PAYLOAD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,9 @@ from qgis.core import (
 from qgis.PyQt.QtCore import Qt
 from qgis.testing import QgisTestCase
 
+from nextgis_connect.detached_editing.connection_pool import (
+    ContainerConnectionPool,
+)
 from nextgis_connect.ngw_api.core import NGWResource
 from nextgis_connect.ngw_api.core.ngw_resource_factory import (
     NGWResourceFactory,
@@ -72,6 +75,8 @@ class NgConnectTestCase(QgisTestCase):
     def tearDownClass(cls):
         QgsSettings().clear()
 
+        ContainerConnectionPool.instance().close_all()
+
         for path in cls._temp_paths:
             safe_remove(path)
 
@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from nextgis_connect.ngw_resources_adder import LayerCreatorTask
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestLayerCreatorTask(NgConnectTestCase):
+    def test_layers_are_created_concurrently(self) -> None:
+        layers_count = LayerCreatorTask.MAX_PARALLEL_LAYERS * 2
+        barrier = threading.Barrier(LayerCreatorTask.MAX_PARALLEL_LAYERS)
+        threads_id = set()
+
+        def create_layer(uri: str, name: str, provider: str) -> MagicMock:
+            threads_id.add(threading.get_ident())
+            number = int(name)
+            if number < LayerCreatorTask.MAX_PARALLEL_LAYERS:
+                # Fails if providers are not initialized concurrently
+                barrier.wait(timeout=5)
+            # Later layers are created faster
+            time.sleep(0.01 * (layers_count - number))
+            layer = MagicMock()
+            layer.name.return_value = name
+            layer.isValid.return_value = True
+            return layer
+
+        layers_params = {
+            number: (f"https://example.com/{number}", str(number), "wfs")
+            for number in range(layers_count)
+        }
+        task = LayerCreatorTask(layers_params)
+
+        progress: List[float] = []
+        task.progressChanged.connect(progress.append)
+        created_layers: List[int] = []
+        task.layer_created.connect(
+            lambda insertion_id, layer: created_layers.append(insertion_id)
+        )
+
+        with patch(
+            "nextgis_connect.ngw_resources_adder.QgsVectorLayer",
+            side_effect=create_layer,
+        ):
+            self.assertTrue(task.run())
+
+        # Layers are collected in insertion order
+        self.assertEqual(list(task.layers.keys()), list(range(layers_count)))
+        self.assertEqual(
+            [layer.name() for layer in task.layers.values()],
+            [str(number) for number in range(layers_count)],
+        )
+        # Layers are reported in insertion order as they are ready
+        self.assertEqual(created_layers, list(range(layers_count)))
+        self.assertEqual(progress[-1], 100)
+        self.assertNotIn(threading.get_ident(), threads_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from typing import Any, Dict, Optional
+
+from nextgis_connect.search.local_search_index import (
+    LocalSearchIndex,
+    ResourceJson,
+)
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+@unittest.skipUnless(LocalSearchIndex.is_supported(), "FTS5 is not supported")
+class TestLocalSearchIndex(NgConnectTestCase):
+    def test_search(self) -> None:
+        index = LocalSearchIndex(self.create_temp_file(".sqlite"), "first")
+        index.add(
+            [
+                self.__resource(1, "Roads of Moscow"),
+                self.__resource(2, "Rivers", keyname="moscow_rivers"),
+                self.__resource(
+                    3, "Parks", metadata={"city": "Moscow", "year": 2024}
+                ),
+                self.__resource(4, "Main roads", cls="vector_layer"),
+                self.__resource(5, "Café", owner_id=42),
+            ]
+        )
+
+        # Prefix match, display names are ranked higher
+        self.assertEqual(index.search("mosc"), [1, 2, 3])
+        self.assertEqual(set(index.search("ROAD")), {1, 4})
+
+        # All words are matched first, then any of them
+        self.assertEqual(index.search("roads moscow"), [1])
+        self.assertEqual(set(index.search("main parks")), {3, 4})
+
+        # Phrase is matched in display names only
+        self.assertEqual(index.search('"main roads"'), [4])
+        self.assertEqual(index.search('"roads main"'), [])
+
+        self.assertEqual(index.search("vector_layer"), [4])
+        self.assertEqual(index.search("2024"), [3])
+        self.assertEqual(index.search("cafe"), [5])
+        self.assertEqual(index.search("42"), [5])
+        self.assertEqual(index.search("!?"), [])
+
+    def test_update(self) -> None:
+        path = self.create_temp_file(".sqlite")
+        index = LocalSearchIndex(path, "first")
+        other_index = LocalSearchIndex(path, "second")
+
+        index.add([self.__resource(1, "Roads"), self.__resource(2, "Rivers")])
+        other_index.add([self.__resource(1, "Roads")])
+
+        # Renamed resource is reindexed
+        index.add([self.__resource(1, "Highways")])
+        self.assertEqual(index.search("roads"), [])
+        self.assertEqual(index.search("highways"), [1])
+        self.assertEqual(other_index.search("roads"), [1])
+
+        index.remove([2])
+        self.assertEqual(index.search("rivers"), [])
+
+        index.clear()
+        self.assertEqual(index.search("highways"), [])
+        self.assertEqual(other_index.search("roads"), [1])
+
+    def __resource(
+        self,
+        resource_id: int,
+        display_name: str,
+        *,
+        keyname: Optional[str] = None,
+        cls: str = "resource_group",
+        owner_id: int = 1,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ResourceJson:
+        resource_json: ResourceJson = {
+            "resource": {
+                "id": resource_id,
+                "cls": cls,
+                "display_name": display_name,
+                "keyname": keyname,
+                "owner_user": {"id": owner_id},
+            }
+        }
+        if metadata is not None:
+            resource_json["resmeta"] = {"items": metadata}
+        return resource_json
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from typing import List, Optional
+from urllib.parse import quote_plus
+
+from nextgis_connect.search.search_cache import ResourceJson, SearchCache
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestSearchCache(NgConnectTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.__time = 0.0
+        self.__cache = SearchCache(
+            max_entries=3, ttl=10.0, clock=lambda: self.__time
+        )
+
+    def test_normalize_query(self) -> None:
+        self.assertEqual(
+            SearchCache.normalize_query(
+                "owner_user=1&display_name__ilike=%25ABC%25"
+                "&serialization=resource"
+            ),
+            SearchCache.normalize_query(
+                "display_name__ilike=%25abc%25&owner_user=1"
+            ),
+        )
+        self.assertNotEqual(
+            SearchCache.normalize_query("display_name=ABC"),
+            SearchCache.normalize_query("display_name=abc"),
+        )
+
+    def test_lru(self) -> None:
+        for resource_id in range(3):
+            self.__cache.put("first", f"id={resource_id}", [])
+
+        # Touch the oldest entry
+        self.assertEqual(self.__cache.get("first", "id=0"), [])
+
+        self.__cache.put("first", "id=3", [])
+        self.assertEqual(len(self.__cache), 3)
+        self.assertIsNone(self.__cache.get("first", "id=1"))
+        self.assertIsNotNone(self.__cache.get("first", "id=0"))
+        self.assertIsNone(self.__cache.get("second", "id=0"))
+
+    def test_ttl(self) -> None:
+        self.__cache.put("first", "id=1", [self.__resource(1, "one")])
+
+        self.__time = 9.0
+        self.assertIsNotNone(self.__cache.get("first", "id=1"))
+
+        self.__time = 10.0
+        self.assertIsNone(self.__cache.get("first", "id=1"))
+        self.assertEqual(len(self.__cache), 0)
+
+    def test_invalidate(self) -> None:
+        self.__cache.put("first", "id=1", [])
+        self.__cache.put("second", "id=1", [])
+
+        self.__cache.invalidate("first")
+        self.assertIsNone(self.__cache.get("first", "id=1"))
+        self.assertIsNotNone(self.__cache.get("second", "id=1"))
+
+        self.__cache.invalidate()
+        self.assertEqual(len(self.__cache), 0)
+
+    def test_prefix_refinement(self) -> None:
+        resources = [
+            self.__resource(1, "Abc"),
+            self.__resource(2, "abd"),
+            self.__resource(3, "ABCD"),
+        ]
+        self.__cache.put("first", self.__ilike("ab%"), resources)
+
+        self.assertEqual(
+            self.__ids(self.__cache.get("first", self.__ilike("abC%"))),
+            [1, 3],
+        )
+        self.assertEqual(
+            self.__ids(self.__cache.get("first", self.__ilike("abcd%"))),
+            [3],
+        )
+        self.assertEqual(
+            self.__ids(self.__cache.get("first", self.__ilike("abx%"))), []
+        )
+
+        # Wildcards and other connections are not refined
+        self.assertIsNone(self.__cache.get("first", self.__ilike("ab_%")))
+        self.assertIsNone(self.__cache.get("second", self.__ilike("abc%")))
+
+        # Prefix results can't be refined for substring search
+        self.assertIsNone(self.__cache.get("first", self.__ilike("%abc%")))
+
+    def test_substring_refinement(self) -> None:
+        resources = [
+            self.__resource(1, "Roads"),
+            self.__resource(2, "Main roads"),
+            self.__resource(3, "Rivers"),
+        ]
+        self.__cache.put("first", self.__ilike("%ro%"), resources)
+
+        self.assertEqual(
+            self.__ids(self.__cache.get("first", self.__ilike("%road%"))),
+            [1, 2],
+        )
+        self.assertEqual(
+            self.__ids(self.__cache.get("first", self.__ilike("road%"))),
+            [1],
+        )
+
+    def __ilike(self, pattern: str) -> str:
+        return f"display_name__ilike={quote_plus(pattern)}"
+
+    def __resource(self, resource_id: int, display_name: str) -> ResourceJson:
+        return {"resource": {"id": resource_id, "display_name": display_name}}
+
+    def __ids(self, resources: Optional[List[ResourceJson]]) -> List[int]:
+        assert resources is not None
+        return [resource["resource"]["id"] for resource in resources]
+
+
+if __name__ == "__main__":
+    unittest.main()
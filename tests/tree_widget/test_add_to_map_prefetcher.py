@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from typing import List, Optional
+
+from nextgis_connect.ngw_api.qt.qt_ngw_resource_model_job import (
+    NGWResourceModelJob,
+)
+from nextgis_connect.tree_widget.model import NgwAddToMapPrefetcher
+from tests.ng_connect_testcase import NgConnectTestCase
+from tests.tree_widget.utils import group_resource
+
+
+class FakeFetcher(NGWResourceModelJob):
+    def __init__(
+        self,
+        added_resources_id: List[int],
+        barrier: Optional[threading.Barrier] = None,
+        delay: float = 0.0,
+    ) -> None:
+        super().__init__()
+        self.added_resources_id = added_resources_id
+        self.barrier = barrier
+        self.delay = delay
+
+    def _do(self):
+        if self.barrier is not None:
+            # Fails if fetchers are not run concurrently
+            self.barrier.wait(timeout=5)
+        time.sleep(self.delay)
+        self.statusChanged.emit(f"Fetched {self.added_resources_id}")
+        self.result.added_resources = [
+            group_resource(resource_id, 0)
+            for resource_id in self.added_resources_id
+        ]
+
+
+class TestAddToMapPrefetcher(NgConnectTestCase):
+    def test_workers_are_run_concurrently(self) -> None:
+        workers_count = NgwAddToMapPrefetcher.MAX_PARALLEL_JOBS
+        barrier = threading.Barrier(workers_count)
+        workers = [
+            FakeFetcher([number], barrier)
+            for number in range(1, workers_count + 1)
+        ]
+        prefetcher = NgwAddToMapPrefetcher(workers)
+
+        statuses: List[str] = []
+        prefetcher.statusChanged.connect(statuses.append)
+
+        # Barrier isn't passed if workers are run one by one
+        prefetcher._do()
+
+        self.assertEqual(
+            sorted(
+                ngw_resource.resource_id
+                for ngw_resource in prefetcher.result.added_resources
+            ),
+            list(range(1, workers_count + 1)),
+        )
+
+        # Statuses of workers and aggregate progress are reported
+        self.assertEqual(len(statuses), workers_count * 2)
+        self.assertIn(
+            f"Preparing resources ({workers_count}/{workers_count})",
+            statuses,
+        )
+
+    def test_results_are_merged_in_order(self) -> None:
+        prefetcher = NgwAddToMapPrefetcher(
+            [FakeFetcher([1, 2, 3], delay=0.1), FakeFetcher([3, 4, 1])]
+        )
+        prefetcher._do()
+
+        # Resources fetched by several workers are added once, in order of
+        # workers
+        self.assertEqual(
+            [
+                ngw_resource.resource_id
+                for ngw_resource in prefetcher.result.added_resources
+            ],
+            [1, 2, 3, 4],
+        )
+
+    def test_error_is_propagated(self) -> None:
+        failing_worker = FakeFetcher([1])
+        failing_worker._do = lambda: 1 / 0  # type: ignore
+        prefetcher = NgwAddToMapPrefetcher([failing_worker, FakeFetcher([2])])
+
+        with self.assertRaises(ZeroDivisionError):
+            prefetcher._do()
+
+
+if __name__ == "__main__":
+    unittest.main()
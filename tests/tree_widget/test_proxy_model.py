@@ -0,0 +1,117 @@
+import unittest
+from typing import Any, List, Set
+from unittest.mock import patch
+
+from qgis.PyQt.QtCore import QModelIndex
+
+from nextgis_connect.tree_widget.item import QNGWResourceItem
+from nextgis_connect.tree_widget.model import QNGWResourceTreeModel
+from nextgis_connect.tree_widget.proxy_model import NgConnectProxyModel
+from tests.ng_connect_testcase import NgConnectTestCase
+from tests.tree_widget.utils import fill_model, group_resource
+
+
+class TestProxyModel(NgConnectTestCase):
+    def test_filter(self) -> None:
+        model = QNGWResourceTreeModel()
+        fill_model(model, groups_count=3, children_count=3)
+        nested_index = model.addNGWResourceToTree(
+            model.index_from_id(1001), group_resource(5001, 1001)
+        )
+
+        proxy_model = NgConnectProxyModel(None)
+        proxy_model.setSourceModel(model)
+
+        all_resources = self.__visible_resources(proxy_model)
+        self.assertEqual(len(all_resources), 1 + 3 + 3 * 3 + 1)
+
+        proxy_model.set_resources_id([1001, 2, 2002])
+        self.assertEqual(
+            self.__visible_resources(proxy_model),
+            {0, 1, 1001, 5001, 2, 2001, 2002, 2003},
+        )
+        self.assertEqual(sorted(proxy_model.expanded_resources), [0, 1])
+
+        # Rows added inside found resource are shown
+        model.addNGWResourceToTree(nested_index, group_resource(6001, 5001))
+        model.addNGWResourceToTree(
+            model.index_from_id(3), group_resource(6002, 3)
+        )
+        visible_resources = self.__visible_resources(proxy_model)
+        self.assertIn(6001, visible_resources)
+        self.assertNotIn(6002, visible_resources)
+
+        proxy_model.set_resources_id([-1])
+        self.assertEqual(self.__visible_resources(proxy_model), set())
+        self.assertEqual(proxy_model.expanded_resources, [])
+
+        proxy_model.set_resources_id([])
+        self.assertEqual(
+            len(self.__visible_resources(proxy_model)),
+            len(all_resources) + 2,
+        )
+
+    def test_filter_lookups_scaling(self) -> None:
+        lookups_counts: List[int] = []
+        resources_counts: List[int] = []
+
+        item_data = QNGWResourceItem.data
+        lookups_count = 0
+
+        def data(item: QNGWResourceItem, role: int) -> Any:
+            nonlocal lookups_count
+            if role == QNGWResourceItem.NGWResourceIdRole:
+                lookups_count += 1
+            return item_data(item, role)
+
+        for groups_count in (5, 50):
+            model = QNGWResourceTreeModel()
+            resources_id = fill_model(
+                model, groups_count=groups_count, children_count=1000
+            )
+            found_resources_id = [
+                group_id * 1000 + 500 for group_id in range(1, groups_count)
+            ]
+
+            proxy_model = NgConnectProxyModel(None)
+            proxy_model.setSourceModel(model)
+
+            lookups_count = 0
+            with patch.object(QNGWResourceItem, "data", data):
+                proxy_model.set_resources_id(found_resources_id)
+                visible_resources = self.__visible_resources(proxy_model)
+            lookups_counts.append(lookups_count)
+            resources_counts.append(len(resources_id))
+
+            self.assertEqual(
+                len(visible_resources), len(found_resources_id) * 2 + 1
+            )
+
+        small_lookups_per_resource, large_lookups_per_resource = (
+            lookups / count
+            for lookups, count in zip(lookups_counts, resources_counts)
+        )
+
+        # Filtering work should grow linearly with tree size
+        self.assertLessEqual(
+            large_lookups_per_resource, small_lookups_per_resource * 2
+        )
+
+    def __visible_resources(
+        self, proxy_model: NgConnectProxyModel
+    ) -> Set[int]:
+        resources_id = set()
+        parents = [QModelIndex()]
+        while len(parents) > 0:
+            parent = parents.pop()
+            for row in range(proxy_model.rowCount(parent)):
+                index = proxy_model.index(row, 0, parent)
+                resources_id.add(
+                    index.data(QNGWResourceItem.NGWResourceIdRole)
+                )
+                parents.append(index)
+        return resources_id
+
+
+if __name__ == "__main__":
+    unittest.main()
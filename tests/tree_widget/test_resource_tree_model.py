@@ -0,0 +1,225 @@
+import random
+import unittest
+from typing import List, Tuple
+from unittest.mock import MagicMock, patch
+
+from qgis.PyQt.QtWidgets import QTreeWidgetItem
+
+from nextgis_connect.tree_widget.item import QModelItem, QNGWResourceItem
+from nextgis_connect.tree_widget.model import QNGWResourceTreeModel
+from nextgis_connect.utils import SupportStatus
+from tests.ng_connect_testcase import NgConnectTestCase
+from tests.tree_widget.utils import fill_model, group_resource
+
+
+class TestResourceTreeModel(NgConnectTestCase):
+    def test_index_from_id(self) -> None:
+        model = QNGWResourceTreeModel()
+        fill_model(model, groups_count=3, children_count=4)
+
+        for resource_id in [0, 1, 2, 3, 1001, 2004, 3002]:
+            index = model.index_from_id(resource_id)
+            assert index is not None
+            self.assertTrue(index.isValid())
+            self.assertEqual(
+                index.data(QNGWResourceItem.NGWResourceIdRole), resource_id
+            )
+            self.assertEqual(
+                model.index(index.row(), 0, index.parent()), index
+            )
+
+        # Children are sorted by name regardless of insertion order
+        self.assertEqual(
+            [model.index_from_id(2000 + number).row() for number in (1, 4)],
+            [0, 3],
+        )
+
+        # Search inside subtree
+        group_index = model.index_from_id(2)
+        self.assertIsNotNone(model.index_from_id(2001, group_index))
+        self.assertIsNone(model.index_from_id(3001, group_index))
+
+        self.assertIsNone(model.index_from_id(100500))
+
+        # Edited resource is recreated without children
+        edited_group = group_resource(1, 0)
+        job = MagicMock()
+        job.model_response = None
+        job.getResult.return_value = MagicMock(
+            added_resources=[],
+            edited_resources=[edited_group],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        model.processJobResult(job)
+
+        edited_index = model.index_from_id(1)
+        assert edited_index is not None
+        self.assertIs(model.resource(edited_index), edited_group)
+        self.assertIsNone(model.index_from_id(1001))
+        self.assertIsNotNone(model.index_from_id(2001))
+
+        model.cleanModel()
+        self.assertIsNone(model.index_from_id(0))
+
+    def test_add_subtree(self) -> None:
+        model = QNGWResourceTreeModel()
+        fill_model(model, groups_count=2, children_count=0)
+
+        inserted_rows: List[Tuple[int, int, int]] = []
+        model.rowsInserted.connect(
+            lambda parent, first, last: inserted_rows.append(
+                (parent.data(QNGWResourceItem.NGWResourceIdRole), first, last)
+            )
+        )
+
+        # Subtree is ordered from parents to children
+        subtree = [group_resource(1000 + number, 1) for number in (3, 1, 2)]
+        subtree += [group_resource(10000 + number, 1001) for number in (2, 1)]
+        subtree.append(group_resource(1004, 1))
+
+        job = MagicMock()
+        job.model_response = None
+        job.getResult.return_value = MagicMock(
+            main_resource_id=None,
+            added_resources=subtree,
+            edited_resources=[],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        model.processJobResult(job)
+
+        # One insertion per parent
+        self.assertEqual(inserted_rows, [(1, 0, 3), (1001, 0, 1)])
+        self.assertEqual(
+            [
+                model.resource(
+                    model.index(row, 0, model.index_from_id(1))
+                ).resource_id
+                for row in range(4)
+            ],
+            [1001, 1002, 1003, 1004],
+        )
+        self.assertEqual(model.index_from_id(10002).row(), 1)
+
+        # Existing children are skipped, new ones are inserted one by one
+        inserted_rows.clear()
+        job.getResult.return_value.added_resources = [
+            group_resource(1001, 1),
+            group_resource(1000, 1),
+        ]
+        model.processJobResult(job)
+        self.assertEqual(inserted_rows, [(1, 0, 0)])
+        self.assertEqual(model.rowCount(model.index_from_id(1)), 5)
+
+    def test_paged_children(self) -> None:
+        model = QNGWResourceTreeModel()
+        model.support_status = SupportStatus.SUPPORTED
+        fill_model(model, groups_count=1, children_count=0)
+
+        page_size = QNGWResourceTreeModel.CHILDREN_PAGE_SIZE
+        children_count = page_size * 2 + page_size // 2
+        children_id = [1000 + number for number in range(children_count)]
+        random.Random(children_count).shuffle(children_id)
+
+        job = MagicMock()
+        job.model_response = None
+        job.getResult.return_value = MagicMock(
+            main_resource_id=None,
+            added_resources=[
+                group_resource(child_id, 1) for child_id in children_id
+            ],
+            edited_resources=[],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        model.processJobResult(job)
+
+        # Only the first page of sorted children gets items
+        group_index = model.index_from_id(1)
+        assert group_index is not None
+        self.assertEqual(model.rowCount(group_index), page_size)
+        self.assertEqual(
+            model.resource(model.index(page_size - 1, 0, group_index)),
+            model.resource(1000 + page_size - 1),
+        )
+        self.assertEqual(
+            len(model.children_resources(group_index)), children_count
+        )
+
+        self.assertTrue(model.canFetchMore(group_index))
+        model.fetchMore(group_index)
+        self.assertEqual(model.rowCount(group_index), page_size * 2)
+
+        # Pending resource is materialized on lookup
+        last_child_index = model.index_from_id(1000 + children_count - 1)
+        assert last_child_index is not None
+        self.assertEqual(last_child_index.row(), children_count - 1)
+        self.assertEqual(model.rowCount(group_index), children_count)
+        self.assertFalse(model.canFetchMore(group_index))
+
+    def test_fetch_pending_descendants(self) -> None:
+        model = QNGWResourceTreeModel()
+        model.support_status = SupportStatus.SUPPORTED
+        fill_model(model, groups_count=2, children_count=0)
+
+        page_size = QNGWResourceTreeModel.CHILDREN_PAGE_SIZE
+        job = MagicMock()
+        job.model_response = None
+        job.getResult.return_value = MagicMock(
+            main_resource_id=None,
+            added_resources=[
+                group_resource(group_id * 10000 + number, group_id)
+                for group_id in (1, 2)
+                for number in range(page_size * 2)
+            ],
+            edited_resources=[],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        model.processJobResult(job)
+
+        # Items are created for the whole subtree only
+        model.fetch_pending_descendants(model.index_from_id(1))
+        self.assertEqual(model.rowCount(model.index_from_id(1)), page_size * 2)
+        self.assertFalse(model.canFetchMore(model.index_from_id(1)))
+        self.assertEqual(model.rowCount(model.index_from_id(2)), page_size)
+
+    def test_index_from_id_children_scans(self) -> None:
+        model = QNGWResourceTreeModel()
+        resources_id = fill_model(model, groups_count=10, children_count=1000)
+
+        child_calls = 0
+        item_child = QModelItem.child
+
+        def child(item: QModelItem, row: int) -> QTreeWidgetItem:
+            nonlocal child_calls
+            child_calls += 1
+            return item_child(item, row)
+
+        with patch.object(QModelItem, "child", child):
+            for resource_id in resources_id:
+                index = model.index_from_id(resource_id)
+                assert index is not None
+                self.assertEqual(
+                    model.resource(index).resource_id, resource_id
+                )
+
+        # Siblings are not scanned for every lookup
+        self.assertLessEqual(child_calls, len(resources_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
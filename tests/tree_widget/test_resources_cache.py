@@ -0,0 +1,256 @@
+import time
+import unittest
+from typing import Dict, List
+from unittest.mock import MagicMock, patch
+
+from nextgis_connect.ngw_api.core import NGWResource
+from nextgis_connect.ngw_api.qgis.qgis_ngw_connection import QgsNgwConnection
+from nextgis_connect.tree_widget.item import QNGWResourceItem
+from nextgis_connect.tree_widget.model import (
+    NGWResourcesModelJob,
+    QNGWResourceTreeModel,
+)
+from nextgis_connect.tree_widget.resources_cache import (
+    ResourceJson,
+    ResourcesTreeCache,
+)
+from nextgis_connect.utils import SupportStatus
+from tests.ng_connect_testcase import NgConnectTestCase
+from tests.tree_widget.utils import group_resource, group_resource_json
+
+
+class TestResourcesTreeCache(NgConnectTestCase):
+    def test_store_branches(self) -> None:
+        path = self.create_temp_file(".sqlite")
+        cache = ResourcesTreeCache(path, "first")
+        other_cache = ResourcesTreeCache(path, "second")
+
+        self.assertIsNone(cache.root())
+
+        cache.store_root(group_resource_json(0, None))
+        cache.store_branches(
+            {0: [group_resource_json(1, 0), group_resource_json(2, 0)]}
+        )
+        cache.store_branches(
+            {
+                1: [group_resource_json(10, 1), group_resource_json(11, 1)],
+                2: [],
+            }
+        )
+        cache.store_branches({10: [group_resource_json(100, 10)]})
+
+        self.assertEqual(cache.root(), group_resource_json(0, None))
+        self.assertEqual(
+            self.__children_id(cache.branches()),
+            {0: [1, 2], 1: [10, 11], 2: [], 10: [100]},
+        )
+
+        # Subtrees of removed children are removed too
+        cache.store_branches(
+            {0: [group_resource_json(2, 0), group_resource_json(3, 0)]}
+        )
+        self.assertEqual(
+            self.__children_id(cache.branches()), {0: [2, 3], 2: []}
+        )
+
+        # Connections don't share resources
+        self.assertIsNone(other_cache.root())
+        self.assertEqual(other_cache.branches(), {})
+
+        cache.clear()
+        self.assertIsNone(cache.root())
+
+    def test_restore_tree(self) -> None:
+        cache = ResourcesTreeCache(self.create_temp_file(".sqlite"), "test")
+        cache.store_root(group_resource_json(0, None))
+        cache.store_branches(
+            {0: [group_resource_json(2, 0), group_resource_json(1, 0)]}
+        )
+        cache.store_branches({2: [group_resource_json(2001, 2)]})
+
+        ngw_connection = MagicMock(spec=QgsNgwConnection)
+        ngw_connection.connection_id = "test"
+        ngw_connection.get_version.return_value = "5.0.0"
+
+        model = QNGWResourceTreeModel()
+        with patch.object(
+            ResourcesTreeCache, "for_connection", return_value=cache
+        ), patch(
+            "nextgis_connect.utils.is_version_supported",
+            return_value=SupportStatus.SUPPORTED,
+        ):
+            model.resetModel(ngw_connection)
+
+        group_index = model.index_from_id(2)
+        assert group_index is not None
+        self.assertEqual(group_index.row(), 1)
+        self.assertIsNotNone(model.index_from_id(2001, group_index))
+
+        # Restored branches are revalidated on fetch
+        self.assertTrue(model.canFetchMore(model.index(0, 0)))
+        self.assertTrue(model.canFetchMore(group_index))
+        self.assertFalse(model.canFetchMore(model.index_from_id(2001)))
+
+        job = MagicMock()
+        job.model_response = None
+        job.getJobId.return_value = "NgwRevalidateChildren"
+        job.getResult.return_value = MagicMock(
+            main_resource_id=2,
+            added_resources=[group_resource(2002, 2)],
+            edited_resources=[],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        model.processJobResult(job)
+        model.wait_for_cache_writes()
+
+        self.assertEqual(model.rowCount(group_index), 2)
+        self.assertEqual(
+            model.data(
+                group_index, QNGWResourceItem.NGWResourceRole
+            ).children_count,
+            2,
+        )
+        self.assertEqual(self.__children_id(cache.branches())[2], [2001, 2002])
+
+    def test_revalidate_in_background(self) -> None:
+        cache = ResourcesTreeCache(self.create_temp_file(".sqlite"), "test")
+        cache.store_root(group_resource_json(0, None))
+        cache.store_branches(
+            {0: [group_resource_json(1, 0), group_resource_json(2, 0)]}
+        )
+        cache.store_branches(
+            {
+                1: [group_resource_json(10, 1)],
+                2: [group_resource_json(20, 2)],
+                10: [],
+            }
+        )
+
+        ngw_connection = MagicMock(spec=QgsNgwConnection)
+        ngw_connection.connection_id = "test"
+        ngw_connection.get_version.return_value = "5.0.0"
+
+        model = QNGWResourceTreeModel()
+        with patch.object(
+            ResourcesTreeCache, "for_connection", return_value=cache
+        ), patch(
+            "nextgis_connect.utils.is_version_supported",
+            return_value=SupportStatus.SUPPORTED,
+        ):
+            model.resetModel(ngw_connection)
+
+        def revalidating_ids() -> List[int]:
+            return [
+                resource_id
+                for resource_id in (0, 1, 2, 10)
+                if model._isIndexLockedByJob(model.index_from_id(resource_id))
+            ]
+
+        with patch.object(NGWResourcesModelJob, "start"), patch.object(
+            model, "processJobResult"
+        ):
+            model.revalidate_in_background()
+
+            # Branches are revalidated from the root within the limit
+            self.assertEqual(revalidating_ids(), [0, 1])
+            self.assertEqual(len(model.jobs), 2)
+
+            # Next branch is revalidated when a previous one is finished
+            model.jobs[0].finished.emit()
+            self.assertEqual(revalidating_ids(), [1, 2])
+
+            model.jobs[0].finished.emit()
+            model.jobs[0].finished.emit()
+            self.assertEqual(revalidating_ids(), [10])
+
+            model.jobs[0].finished.emit()
+            self.assertEqual(len(model.jobs), 0)
+            self.assertFalse(model.canFetchMore(model.index_from_id(2)))
+
+    def test_cache_writer_lifetime(self) -> None:
+        cache = ResourcesTreeCache(self.create_temp_file(".sqlite"), "test")
+        cache.store_root(group_resource_json(0, None))
+        cache.store_branches({0: [group_resource_json(1, 0)]})
+        cache.store_branches({1: []})
+
+        model = QNGWResourceTreeModel()
+        self.__reset_model(model, cache)
+
+        store_branches = cache.store_branches
+
+        def slow_store_branches(
+            branches: Dict[int, List[ResourceJson]],
+        ) -> None:
+            time.sleep(0.1)
+            store_branches(branches)
+
+        with patch.object(
+            cache, "store_branches", side_effect=slow_store_branches
+        ):
+            model.processJobResult(
+                self.__revalidation_job(1, group_resource(10, 1))
+            )
+
+            # Queued writes are finished before connection is changed
+            model.resetModel(None)
+
+        self.assertEqual(self.__children_id(cache.branches())[1], [10])
+
+        # Results of jobs finished after closing are not written
+        self.__reset_model(model, cache)
+        model.close()
+        model.processJobResult(
+            self.__revalidation_job(1, group_resource(11, 1))
+        )
+        self.assertEqual(self.__children_id(cache.branches())[1], [10])
+
+    def __reset_model(
+        self, model: QNGWResourceTreeModel, cache: ResourcesTreeCache
+    ) -> None:
+        ngw_connection = MagicMock(spec=QgsNgwConnection)
+        ngw_connection.connection_id = "test"
+        ngw_connection.get_version.return_value = "5.0.0"
+
+        with patch.object(
+            ResourcesTreeCache, "for_connection", return_value=cache
+        ), patch(
+            "nextgis_connect.utils.is_version_supported",
+            return_value=SupportStatus.SUPPORTED,
+        ):
+            model.resetModel(ngw_connection)
+
+    def __revalidation_job(
+        self, parent_id: int, added_resource: NGWResource
+    ) -> MagicMock:
+        job = MagicMock()
+        job.model_response = None
+        job.getJobId.return_value = "NgwRevalidateChildren"
+        job.getResult.return_value = MagicMock(
+            main_resource_id=parent_id,
+            added_resources=[added_resource],
+            edited_resources=[],
+            deleted_resources=[],
+            dangling_resources=[],
+            found_resources=None,
+            not_permitted_resources=[],
+            **{"is_empty.return_value": False},
+        )
+        return job
+
+    def __children_id(
+        self, branches: Dict[int, List[ResourceJson]]
+    ) -> Dict[int, List[int]]:
+        return {
+            parent_id: sorted(
+                child_json["resource"]["id"] for child_json in children_json
+            )
+            for parent_id, children_json in branches.items()
+        }
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import random
+import re
+import threading
+import unittest
+from types import SimpleNamespace
+from typing import Any, ClassVar, Dict, List
+from unittest.mock import MagicMock, patch
+
+from nextgis_connect.tree_widget.model import NgwSearch
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class CountingResource:
+    """Search hit which counts reads of its ids"""
+
+    reads_count: ClassVar[int] = 0
+
+    def __init__(self, resource_id: int, parent_id: int) -> None:
+        self.__resource_id = resource_id
+        self.__parent_id = parent_id
+
+    @property
+    def resource_id(self) -> int:
+        CountingResource.reads_count += 1
+        return self.__resource_id
+
+    @property
+    def parent_id(self) -> int:
+        CountingResource.reads_count += 1
+        return self.__parent_id
+
+
+class TestSearch(NgConnectTestCase):
+    def test_parallel_queries(self) -> None:
+        threads_id = set()
+
+        def get(url: str) -> List[Dict[str, Any]]:
+            threads_id.add(threading.get_ident())
+            match = re.search(r"[?&]id=(\d+)", url)
+            assert match is not None
+            resource_id = int(match.group(1))
+            # Every query also finds the same common resource
+            return [
+                {"resource": {"id": resource_id, "parent": {"id": 0}}},
+                {"resource": {"id": 100, "parent": {"id": 0}}},
+            ]
+
+        worker = NgwSearch("@id IN (1, 2, 3, 4, 5)", {0})
+        updates: List[List[int]] = []
+        worker.found_resources_updated.connect(updates.append)
+
+        with patch(
+            "nextgis_connect.tree_widget.model.NgwConnectionsManager"
+        ) as manager_mock, patch(
+            "nextgis_connect.tree_widget.model.QgsNgwConnection"
+        ) as connection_mock:
+            manager_mock.return_value.current_connection_id = "test"
+            connection_mock.return_value = MagicMock(
+                **{"get.side_effect": get}
+            )
+            worker._do()
+
+        found_resources = worker.result.found_resources
+        self.assertEqual(sorted(found_resources), [1, 2, 3, 4, 5, 100])
+        self.assertEqual(len(worker.parents), len(found_resources))
+
+        # Partial results grow up to the final one
+        self.assertGreater(len(updates), 0)
+        for previous, current in zip(updates, updates[1:]):
+            self.assertEqual(current[: len(previous)], previous)
+        self.assertEqual(updates[-1], found_resources)
+
+        self.assertNotIn(threading.get_ident(), threads_id)
+
+    def test_sort_by_hierarchy(self) -> None:
+        resources = [
+            self.__resource(3, 2),
+            self.__resource(2, 1),
+            self.__resource(4, 1),
+            self.__resource(1, 0),
+            self.__resource(2, 1),
+            # Unknown parent
+            self.__resource(5, 100),
+            self.__resource(6, 5),
+            # Cycle
+            self.__resource(7, 8),
+            self.__resource(8, 7),
+        ]
+
+        sorted_resources, orphans = NgwSearch.sort_by_hierarchy(resources, {0})
+
+        self.assertEqual(
+            [resource.resource_id for resource in sorted_resources],
+            [1, 2, 4, 3],
+        )
+        self.assertEqual(
+            sorted(orphan.resource_id for orphan in orphans), [5, 6, 7, 8]
+        )
+
+    def test_sort_by_hierarchy_scaling(self) -> None:
+        for hits_count in (2000, 20000):
+            resources = [
+                CountingResource(resource.resource_id, resource.parent_id)
+                for resource in self.__deep_hierarchy(
+                    hits_count, depth=100, hits_per_group=200
+                )
+            ]
+
+            CountingResource.reads_count = 0
+            sorted_resources, orphans = NgwSearch.sort_by_hierarchy(
+                resources,
+                {0},  # type: ignore
+            )
+
+            # Each resource is visited a constant number of times
+            self.assertLessEqual(
+                CountingResource.reads_count, 4 * len(resources)
+            )
+
+            self.assertEqual(len(orphans), 0)
+            self.assertEqual(len(sorted_resources), len(resources))
+
+            seen_resources = {0}
+            for resource in sorted_resources:
+                self.assertIn(resource.parent_id, seen_resources)
+                seen_resources.add(resource.resource_id)
+
+    def __deep_hierarchy(
+        self, hits_count: int, *, depth: int, hits_per_group: int
+    ) -> List[Any]:
+        """Chain of groups with hits spread over them in random order"""
+        resources = [
+            self.__resource(group_id, group_id - 1)
+            for group_id in range(1, depth + 1)
+        ]
+        resources.extend(
+            self.__resource(
+                depth + 1 + hit_number,
+                (hit_number // hits_per_group) % depth + 1,
+            )
+            for hit_number in range(hits_count)
+        )
+        random.Random(hits_count).shuffle(resources)
+        return resources
+
+    def __resource(self, resource_id: int, parent_id: int) -> Any:
+        return SimpleNamespace(resource_id=resource_id, parent_id=parent_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import re
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from nextgis_connect.ngw_api.core import NGWVectorLayer
+from nextgis_connect.tree_widget.model import NgwCreateVectorLayersStubs
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+class TestVectorLayersStubs(NgConnectTestCase):
+    def test_stubs_creation(self) -> None:
+        batch_size = NgwCreateVectorLayersStubs.METADATA_BATCH_SIZE
+        layers_count = batch_size + batch_size // 2
+        layers = [self.__layer(layer_id) for layer_id in range(layers_count)]
+
+        requests: List[str] = []
+
+        def get(url: str) -> List[Dict[str, Any]]:
+            requests.append(url)
+            match = re.search(r"[?&]id__in=([\d,]+)", url)
+            assert match is not None
+            return [
+                {"resource": {"id": int(layer_id)}}
+                for layer_id in match.group(1).split(",")
+                # Deleted layer is not found
+                if int(layer_id) != 0
+            ]
+
+        threads_id = set()
+        created_layers_id = []
+        lock = threading.Lock()
+
+        def create_initial_container(ngw_layer, container_path: Path) -> None:
+            with lock:
+                threads_id.add(threading.get_ident())
+                created_layers_id.append(ngw_layer.resource_id)
+            if ngw_layer.resource_id == 1:
+                raise ValueError("Broken layer")
+
+        fetched_layers_id = []
+        connections_threads_id = []
+
+        def get_resource(resource_id: int) -> MagicMock:
+            with lock:
+                fetched_layers_id.append(resource_id)
+            return self.__layer(resource_id)
+
+        def create_connection(connection_id: str) -> MagicMock:
+            connections_threads_id.append(threading.get_ident())
+            return MagicMock()
+
+        failed_layers_id = []
+        worker = NgwCreateVectorLayersStubs(layers, is_new_api=True)
+        worker.layers_failed.connect(failed_layers_id.extend)
+
+        with tempfile.TemporaryDirectory() as cache_directory, patch(
+            "nextgis_connect.tree_widget.model.NgwConnectionsManager"
+        ) as manager_mock, patch(
+            "nextgis_connect.tree_widget.model.NgConnectCacheManager"
+        ) as cache_manager_mock, patch(
+            "nextgis_connect.tree_widget.model.NGWResourceFactory"
+        ) as factory_mock, patch(
+            "nextgis_connect.tree_widget.model.DetachedLayerFactory"
+        ) as detached_factory_mock, patch(
+            "nextgis_connect.tree_widget.model.QgsNgwConnection",
+            side_effect=create_connection,
+        ):
+            manager_mock.return_value.connection.return_value = MagicMock(
+                domain_uuid="test"
+            )
+            cache_manager_mock.return_value.cache_directory = cache_directory
+            factory_mock.return_value.connection.get.side_effect = get
+            factory_mock.return_value.get_resource_by_json.side_effect = (
+                lambda resource_json: self.__layer(
+                    resource_json["resource"]["id"]
+                )
+            )
+            factory_mock.return_value.get_resource.side_effect = get_resource
+            detached_factory_mock.return_value.create_initial_container.side_effect = create_initial_container
+
+            # Broken layer doesn't prevent other layers from processing
+            worker._do()
+
+        self.assertEqual(failed_layers_id, [1])
+
+        # Metadata is fetched in batches
+        self.assertEqual(len(requests), 2)
+
+        # Layer not found with search is fetched separately with a
+        # connection of pool thread
+        self.assertEqual(fetched_layers_id, [0])
+        self.assertEqual(len(connections_threads_id), 1)
+        self.assertIn(connections_threads_id[0], threads_id)
+        for layer in layers:
+            layer.update.assert_not_called()
+
+        self.assertEqual(sorted(created_layers_id), list(range(layers_count)))
+        self.assertNotIn(threading.get_ident(), threads_id)
+
+    def test_all_layers_failed(self) -> None:
+        layers = [self.__layer(layer_id) for layer_id in range(3)]
+        worker = NgwCreateVectorLayersStubs(layers, is_new_api=False)
+
+        with tempfile.TemporaryDirectory() as cache_directory, patch(
+            "nextgis_connect.tree_widget.model.NgwConnectionsManager"
+        ) as manager_mock, patch(
+            "nextgis_connect.tree_widget.model.NgConnectCacheManager"
+        ) as cache_manager_mock, patch(
+            "nextgis_connect.tree_widget.model.NGWResourceFactory"
+        ), patch("nextgis_connect.tree_widget.model.QgsNgwConnection"), patch(
+            "nextgis_connect.tree_widget.model.DetachedLayerFactory"
+        ) as detached_factory_mock:
+            manager_mock.return_value.connection.return_value = MagicMock(
+                domain_uuid="test"
+            )
+            cache_manager_mock.return_value.cache_directory = cache_directory
+            detached_factory_mock.return_value.create_initial_container.side_effect = ValueError(
+                "Broken layer"
+            )
+
+            with self.assertRaises(ValueError):
+                worker._do()
+
+    def __layer(self, layer_id: int) -> MagicMock:
+        layer = MagicMock(spec=NGWVectorLayer)
+        layer.resource_id = layer_id
+        layer.display_name = f"Layer {layer_id}"
+        layer.connection_id = "test"
+        layer.connection = MagicMock()
+        return layer
+
+
+if __name__ == "__main__":
+    unittest.main()
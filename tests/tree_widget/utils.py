@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from qgis.PyQt.QtCore import QModelIndex
+
+from nextgis_connect.ngw_api.core import NGWResource
+from nextgis_connect.tree_widget.model import QNGWResourceTreeModel
+from tests.ng_connect_testcase import NgConnectTestCase
+
+
+def group_resource_json(
+    resource_id: int, parent_id: Optional[int]
+) -> Dict[str, Any]:
+    return {
+        "resource": {
+            "id": resource_id,
+            "cls": "resource_group",
+            "parent": None if parent_id is None else {"id": parent_id},
+            "owner_user": {"id": 1},
+            "permissions": [],
+            "keyname": None,
+            "display_name": f"Resource {resource_id:06}",
+            "description": None,
+            "children": False,
+            "interfaces": [],
+            "scopes": ["resource"],
+        },
+        "resmeta": {"items": {}},
+    }
+
+
+def group_resource(resource_id: int, parent_id: Optional[int]) -> NGWResource:
+    return NgConnectTestCase.resource(
+        group_resource_json(resource_id, parent_id)
+    )
+
+
+def fill_model(
+    model: QNGWResourceTreeModel, *, groups_count: int, children_count: int
+) -> List[int]:
+    """
+    Add root group with groups and their children.
+
+    Group ids start from 1, child ids are ``group_id * 1000 + number``.
+    """
+    root_index = model.addNGWResourceToTree(
+        QModelIndex(), group_resource(0, None)
+    )
+    resources_id = [0]
+
+    for group_id in range(1, groups_count + 1):
+        group_index = model.addNGWResourceToTree(
+            root_index, group_resource(group_id, 0)
+        )
+        resources_id.append(group_id)
+
+        # Insert in reverse order to check sorting
+        for child_number in range(children_count, 0, -1):
+            child_id = group_id * 1000 + child_number
+            model.addNGWResourceToTree(
+                group_index, group_resource(child_id, group_id)
+            )
+            resources_id.append(child_id)
+
+    return resources_id